@@ -0,0 +1,94 @@
+# admission.py
+import asyncio
+import time
+from config import ADMISSION_THRESHOLDS, ADMISSION_CLEAR_RATIO, ADMISSION_CHECK_INTERVAL, ADMISSION_NOTIFY_INTERVAL, logger
+
+# Tahap degradasi, dari normal sampai paling berat; tahap yang lebih tinggi mencakup tahap di bawahnya
+ADMISSION_STEPS = [
+    "normal",
+    "terjemahan UNFILTERED dilewati",
+    "hanya baris pertama yang diteruskan",
+    "kategori prioritas terendah dibuang",
+]
+
+class AdmissionController:
+    """
+    Menentukan tahap degradasi dari sinyal beban (pesan dalam proses, antrian terjemahan, antrian Discord).
+    Tahap naik begitu salah satu sinyal melewati ambangnya dan baru turun setelah sinyal berada di
+    bawah ambang x clear_ratio, sehingga tahap tidak bolak-balik di sekitar ambang.
+    """
+
+    def __init__(self, signals, thresholds=ADMISSION_THRESHOLDS, clear_ratio=ADMISSION_CLEAR_RATIO):
+        self.signals = signals
+        self.thresholds = thresholds
+        self.clear_ratio = clear_ratio
+        self.level = 0
+        self.readings = {}
+        self.changed_at = time.monotonic()
+        self._notified_level = 0
+        self._last_notified = 0.0
+        self.stats = {"escalations": 0, "untranslated": 0, "summarized": 0, "dropped": 0, "notifications": 0}
+
+    def _signal_level(self, name, value):
+        level = 0
+        for step, threshold in enumerate(self.thresholds.get(name, []), 1):
+            # Tahap yang sedang aktif dipertahankan sampai sinyal turun di bawah ambang pelepasan
+            limit = threshold * self.clear_ratio if step <= self.level else threshold
+            if value >= limit:
+                level = step
+        return level
+
+    def evaluate(self):
+        """
+        Membaca semua sinyal dan memperbarui tahap degradasi.
+
+        Returns:
+            int: Tahap degradasi saat ini (0 berarti normal).
+        """
+        self.readings = {name: read() for name, read in self.signals.items()}
+        level = max((self._signal_level(name, value) for name, value in self.readings.items()), default=0)
+        if level != self.level:
+            if level > self.level:
+                self.stats["escalations"] += 1
+                logger.warning(f"Kontrol beban naik ke tahap {level} ({ADMISSION_STEPS[level]}): {self.format_readings()}")
+            else:
+                logger.info(f"Kontrol beban turun ke tahap {level} ({ADMISSION_STEPS[level]}): {self.format_readings()}")
+            self.level = level
+            self.changed_at = time.monotonic()
+        return self.level
+
+    def format_readings(self):
+        """Menyusun nilai sinyal terakhir beserta ambangnya, misalnya 'translation 85/30,80,150'."""
+        return ", ".join(
+            f"{name} {value}/{','.join(f'{threshold:g}' for threshold in self.thresholds.get(name, []))}"
+            for name, value in self.readings.items()
+        )
+
+    def describe(self):
+        """Ringkasan tahap saat ini untuk notifikasi dan status admin."""
+        if self.level == 0:
+            return f"Kontrol beban kembali normal. Sinyal: {self.format_readings()}"
+        return f"Kontrol beban tahap {self.level} aktif ({ADMISSION_STEPS[self.level]}). Sinyal: {self.format_readings()}"
+
+    async def run(self, notify, interval=ADMISSION_CHECK_INTERVAL, notify_interval=ADMISSION_NOTIFY_INTERVAL):
+        """
+        Mengevaluasi sinyal secara berkala dan memberi tahu admin saat tahap berubah. Notifikasi dibatasi
+        satu per notify_interval; perubahan di antaranya digabung menjadi satu notifikasi berisi tahap terakhir.
+
+        Args:
+            notify (callable): Coroutine yang menerima teks notifikasi.
+            interval (float): Jeda antar evaluasi (detik).
+            notify_interval (float): Jeda minimum antar notifikasi (detik).
+        """
+        while True:
+            try:
+                self.evaluate()
+                now = time.monotonic()
+                if self.level != self._notified_level and now - self._last_notified >= notify_interval:
+                    self._notified_level = self.level
+                    self._last_notified = now
+                    self.stats["notifications"] += 1
+                    await notify(self.describe())
+            except Exception as e:
+                logger.error(f"Error pada kontrol beban: {str(e)}")
+            await asyncio.sleep(interval)
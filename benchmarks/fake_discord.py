@@ -0,0 +1,215 @@
+# benchmarks/fake_discord.py
+"""
+Server tiruan API Discord (aiohttp) untuk menguji discord_worker tanpa menyentuh Discord asli.
+
+Endpoint yang ditiru:
+    GET  /api/v10/channels/{thread_id}           validasi akses thread
+    POST /api/v10/channels/{thread_id}/messages  kirim pesan (JSON atau multipart)
+
+Perilaku yang dapat diatur: rate limit per route dengan header X-RateLimit-*, 429 global,
+401 untuk token/thread tertentu, 400 "blocked" untuk kata tertentu, distribusi latensi,
+dan koneksi yang diputus di tengah permintaan, baik sebelum pesan dibuat maupun setelah pesan
+dibuat (respons hilang sehingga klien tidak tahu pesannya sudah terkirim). Nonce dengan enforce_nonce diperlakukan
+seperti Discord: kiriman ulang dengan nonce yang sama tidak membuat pesan baru.
+
+Jalankan sendiri untuk dipakai manual:
+    python benchmarks/fake_discord.py --port 8900 --route-limit 5 --route-window 2
+lalu isi DISCORD_API_BASE=http://127.0.0.1:8900/api/v10 di .env.
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import time
+from aiohttp import web
+
+# Id pesan uji di dalam konten, dipakai harness untuk menghitung pesan ganda dan hilang
+MESSAGE_ID_PATTERN = re.compile(r'\bload-(\d+)\b')
+
+class FakeDiscord:
+    """
+    Server tiruan endpoint pesan channel Discord beserta catatan semua pesan yang diterima.
+    """
+
+    def __init__(self, route_limit=5, route_window=2.0, global_429_rate=0.0, global_retry_after=1.0,
+                 unauthorized_tokens=(), unauthorized_threads=(), blocked_words=(),
+                 latency_ms=50.0, latency_sigma=0.5, reset_rate=0.0, reset_after_create_rate=0.0, seed=None):
+        self.route_limit = route_limit
+        self.route_window = route_window
+        self.global_429_rate = global_429_rate
+        self.global_retry_after = global_retry_after
+        self.unauthorized_tokens = set(unauthorized_tokens)
+        self.unauthorized_threads = {str(thread) for thread in unauthorized_threads}
+        self.blocked_words = [word.lower() for word in blocked_words]
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.reset_rate = reset_rate
+        self.reset_after_create_rate = reset_after_create_rate
+        self.random = random.Random(seed)
+        self._windows = {}
+        self._nonces = {}
+        self._message_sequence = 0
+        # id pesan uji -> daftar waktu diterima (lebih dari satu berarti terkirim ganda)
+        self.deliveries = {}
+        self.stats = {"requests": 0, "created": 0, "route_429": 0, "global_429": 0, "unauthorized": 0,
+                      "blocked": 0, "resets": 0, "resets_after_create": 0, "nonce_dedup": 0}
+
+    def make_app(self):
+        """Membuat aplikasi aiohttp dengan endpoint Discord tiruan."""
+        app = web.Application()
+        app.router.add_get("/api/v10/channels/{thread_id}", self.get_channel)
+        app.router.add_post("/api/v10/channels/{thread_id}/messages", self.create_message)
+        return app
+
+    async def start(self, host="127.0.0.1", port=0):
+        """
+        Menjalankan server di latar belakang.
+
+        Returns:
+            tuple: (runner aiohttp, basis URL API untuk DISCORD_API_BASE).
+        """
+        runner = web.AppRunner(self.make_app())
+        await runner.setup()
+        site = web.TCPSite(runner, host, port)
+        await site.start()
+        bound_port = site._server.sockets[0].getsockname()[1]
+        return runner, f"http://{host}:{bound_port}/api/v10"
+
+    async def _latency(self):
+        if self.latency_ms > 0:
+            delay = self.random.lognormvariate(0, self.latency_sigma) * self.latency_ms / 1000 if self.latency_sigma else self.latency_ms / 1000
+            await asyncio.sleep(delay)
+
+    def _authorized(self, request, thread_id):
+        return request.headers.get("Authorization") not in self.unauthorized_tokens and thread_id not in self.unauthorized_threads
+
+    async def get_channel(self, request):
+        thread_id = request.match_info["thread_id"]
+        await self._latency()
+        if not self._authorized(request, thread_id):
+            return web.json_response({"message": "401: Unauthorized", "code": 0}, status=401)
+        return web.json_response({"id": thread_id, "type": 11})
+
+    def _rate_limit_headers(self, key, now):
+        window_start, count = self._windows.get(key, (now, 0))
+        if now - window_start >= self.route_window:
+            window_start, count = now, 0
+        count += 1
+        self._windows[key] = (window_start, count)
+        reset_after = max(0.0, window_start + self.route_window - now)
+        headers = {
+            "X-RateLimit-Limit": str(self.route_limit),
+            "X-RateLimit-Remaining": str(max(0, self.route_limit - count)),
+            "X-RateLimit-Reset-After": f"{reset_after:.3f}",
+            "X-RateLimit-Bucket": f"bucket-{abs(hash(key)) % 100000}",
+        }
+        return headers, count > self.route_limit, reset_after
+
+    @staticmethod
+    def _reset(request):
+        request.transport.close()
+        raise asyncio.CancelledError()
+
+    async def create_message(self, request):
+        self.stats["requests"] += 1
+        thread_id = request.match_info["thread_id"]
+        if request.content_type.startswith("multipart/"):
+            form = await request.post()
+            payload = json.loads(form.get("payload_json", "{}"))
+        else:
+            payload = await request.json()
+        await self._latency()
+
+        if self.reset_rate and self.random.random() < self.reset_rate:
+            # Putuskan koneksi tanpa respons; klien melihatnya sebagai koneksi terputus
+            self.stats["resets"] += 1
+            self._reset(request)
+
+        if not self._authorized(request, thread_id):
+            self.stats["unauthorized"] += 1
+            return web.json_response({"message": "401: Unauthorized", "code": 0}, status=401)
+
+        if self.global_429_rate and self.random.random() < self.global_429_rate:
+            self.stats["global_429"] += 1
+            return web.json_response(
+                {"message": "You are being rate limited.", "retry_after": self.global_retry_after, "global": True},
+                status=429,
+                headers={"Retry-After": str(self.global_retry_after), "X-RateLimit-Global": "true", "X-RateLimit-Scope": "global"},
+            )
+
+        now = time.monotonic()
+        key = (request.headers.get("Authorization"), thread_id)
+        headers, limited, reset_after = self._rate_limit_headers(key, now)
+        if limited:
+            self.stats["route_429"] += 1
+            headers.update({"Retry-After": f"{reset_after:.3f}", "X-RateLimit-Scope": "user"})
+            return web.json_response({"message": "You are being rate limited.", "retry_after": reset_after, "global": False}, status=429, headers=headers)
+
+        content = payload.get("content") or ""
+        if any(word in content.lower() for word in self.blocked_words):
+            self.stats["blocked"] += 1
+            return web.json_response({"message": "Message was blocked by AutoMod", "code": 200000}, status=400, headers=headers)
+
+        nonce = payload.get("nonce")
+        if nonce and payload.get("enforce_nonce") and nonce in self._nonces:
+            self.stats["nonce_dedup"] += 1
+            return web.json_response(self._nonces[nonce], headers=headers)
+
+        self._message_sequence += 1
+        message = {"id": str(self._message_sequence), "channel_id": thread_id, "content": content, "nonce": nonce}
+        if nonce and payload.get("enforce_nonce"):
+            self._nonces[nonce] = message
+        self.stats["created"] += 1
+        received_at = time.time()
+        for message_id in MESSAGE_ID_PATTERN.findall(content):
+            self.deliveries.setdefault(int(message_id), []).append(received_at)
+        if self.reset_after_create_rate and self.random.random() < self.reset_after_create_rate:
+            # Pesan sudah dibuat tetapi responsnya hilang; kiriman ulang tanpa nonce yang sama akan tercatat ganda
+            self.stats["resets_after_create"] += 1
+            self._reset(request)
+        return web.json_response(message, headers=headers)
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Server tiruan API Discord untuk uji beban.")
+    parser.add_argument("--route-limit", type=int, default=5, help="Kuota per route per jendela")
+    parser.add_argument("--route-window", type=float, default=2.0, help="Panjang jendela rate limit route (detik)")
+    parser.add_argument("--global-429", type=float, default=0.0, help="Peluang 429 global per permintaan")
+    parser.add_argument("--global-retry-after", type=float, default=1.0, help="Retry-After untuk 429 global (detik)")
+    parser.add_argument("--unauthorized-thread", action="append", default=[], help="Thread yang selalu menjawab 401")
+    parser.add_argument("--blocked-word", action="append", default=[], help="Kata yang memicu 400 blocked")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Median latensi respons (ms)")
+    parser.add_argument("--latency-sigma", type=float, default=0.5, help="Sigma distribusi lognormal latensi (0 = konstan)")
+    parser.add_argument("--reset-rate", type=float, default=0.0, help="Peluang koneksi diputus per permintaan, sebelum pesan dibuat")
+    parser.add_argument("--reset-after-create-rate", type=float, default=0.0, help="Peluang koneksi diputus setelah pesan dibuat (respons hilang)")
+    parser.add_argument("--seed", type=int, default=None, help="Seed acak agar hasil dapat diulang")
+    return parser
+
+def fake_from_args(args):
+    """Membuat FakeDiscord dari argumen baris perintah."""
+    return FakeDiscord(
+        route_limit=args.route_limit, route_window=args.route_window,
+        global_429_rate=args.global_429, global_retry_after=args.global_retry_after,
+        unauthorized_threads=args.unauthorized_thread, blocked_words=args.blocked_word,
+        latency_ms=args.latency_ms, latency_sigma=args.latency_sigma,
+        reset_rate=args.reset_rate, reset_after_create_rate=args.reset_after_create_rate, seed=args.seed,
+    )
+
+async def serve(args):
+    fake = fake_from_args(args)
+    runner, base_url = await fake.start(port=args.port)
+    print(f"Server Discord tiruan berjalan: DISCORD_API_BASE={base_url}")
+    try:
+        while True:
+            await asyncio.sleep(10)
+            print(f"Statistik: {fake.stats}")
+    finally:
+        await runner.cleanup()
+
+if __name__ == "__main__":
+    parser = build_parser()
+    parser.add_argument("--port", type=int, default=8900)
+    try:
+        asyncio.run(serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,159 @@
+# benchmarks/load_test_discord.py
+"""
+Uji beban discord_worker terhadap server Discord tiruan (benchmarks/fake_discord.py).
+
+Pesan dibuat dengan kedatangan Poisson pada laju tertentu, dimasukkan lewat
+send_message_to_discord_thread, lalu dikirim oleh pekerja Discord yang sebenarnya
+(outbox, rate limiter, retry, shard). Hasilnya: throughput, persentil latensi ujung ke ujung
+dan waktu tunggu antrian, serta jumlah pesan ganda, hilang, dan gagal permanen.
+
+Jalankan dari root repo:
+    python benchmarks/load_test_discord.py --rate 10 --duration 30 --route-limit 5 --route-window 2
+    python benchmarks/load_test_discord.py --rate 20 --shards 3 --global-429 0.02 --reset-rate 0.01
+    python benchmarks/load_test_discord.py --rate 20 --reset-after-create-rate 0.05   # idempotensi nonce
+"""
+import asyncio
+import json
+import logging
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_discord import MESSAGE_ID_PATTERN, build_parser, fake_from_args
+
+CATEGORIES = ["VIP", "SUMMARY", "FILTERED", "IMAGE", "UNFILTERED"]
+
+def percentile(values, p):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+def format_seconds(value):
+    return f"{value:.2f}s" if value is not None else "-"
+
+def configure_env(args, base_url, workdir):
+    """Mengarahkan konfigurasi ke server tiruan sebelum modul aplikasi diimpor."""
+    shards = [{"name": f"load{index}", "thread_id": str(1000 + index)} for index in range(1, args.shards)]
+    os.environ.update({
+        "DISCORD_API_BASE": base_url,
+        "DISCORD_AUTH_TOKEN": "load-test-token",
+        "DISCORD_THREAD_ID": "1000",
+        "DISCORD_SHARDS": json.dumps(shards) if shards else "",
+        "DISCORD_OUTBOX_PATH": os.path.join(workdir, "outbox.db"),
+        "DISCORD_DEADLETTER_PATH": os.path.join(workdir, "deadletter.db"),
+        "DISCORD_BLOCK_MODEL_PATH": os.path.join(workdir, "block_model.db"),
+        "DISCORD_WEBHOOK_URL": "",
+        "DISCORD_CATEGORY_TTL": "",
+        "DISCORD_RETRY_BASE_DELAY": str(args.retry_base_delay),
+        "DISCORD_RETRY_MAX_DELAY": str(args.retry_base_delay * 8),
+        "DISCORD_COALESCE": "true" if args.coalesce else "false",
+    })
+    for name, value in (("TELEGRAM_API_ID", "1"), ("TELEGRAM_API_HASH", "load-test"),
+                        ("TELEGRAM_PHONE", "+0"), ("TARGET_CHANNEL", "load-test")):
+        os.environ.setdefault(name, value)
+
+async def run(args):
+    fake = fake_from_args(args)
+    runner, base_url = await fake.start()
+    workdir = tempfile.mkdtemp(prefix="discord_load_")
+    configure_env(args, base_url, workdir)
+
+    import discord_utils
+    from discord_shards import shards
+    from http_sessions import close_sessions
+    if not args.verbose:
+        logging.getLogger("telegram_forwarder").setLevel(logging.ERROR)
+
+    rng = random.Random(args.seed)
+    categories = [category.strip().upper() for category in args.categories.split(",") if category.strip()]
+    enqueued = {}
+    failed = set()
+
+    async def produce():
+        message_id = 0
+        end = time.monotonic() + args.duration
+        while time.monotonic() < end:
+            await asyncio.sleep(rng.expovariate(args.rate))
+            message_id += 1
+            category = rng.choice(categories)
+            text = f"load-{message_id} {category} pesan uji beban"
+            if args.blocked_word and rng.random() < args.blocked_fraction:
+                text += f" {args.blocked_word[0]}"
+            enqueued[message_id] = time.time()
+            await discord_utils.send_message_to_discord_thread(text, category=category, chat_id=-1000 - rng.randrange(args.channels))
+
+    async def collect_failures():
+        while True:
+            message, _ = await discord_utils.failed_message_queue.get()
+            failed.update(int(message_id) for message_id in MESSAGE_ID_PATTERN.findall(message))
+
+    tasks = [asyncio.create_task(discord_utils.discord_worker(shard)) for shard in shards]
+    tasks.append(asyncio.create_task(discord_utils.retry_scheduler()))
+    tasks.append(asyncio.create_task(collect_failures()))
+
+    started = time.time()
+    await produce()
+    produced_at = time.time()
+    drain_deadline = time.monotonic() + args.drain_timeout
+    while time.monotonic() < drain_deadline:
+        if all(message_id in fake.deliveries or message_id in failed for message_id in enqueued):
+            break
+        await asyncio.sleep(0.2)
+    finished = time.time()
+
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    delivered = [message_id for message_id in enqueued if message_id in fake.deliveries]
+    duplicates = [message_id for message_id in delivered if len(fake.deliveries[message_id]) > 1]
+    lost = [message_id for message_id in enqueued if message_id not in fake.deliveries and message_id not in failed]
+    latencies = [fake.deliveries[message_id][0] - enqueued[message_id] for message_id in delivered]
+    last_delivery = max((fake.deliveries[message_id][0] for message_id in delivered), default=finished)
+
+    print(f"Laju kedatangan: {args.rate}/detik selama {args.duration:.0f} detik, shard: {len(shards)}, channel: {args.channels}")
+    print(f"Dibuat: {len(enqueued)}, terkirim: {len(delivered)}, gagal permanen: {len(failed)}, "
+          f"ganda: {len(duplicates)}, hilang/tertunda: {len(lost)}")
+    print(f"Throughput: {len(delivered) / max(last_delivery - started, 1e-9):.2f} pesan/detik "
+          f"({fake.stats['created']} permintaan berhasil, {len(delivered) / max(fake.stats['created'], 1):.2f} pesan/permintaan)")
+    print(f"Latensi ujung ke ujung: p50 {format_seconds(percentile(latencies, 0.5))}, p95 {format_seconds(percentile(latencies, 0.95))}, "
+          f"p99 {format_seconds(percentile(latencies, 0.99))}, maks {format_seconds(max(latencies, default=None))}")
+    print(f"Waktu pengurasan setelah kedatangan berhenti: {finished - produced_at:.1f} detik")
+    print("Waktu tunggu antrian per shard/lane (terkirim, rata-rata, p95, maks):")
+    for shard in shards:
+        for category, lane in shard.queue.lane_stats().items():
+            if lane["dispatched"]:
+                print(f"  {shard.name}/{category}: {lane['dispatched']}, {format_seconds(lane['avg_wait'])}, "
+                      f"{format_seconds(lane['p95_wait'])}, {format_seconds(lane['max_wait'])}")
+    print(f"Server tiruan: {fake.stats}")
+    for shard in shards:
+        print(f"Rate limiter {shard.name}: {shard.rate_limiter.get_stats()}")
+
+    await close_sessions()
+    for shard in shards:
+        shard.queue.close()
+    await runner.cleanup()
+    shutil.rmtree(workdir, ignore_errors=True)
+
+def main():
+    parser = build_parser()
+    parser.add_argument("--rate", type=float, default=5.0, help="Laju kedatangan pesan (pesan/detik, Poisson)")
+    parser.add_argument("--duration", type=float, default=20.0, help="Lama pembuatan pesan (detik)")
+    parser.add_argument("--drain-timeout", type=float, default=60.0, help="Batas waktu menunggu antrian kosong (detik)")
+    parser.add_argument("--categories", default=",".join(CATEGORIES), help="Kategori pesan yang diundi, dipisah koma")
+    parser.add_argument("--channels", type=int, default=5, help="Jumlah channel sumber")
+    parser.add_argument("--shards", type=int, default=1, help="Jumlah shard (thread) Discord")
+    parser.add_argument("--blocked-fraction", type=float, default=0.0, help="Porsi pesan yang memuat --blocked-word pertama")
+    parser.add_argument("--retry-base-delay", type=float, default=1.0, help="DISCORD_RETRY_BASE_DELAY untuk uji (detik)")
+    parser.add_argument("--no-coalesce", dest="coalesce", action="store_false", help="Matikan penggabungan pesan")
+    parser.add_argument("--verbose", action="store_true", help="Tampilkan log aplikasi")
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
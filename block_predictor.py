@@ -0,0 +1,229 @@
+# block_predictor.py
+import asyncio
+import random
+import re
+import sqlite3
+import time
+from config import DISCORD_BLOCK_MODEL_PATH, DISCORD_BLOCK_THRESHOLD, DISCORD_BLOCK_MIN_EVIDENCE, DISCORD_BLOCK_PROBE_RATE, logger
+from language_detect import INDONESIAN_STOPWORDS, ENGLISH_STOPWORDS
+
+DOMAIN_PATTERN = re.compile(r'\b(?:[a-z0-9-]+\.)+[a-z]{2,}\b', re.IGNORECASE)
+TOKEN_PATTERN = re.compile(r'[^\W\d_]{3,}')
+STOPWORDS = INDONESIAN_STOPWORDS | ENGLISH_STOPWORDS
+# Bobot prior laju blokir latar (setara jumlah pesan semu) dan batas jumlah fitur yang disimpan
+PRIOR_WEIGHT = 2
+MAX_FEATURES = 50000
+# Jeda (detik) antar penulisan hitungan pesan terkirim ke SQLite
+FLUSH_INTERVAL = 30.0
+
+def extract_features(text):
+    """
+    Mengambil fitur teks untuk prediksi blokir: domain (berawalan 'domain:') dan kata huruf kecil
+    minimal 3 huruf selain stopword.
+
+    Args:
+        text (str): Teks pesan.
+
+    Returns:
+        set: Kumpulan fitur unik.
+    """
+    if not text:
+        return set()
+    domains = {match.lower() for match in DOMAIN_PATTERN.findall(text)}
+    without_domains = DOMAIN_PATTERN.sub(' ', text)
+    words = {word.lower() for word in TOKEN_PATTERN.findall(without_domains)}
+    return {f"domain:{domain}" for domain in domains} | {word for word in words if word not in STOPWORDS}
+
+class BlockPredictor:
+    """
+    Mempelajari kata dan domain yang membuat Discord menolak pesan (400 "blocked").
+    Setiap fitur menyimpan jumlah kemunculan di pesan yang diblokir dan yang terkirim; jumlah terkirim
+    dicatat untuk semua fitur sehingga kata umum yang kebetulan muncul di pesan yang diblokir punya
+    pembanding dari lalu lintas normal. Keyakinan dihitung sebagai (diblokir + w x p) / (diblokir + terkirim + w),
+    dengan p laju blokir latar (semua pesan diblokir / semua pesan) dan w bobot prior, sehingga fitur
+    dengan sedikit bukti tetap dekat ke laju blokir latar. Sebagian kecil pesan yang diprediksi
+    diblokir tetap dikirim sebagai probe agar fitur yang salah tebak dapat pulih.
+    Hitungan disimpan di memori; pesan terkirim hanya menandai fitur sebagai berubah dan ditulis ke
+    SQLite secara berkala oleh flush_worker (serta saat close), sedangkan pesan yang diblokir langsung ditulis.
+    """
+
+    def __init__(self, db_path=DISCORD_BLOCK_MODEL_PATH, threshold=DISCORD_BLOCK_THRESHOLD, min_evidence=DISCORD_BLOCK_MIN_EVIDENCE,
+                 probe_rate=DISCORD_BLOCK_PROBE_RATE, max_features=MAX_FEATURES):
+        self.db_path = db_path
+        self.threshold = threshold
+        self.min_evidence = min_evidence
+        self.probe_rate = probe_rate
+        self.max_features = max_features
+        self._db = None
+        self._counts = None
+        self._totals = {"blocked": 0, "delivered": 0}
+        # Fitur yang berubah atau dihapus sejak penulisan terakhir
+        self._dirty = set()
+        self._removed = set()
+        self.stats = {"learned_blocks": 0, "predicted": 0, "probes": 0}
+
+    def _load(self):
+        if self._counts is None:
+            self._db = sqlite3.connect(self.db_path)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS block_features ("
+                "feature TEXT PRIMARY KEY, blocked INTEGER NOT NULL, delivered INTEGER NOT NULL, updated_at REAL NOT NULL)"
+            )
+            self._db.execute("CREATE TABLE IF NOT EXISTS block_totals (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            self._db.commit()
+            self._counts = {feature: [blocked, delivered, updated_at] for feature, blocked, delivered, updated_at in
+                            self._db.execute("SELECT feature, blocked, delivered, updated_at FROM block_features")}
+            self._totals.update(dict(self._db.execute("SELECT name, value FROM block_totals")))
+        return self._counts
+
+    def flush(self):
+        """Menulis fitur yang berubah atau dihapus sejak penulisan terakhir beserta total ke SQLite."""
+        if self._db is None or not (self._dirty or self._removed):
+            return
+        dirty, removed = self._dirty, self._removed
+        self._dirty, self._removed = set(), set()
+        try:
+            self._db.executemany("DELETE FROM block_features WHERE feature = ?", [(feature,) for feature in removed])
+            self._db.executemany(
+                "INSERT OR REPLACE INTO block_features (feature, blocked, delivered, updated_at) VALUES (?, ?, ?, ?)",
+                [(feature, *self._counts[feature]) for feature in dirty if feature in self._counts]
+            )
+            self._db.executemany("INSERT OR REPLACE INTO block_totals (name, value) VALUES (?, ?)", self._totals.items())
+            self._db.commit()
+        except sqlite3.Error as e:
+            # Perubahan dicoba lagi pada penulisan berikutnya
+            self._dirty |= dirty
+            self._removed |= removed
+            logger.error(f"Gagal menyimpan model prediksi blokir: {str(e)}")
+
+    async def flush_worker(self, interval=FLUSH_INTERVAL):
+        """
+        Pekerja yang menulis hitungan model ke SQLite secara berkala.
+
+        Args:
+            interval (float): Jeda penulisan dalam detik.
+        """
+        while True:
+            await asyncio.sleep(interval)
+            self.flush()
+
+    def _prune(self):
+        # Kosakata dibatasi: fitur yang belum pernah diblokir dan paling lama tidak terlihat dibuang lebih dulu
+        if len(self._counts) <= self.max_features:
+            return
+        stale = sorted((entry[2], feature) for feature, entry in self._counts.items() if entry[0] == 0)
+        removed = [feature for _, feature in stale[:len(self._counts) - self.max_features + self.max_features // 10]]
+        for feature in removed:
+            del self._counts[feature]
+        self._dirty.difference_update(removed)
+        self._removed.update(removed)
+
+    def _record(self, text, column):
+        counts = self._load()
+        now = time.time()
+        features = extract_features(text)
+        for feature in features:
+            entry = counts.setdefault(feature, [0, 0, now])
+            entry[column] += 1
+            entry[2] = now
+        self._totals["blocked" if column == 0 else "delivered"] += 1
+        self._removed.difference_update(features)
+        self._dirty.update(features)
+        self._prune()
+
+    def background_rate(self):
+        """Laju blokir latar: porsi pesan yang diblokir dari semua pesan yang tercatat."""
+        self._load()
+        total = self._totals["blocked"] + self._totals["delivered"]
+        return self._totals["blocked"] / total if total else 0.0
+
+    def confidence(self, feature):
+        """Keyakinan bahwa fitur memicu blokir, atau 0 jika bukti belum cukup."""
+        blocked, delivered, _ = self._load().get(feature, (0, 0, 0))
+        if blocked < self.min_evidence:
+            return 0.0
+        return (blocked + PRIOR_WEIGHT * self.background_rate()) / (blocked + delivered + PRIOR_WEIGHT)
+
+    def record_blocked(self, text):
+        """
+        Mencatat pesan yang ditolak Discord dengan 400 "blocked".
+
+        Args:
+            text (str): Teks pesan yang diblokir (satu pesan, bukan gabungan).
+        """
+        self._record(text, 0)
+        self.stats["learned_blocks"] += 1
+        # Pesan diblokir jarang terjadi dan paling berharga untuk model, jadi langsung disimpan
+        self.flush()
+
+    def record_delivered(self, text):
+        """
+        Mencatat pesan yang berhasil terkirim sebagai pembanding untuk semua fiturnya.
+
+        Args:
+            text (str): Teks pesan yang terkirim.
+        """
+        self._record(text, 1)
+
+    def predict(self, text):
+        """
+        Memeriksa apakah pesan kemungkinan besar akan diblokir Discord. Sebagian pesan (probe_rate)
+        yang melewati ambang tetap dikirim agar hasilnya terus memperbarui model.
+
+        Args:
+            text (str): Teks pesan.
+
+        Returns:
+            tuple: (fitur, keyakinan) dengan keyakinan tertinggi di atas ambang, atau None.
+        """
+        counts = self._load()
+        if not counts:
+            return None
+        best = max(((feature, self.confidence(feature)) for feature in extract_features(text) if feature in counts),
+                   key=lambda pair: pair[1], default=None)
+        if best is None or best[1] < self.threshold:
+            return None
+        if random.random() < self.probe_rate:
+            self.stats["probes"] += 1
+            logger.info(f"Pesan diprediksi diblokir ('{best[0]}', keyakinan {best[1]:.0%}) tetap dikirim sebagai probe.")
+            return None
+        self.stats["predicted"] += 1
+        return best
+
+    def top_features(self, limit=20):
+        """
+        Mengembalikan fitur yang pernah diblokir dengan keyakinan tertinggi.
+
+        Returns:
+            list: Daftar tuple (fitur, keyakinan, diblokir, terkirim).
+        """
+        counts = self._load()
+        ranked = sorted(((feature, self.confidence(feature), blocked, delivered) for feature, (blocked, delivered, _) in counts.items() if blocked),
+                        key=lambda row: (row[1], row[2]), reverse=True)
+        return ranked[:limit]
+
+    def forget(self, feature):
+        """
+        Menghapus fitur dari model (misalnya jika terbukti salah tebak).
+
+        Returns:
+            bool: True jika fitur ada dan dihapus.
+        """
+        counts = self._load()
+        if counts.pop(feature, None) is None:
+            return False
+        self._dirty.discard(feature)
+        self._removed.add(feature)
+        self.flush()
+        return True
+
+    def close(self):
+        """Menulis perubahan yang tertunda lalu menutup koneksi SQLite."""
+        if self._db is not None:
+            self.flush()
+            self._db.close()
+            self._db = None
+            self._counts = None
+
+block_predictor = BlockPredictor()
@@ -14,6 +14,116 @@ GOOGLE_API_KEY = None
 DISCORD_AUTH_TOKEN = None
 DISCORD_THREAD_ID = None
 
+# Cache terjemahan (memori LRU + SQLite)
+TRANSLATION_CACHE_SIZE = 5000
+TRANSLATION_CACHE_TTL = 24 * 60 * 60
+TRANSLATION_CACHE_PATH = 'translation_cache.db'
+
+# Sesi HTTP bersama
+HTTP_LIMIT_PER_HOST = 10
+HTTP_KEEPALIVE_TIMEOUT = 60
+HTTP_DNS_CACHE_TTL = 300
+# Pemanasan koneksi saat startup dan probe keep-alive untuk pool yang menganggur (harus di bawah HTTP_KEEPALIVE_TIMEOUT)
+HTTP_PREWARM = True
+HTTP_KEEPALIVE_INTERVAL = 45
+TRANSLATION_TIMEOUT = 10
+
+# Mode hedging: penyedia berikutnya dijalankan paralel jika penyedia sebelumnya lambat
+TRANSLATION_HEDGING = False
+TRANSLATION_HEDGE_DELAY = 2.0
+TRANSLATION_HEDGE_PERCENTILE = 0.9
+TRANSLATION_DEADLINE = 15.0
+
+# Penjadwalan adaptif penyedia terjemahan
+TRANSLATION_EWMA_ALPHA = 0.3
+TRANSLATION_BREAKER_THRESHOLD = 3
+TRANSLATION_BREAKER_COOLDOWN = 60.0
+
+# Micro-batching terjemahan (opsional, memakai Google Translate v2 multi-segmen saat Google berperingkat teratas;
+# selama aktif, Google diletakkan pertama dalam urutan awal penyedia)
+TRANSLATION_BATCHING = False
+TRANSLATION_BATCH_WINDOW = 0.03
+TRANSLATION_BATCH_MAX_ITEMS = 16
+TRANSLATION_BATCH_MAX_CHARS = 5000
+
+# Rate limit Discord (berdasarkan header) dengan AIMD pacing opsional
+DISCORD_AIMD_PACING = True
+DISCORD_AIMD_MAX_INTERVAL = 10.0
+DISCORD_AIMD_DECREASE = 0.1
+
+# Retry pesan Discord yang gagal (backoff eksponensial dengan jitter)
+DISCORD_MAX_RETRIES = 3
+DISCORD_RETRY_BASE_DELAY = 60.0
+DISCORD_RETRY_MAX_DELAY = 900.0
+
+# Outbox Discord di disk (SQLite WAL) dengan batas memori per byte, termasuk buffer gambar;
+# cukup untuk beberapa gambar sebesar DISCORD_MEDIA_MEMORY_LIMIT agar gambar tidak langsung tumpah ke disk
+DISCORD_OUTBOX_PATH = 'discord_outbox.db'
+DISCORD_OUTBOX_MAX_MEMORY_BYTES = 32 * 1024 * 1024
+# Penyimpanan pesan yang gagal permanen, dapat di-redrive lewat perintah admin
+DISCORD_DEADLETTER_PATH = 'discord_deadletter.db'
+# Prediktor blokir yang belajar dari respons 400 "blocked" Discord
+DISCORD_BLOCK_PREDICTOR = True
+DISCORD_BLOCK_MODEL_PATH = 'discord_block_model.db'
+DISCORD_BLOCK_THRESHOLD = 0.85
+DISCORD_BLOCK_MIN_EVIDENCE = 5
+# Porsi pesan yang diprediksi diblokir tetapi tetap dikirim agar model dapat mengoreksi diri
+DISCORD_BLOCK_PROBE_RATE = 0.1
+
+# Penggabungan pesan teks saat antrian Discord menumpuk
+DISCORD_COALESCE = True
+DISCORD_COALESCE_DEPTH = 10
+DISCORD_COALESCE_AGE = 30.0
+
+# Batas ukuran gambar yang diunduh langsung ke memori; gambar lebih besar memakai file sementara
+DISCORD_MEDIA_MEMORY_LIMIT = 8 * 1024 * 1024
+# Kompresi ulang gambar sebelum diunggah ke Discord (butuh Pillow); 0 pada batas byte berarti tanpa batas
+DISCORD_IMAGE_PROCESSING = False
+DISCORD_IMAGE_MAX_DIMENSION = 2048
+DISCORD_IMAGE_QUALITY = 85
+DISCORD_IMAGE_MAX_BYTES = 0
+
+# Basis URL API Discord; dapat diarahkan ke server tiruan untuk uji beban (benchmarks/fake_discord.py)
+DISCORD_API_BASE = 'https://discord.com/api/v10'
+
+# Pengiriman lewat webhook Discord (opsional) untuk kategori bervolume tinggi
+DISCORD_WEBHOOK_URL = None
+DISCORD_WEBHOOK_THREAD_ID = None
+DISCORD_WEBHOOK_CATEGORIES = []
+DISCORD_WEBHOOK_OUTBOX_PATH = 'discord_webhook_outbox.db'
+
+# Shard Discord tambahan (JSON): [{"name": ..., "token": ..., "thread_id": ..., "categories": [...]}]
+DISCORD_SHARDS = []
+# Jeda (detik) antar validasi ulang shard yang tidak sehat
+DISCORD_SHARD_RECHECK_INTERVAL = 60.0
+
+# Batas umur pesan (detik sejak terbit di Telegram) per kategori (JSON), misalnya {"VIP": 600}
+# Pesan kedaluwarsa dibuang ("drop") atau tetap dikirim dengan penanda terlambat ("flag")
+DISCORD_CATEGORY_TTL = {}
+DISCORD_EXPIRED_ACTION = 'drop'
+
+# Pipeline pemrosesan pesan masuk: kapasitas antrian per tahap dan jumlah pekerja per tahap
+# (JSON, dapat diisi sebagian), misalnya {"translate": 16}
+PIPELINE_QUEUE_SIZE = 200
+PIPELINE_CONCURRENCY = {"ingest": 1, "classify": 2, "translate": 8, "render": 2, "deliver": 4}
+
+# Kontrol beban: ambang tahap degradasi 1-3 per sinyal (JSON, dapat diisi sebagian). Tahap 1 melewati
+# terjemahan UNFILTERED, tahap 2 hanya meneruskan baris pertama, tahap 3 membuang ADMISSION_DROP_CATEGORIES.
+# Tahap dilepas setelah sinyal turun di bawah ambang x ADMISSION_CLEAR_RATIO.
+ADMISSION_CONTROL = True
+ADMISSION_THRESHOLDS = {"in_flight": [100, 200, 400], "translation": [30, 80, 150], "discord": [200, 500, 1000]}
+ADMISSION_CLEAR_RATIO = 0.5
+ADMISSION_DROP_CATEGORIES = ["UNFILTERED"]
+ADMISSION_CHECK_INTERVAL = 2.0
+# Jeda minimum antar notifikasi admin tentang perubahan tahap (detik)
+ADMISSION_NOTIFY_INTERVAL = 300
+
+# Pengiriman ke TARGET_CHANNEL: laju (pesan per menit) dan burst sesuai batas posting channel Telegram,
+# serta kapasitas antrian; saat penuh, pesan tertua dari kategori prioritas terendah dibuang
+TELEGRAM_SEND_RATE = 20
+TELEGRAM_SEND_BURST = 3
+TELEGRAM_SEND_QUEUE_SIZE = 500
+
 FILTERED_CHANNELS = []
 UNFILTERED_CHANNELS = []
 VIP_CHANNELS = []
@@ -23,9 +133,47 @@ KEYWORDS = []
 SUMMARY_KEYWORDS = []
 BLOCKED_KEYWORDS = []
 
+def _get_env_number(name, default, cast=int):
+    """Membaca variabel lingkungan numerik opsional, kembali ke default jika kosong atau tidak valid."""
+    value = os.getenv(name)
+    if value is None or not value.strip():
+        return default
+    try:
+        return cast(value)
+    except ValueError:
+        logger.warning(f"{name} tidak valid ({value}), menggunakan default {default}.")
+        return default
+
+def _get_env_bool(name, default):
+    """Membaca variabel lingkungan boolean opsional (true/false, 1/0, yes/no)."""
+    value = os.getenv(name)
+    if value is None or not value.strip():
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
 def load_env():
     """Memuat variabel lingkungan dari file .env."""
     global API_ID, API_HASH, PHONE, ADMINS, TARGET_CHANNEL, GOOGLE_API_KEY, DISCORD_AUTH_TOKEN, DISCORD_THREAD_ID
+    global TRANSLATION_CACHE_SIZE, TRANSLATION_CACHE_TTL, TRANSLATION_CACHE_PATH
+    global HTTP_LIMIT_PER_HOST, HTTP_KEEPALIVE_TIMEOUT, HTTP_DNS_CACHE_TTL, TRANSLATION_TIMEOUT
+    global HTTP_PREWARM, HTTP_KEEPALIVE_INTERVAL
+    global TRANSLATION_HEDGING, TRANSLATION_HEDGE_DELAY, TRANSLATION_HEDGE_PERCENTILE, TRANSLATION_DEADLINE
+    global TRANSLATION_EWMA_ALPHA, TRANSLATION_BREAKER_THRESHOLD, TRANSLATION_BREAKER_COOLDOWN
+    global TRANSLATION_BATCHING, TRANSLATION_BATCH_WINDOW, TRANSLATION_BATCH_MAX_ITEMS, TRANSLATION_BATCH_MAX_CHARS
+    global DISCORD_AIMD_PACING, DISCORD_AIMD_MAX_INTERVAL, DISCORD_AIMD_DECREASE
+    global DISCORD_MAX_RETRIES, DISCORD_RETRY_BASE_DELAY, DISCORD_RETRY_MAX_DELAY
+    global DISCORD_OUTBOX_PATH, DISCORD_OUTBOX_MAX_MEMORY_BYTES, DISCORD_DEADLETTER_PATH
+    global DISCORD_BLOCK_PREDICTOR, DISCORD_BLOCK_MODEL_PATH, DISCORD_BLOCK_THRESHOLD, DISCORD_BLOCK_MIN_EVIDENCE, DISCORD_BLOCK_PROBE_RATE
+    global DISCORD_COALESCE, DISCORD_COALESCE_DEPTH, DISCORD_COALESCE_AGE
+    global DISCORD_MEDIA_MEMORY_LIMIT
+    global DISCORD_IMAGE_PROCESSING, DISCORD_IMAGE_MAX_DIMENSION, DISCORD_IMAGE_QUALITY, DISCORD_IMAGE_MAX_BYTES
+    global DISCORD_API_BASE
+    global DISCORD_WEBHOOK_URL, DISCORD_WEBHOOK_THREAD_ID, DISCORD_WEBHOOK_CATEGORIES, DISCORD_WEBHOOK_OUTBOX_PATH
+    global DISCORD_SHARDS, DISCORD_SHARD_RECHECK_INTERVAL
+    global DISCORD_CATEGORY_TTL, DISCORD_EXPIRED_ACTION
+    global PIPELINE_QUEUE_SIZE, PIPELINE_CONCURRENCY
+    global TELEGRAM_SEND_RATE, TELEGRAM_SEND_BURST, TELEGRAM_SEND_QUEUE_SIZE
+    global ADMISSION_CONTROL, ADMISSION_THRESHOLDS, ADMISSION_CLEAR_RATIO, ADMISSION_DROP_CATEGORIES, ADMISSION_CHECK_INTERVAL, ADMISSION_NOTIFY_INTERVAL
     load_dotenv()
     
     api_id_str = os.getenv('TELEGRAM_API_ID')
@@ -64,6 +212,130 @@ def load_env():
     DISCORD_AUTH_TOKEN = discord_auth_token
     DISCORD_THREAD_ID = discord_thread_id
 
+    TRANSLATION_CACHE_SIZE = _get_env_number('TRANSLATION_CACHE_SIZE', TRANSLATION_CACHE_SIZE)
+    TRANSLATION_CACHE_TTL = _get_env_number('TRANSLATION_CACHE_TTL', TRANSLATION_CACHE_TTL, float)
+    TRANSLATION_CACHE_PATH = os.getenv('TRANSLATION_CACHE_PATH') or TRANSLATION_CACHE_PATH
+
+    HTTP_LIMIT_PER_HOST = _get_env_number('HTTP_LIMIT_PER_HOST', HTTP_LIMIT_PER_HOST)
+    HTTP_KEEPALIVE_TIMEOUT = _get_env_number('HTTP_KEEPALIVE_TIMEOUT', HTTP_KEEPALIVE_TIMEOUT, float)
+    HTTP_DNS_CACHE_TTL = _get_env_number('HTTP_DNS_CACHE_TTL', HTTP_DNS_CACHE_TTL)
+    HTTP_PREWARM = _get_env_bool('HTTP_PREWARM', HTTP_PREWARM)
+    HTTP_KEEPALIVE_INTERVAL = _get_env_number('HTTP_KEEPALIVE_INTERVAL', HTTP_KEEPALIVE_INTERVAL, float)
+    if HTTP_KEEPALIVE_INTERVAL >= HTTP_KEEPALIVE_TIMEOUT:
+        logger.warning("HTTP_KEEPALIVE_INTERVAL sebaiknya lebih kecil dari HTTP_KEEPALIVE_TIMEOUT agar koneksi tidak sempat ditutup.")
+    TRANSLATION_TIMEOUT = _get_env_number('TRANSLATION_TIMEOUT', TRANSLATION_TIMEOUT, float)
+
+    TRANSLATION_HEDGING = _get_env_bool('TRANSLATION_HEDGING', TRANSLATION_HEDGING)
+    TRANSLATION_HEDGE_DELAY = _get_env_number('TRANSLATION_HEDGE_DELAY', TRANSLATION_HEDGE_DELAY, float)
+    TRANSLATION_HEDGE_PERCENTILE = _get_env_number('TRANSLATION_HEDGE_PERCENTILE', TRANSLATION_HEDGE_PERCENTILE, float)
+    TRANSLATION_DEADLINE = _get_env_number('TRANSLATION_DEADLINE', TRANSLATION_DEADLINE, float)
+
+    TRANSLATION_EWMA_ALPHA = _get_env_number('TRANSLATION_EWMA_ALPHA', TRANSLATION_EWMA_ALPHA, float)
+    TRANSLATION_BREAKER_THRESHOLD = _get_env_number('TRANSLATION_BREAKER_THRESHOLD', TRANSLATION_BREAKER_THRESHOLD)
+    TRANSLATION_BREAKER_COOLDOWN = _get_env_number('TRANSLATION_BREAKER_COOLDOWN', TRANSLATION_BREAKER_COOLDOWN, float)
+
+    TRANSLATION_BATCHING = _get_env_bool('TRANSLATION_BATCHING', TRANSLATION_BATCHING)
+    TRANSLATION_BATCH_WINDOW = _get_env_number('TRANSLATION_BATCH_WINDOW', TRANSLATION_BATCH_WINDOW, float)
+    TRANSLATION_BATCH_MAX_ITEMS = _get_env_number('TRANSLATION_BATCH_MAX_ITEMS', TRANSLATION_BATCH_MAX_ITEMS)
+    TRANSLATION_BATCH_MAX_CHARS = _get_env_number('TRANSLATION_BATCH_MAX_CHARS', TRANSLATION_BATCH_MAX_CHARS)
+
+    DISCORD_AIMD_PACING = _get_env_bool('DISCORD_AIMD_PACING', DISCORD_AIMD_PACING)
+    DISCORD_AIMD_MAX_INTERVAL = _get_env_number('DISCORD_AIMD_MAX_INTERVAL', DISCORD_AIMD_MAX_INTERVAL, float)
+    DISCORD_AIMD_DECREASE = _get_env_number('DISCORD_AIMD_DECREASE', DISCORD_AIMD_DECREASE, float)
+
+    DISCORD_MAX_RETRIES = _get_env_number('DISCORD_MAX_RETRIES', DISCORD_MAX_RETRIES)
+    DISCORD_RETRY_BASE_DELAY = _get_env_number('DISCORD_RETRY_BASE_DELAY', DISCORD_RETRY_BASE_DELAY, float)
+    DISCORD_RETRY_MAX_DELAY = _get_env_number('DISCORD_RETRY_MAX_DELAY', DISCORD_RETRY_MAX_DELAY, float)
+
+    DISCORD_OUTBOX_PATH = os.getenv('DISCORD_OUTBOX_PATH') or DISCORD_OUTBOX_PATH
+    DISCORD_OUTBOX_MAX_MEMORY_BYTES = _get_env_number('DISCORD_OUTBOX_MAX_MEMORY_BYTES', DISCORD_OUTBOX_MAX_MEMORY_BYTES)
+    DISCORD_DEADLETTER_PATH = os.getenv('DISCORD_DEADLETTER_PATH') or DISCORD_DEADLETTER_PATH
+    DISCORD_BLOCK_PREDICTOR = _get_env_bool('DISCORD_BLOCK_PREDICTOR', DISCORD_BLOCK_PREDICTOR)
+    DISCORD_BLOCK_MODEL_PATH = os.getenv('DISCORD_BLOCK_MODEL_PATH') or DISCORD_BLOCK_MODEL_PATH
+    DISCORD_BLOCK_THRESHOLD = _get_env_number('DISCORD_BLOCK_THRESHOLD', DISCORD_BLOCK_THRESHOLD, float)
+    DISCORD_BLOCK_MIN_EVIDENCE = _get_env_number('DISCORD_BLOCK_MIN_EVIDENCE', DISCORD_BLOCK_MIN_EVIDENCE)
+    DISCORD_BLOCK_PROBE_RATE = min(1.0, max(0.0, _get_env_number('DISCORD_BLOCK_PROBE_RATE', DISCORD_BLOCK_PROBE_RATE, float)))
+
+    DISCORD_COALESCE = _get_env_bool('DISCORD_COALESCE', DISCORD_COALESCE)
+    DISCORD_COALESCE_DEPTH = _get_env_number('DISCORD_COALESCE_DEPTH', DISCORD_COALESCE_DEPTH)
+    DISCORD_COALESCE_AGE = _get_env_number('DISCORD_COALESCE_AGE', DISCORD_COALESCE_AGE, float)
+    DISCORD_MEDIA_MEMORY_LIMIT = _get_env_number('DISCORD_MEDIA_MEMORY_LIMIT', DISCORD_MEDIA_MEMORY_LIMIT)
+    DISCORD_IMAGE_PROCESSING = _get_env_bool('DISCORD_IMAGE_PROCESSING', DISCORD_IMAGE_PROCESSING)
+    DISCORD_IMAGE_MAX_DIMENSION = _get_env_number('DISCORD_IMAGE_MAX_DIMENSION', DISCORD_IMAGE_MAX_DIMENSION)
+    DISCORD_IMAGE_QUALITY = min(95, max(30, _get_env_number('DISCORD_IMAGE_QUALITY', DISCORD_IMAGE_QUALITY)))
+    DISCORD_IMAGE_MAX_BYTES = _get_env_number('DISCORD_IMAGE_MAX_BYTES', DISCORD_IMAGE_MAX_BYTES)
+    if DISCORD_OUTBOX_MAX_MEMORY_BYTES < DISCORD_MEDIA_MEMORY_LIMIT:
+        logger.warning("DISCORD_OUTBOX_MAX_MEMORY_BYTES lebih kecil dari DISCORD_MEDIA_MEMORY_LIMIT; gambar di memori akan langsung dipindah ke disk outbox.")
+
+    DISCORD_API_BASE = (os.getenv('DISCORD_API_BASE') or DISCORD_API_BASE).rstrip('/')
+    DISCORD_WEBHOOK_URL = os.getenv('DISCORD_WEBHOOK_URL') or None
+    DISCORD_WEBHOOK_THREAD_ID = os.getenv('DISCORD_WEBHOOK_THREAD_ID') or DISCORD_THREAD_ID
+    DISCORD_WEBHOOK_CATEGORIES = [category.strip().upper() for category in os.getenv('DISCORD_WEBHOOK_CATEGORIES', '').split(',') if category.strip()]
+    DISCORD_WEBHOOK_OUTBOX_PATH = os.getenv('DISCORD_WEBHOOK_OUTBOX_PATH') or DISCORD_WEBHOOK_OUTBOX_PATH
+    if DISCORD_WEBHOOK_CATEGORIES and not DISCORD_WEBHOOK_URL:
+        logger.warning("DISCORD_WEBHOOK_CATEGORIES diisi tetapi DISCORD_WEBHOOK_URL kosong; semua kategori dikirim lewat token pengguna.")
+
+    shards_json = os.getenv('DISCORD_SHARDS')
+    if shards_json:
+        try:
+            DISCORD_SHARDS = json.loads(shards_json)
+            if not isinstance(DISCORD_SHARDS, list) or not all(isinstance(shard, dict) for shard in DISCORD_SHARDS):
+                raise ValueError("harus berupa daftar objek")
+        except (json.JSONDecodeError, ValueError) as e:
+            logger.error(f"DISCORD_SHARDS tidak valid ({str(e)}), hanya shard default yang dipakai.")
+            DISCORD_SHARDS = []
+    DISCORD_SHARD_RECHECK_INTERVAL = _get_env_number('DISCORD_SHARD_RECHECK_INTERVAL', DISCORD_SHARD_RECHECK_INTERVAL, float)
+
+    ttl_json = os.getenv('DISCORD_CATEGORY_TTL')
+    if ttl_json:
+        try:
+            DISCORD_CATEGORY_TTL = {str(category).upper(): float(ttl) for category, ttl in json.loads(ttl_json).items()}
+        except (json.JSONDecodeError, AttributeError, TypeError, ValueError) as e:
+            logger.error(f"DISCORD_CATEGORY_TTL tidak valid ({str(e)}), pesan tidak dibatasi umurnya.")
+            DISCORD_CATEGORY_TTL = {}
+    DISCORD_EXPIRED_ACTION = (os.getenv('DISCORD_EXPIRED_ACTION') or DISCORD_EXPIRED_ACTION).lower()
+    if DISCORD_EXPIRED_ACTION not in ('drop', 'flag'):
+        logger.warning(f"DISCORD_EXPIRED_ACTION '{DISCORD_EXPIRED_ACTION}' tidak dikenal, memakai 'drop'.")
+        DISCORD_EXPIRED_ACTION = 'drop'
+
+    PIPELINE_QUEUE_SIZE = _get_env_number('PIPELINE_QUEUE_SIZE', PIPELINE_QUEUE_SIZE)
+    concurrency_json = os.getenv('PIPELINE_CONCURRENCY')
+    if concurrency_json:
+        try:
+            overrides = {str(stage).lower(): max(1, int(count)) for stage, count in json.loads(concurrency_json).items()}
+            unknown = set(overrides) - set(PIPELINE_CONCURRENCY)
+            if unknown:
+                raise ValueError(f"tahap tidak dikenal: {', '.join(sorted(unknown))}")
+            PIPELINE_CONCURRENCY = {**PIPELINE_CONCURRENCY, **overrides}
+        except (json.JSONDecodeError, AttributeError, TypeError, ValueError) as e:
+            logger.error(f"PIPELINE_CONCURRENCY tidak valid ({str(e)}), memakai jumlah pekerja bawaan.")
+
+    ADMISSION_CONTROL = _get_env_bool('ADMISSION_CONTROL', ADMISSION_CONTROL)
+    thresholds_json = os.getenv('ADMISSION_THRESHOLDS')
+    if thresholds_json:
+        try:
+            overrides = {}
+            for signal, levels in json.loads(thresholds_json).items():
+                if signal not in ADMISSION_THRESHOLDS:
+                    raise ValueError(f"sinyal tidak dikenal: {signal}")
+                levels = [float(level) for level in levels]
+                if len(levels) > 3 or levels != sorted(levels):
+                    raise ValueError(f"ambang {signal} harus berisi paling banyak 3 angka menaik")
+                overrides[signal] = levels
+            ADMISSION_THRESHOLDS = {**ADMISSION_THRESHOLDS, **overrides}
+        except (json.JSONDecodeError, AttributeError, TypeError, ValueError) as e:
+            logger.error(f"ADMISSION_THRESHOLDS tidak valid ({str(e)}), memakai ambang bawaan.")
+    ADMISSION_CLEAR_RATIO = min(1.0, max(0.0, _get_env_number('ADMISSION_CLEAR_RATIO', ADMISSION_CLEAR_RATIO, float)))
+    drop_categories = os.getenv('ADMISSION_DROP_CATEGORIES')
+    if drop_categories is not None:
+        ADMISSION_DROP_CATEGORIES = [category.strip().upper() for category in drop_categories.split(',') if category.strip()]
+    ADMISSION_CHECK_INTERVAL = _get_env_number('ADMISSION_CHECK_INTERVAL', ADMISSION_CHECK_INTERVAL, float)
+    ADMISSION_NOTIFY_INTERVAL = _get_env_number('ADMISSION_NOTIFY_INTERVAL', ADMISSION_NOTIFY_INTERVAL, float)
+
+    TELEGRAM_SEND_RATE = max(1.0, _get_env_number('TELEGRAM_SEND_RATE', TELEGRAM_SEND_RATE, float))
+    TELEGRAM_SEND_BURST = max(1, _get_env_number('TELEGRAM_SEND_BURST', TELEGRAM_SEND_BURST))
+    TELEGRAM_SEND_QUEUE_SIZE = max(1, _get_env_number('TELEGRAM_SEND_QUEUE_SIZE', TELEGRAM_SEND_QUEUE_SIZE))
+
 def setup_logging():
     """Mengatur logging untuk aplikasi dengan rotasi file."""
     handler = RotatingFileHandler('telegram_forwarder.log', maxBytes=5*1024*1024, backupCount=5)
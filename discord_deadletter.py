@@ -0,0 +1,166 @@
+# discord_deadletter.py
+import json
+import os
+import sqlite3
+import time
+from config import DISCORD_DEADLETTER_PATH, logger
+from discord_scheduler import CATEGORY_PRIORITY
+
+class DeadLetterStore:
+    """
+    Penyimpanan permanen (SQLite WAL) untuk pesan Discord yang gagal permanen. Setiap entri menyimpan
+    item lengkap (termasuk riwayat percobaan), alasan kegagalan, dan lampirannya: buffer gambar
+    sebagai BLOB, atau path file yang tidak dihapus sampai entri di-redrive atau dibersihkan.
+    """
+
+    def __init__(self, db_path=DISCORD_DEADLETTER_PATH):
+        self.db_path = db_path
+        self._db = None
+
+    def _connect(self):
+        if self._db is None:
+            self._db = sqlite3.connect(self.db_path)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS deadletter ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, created_at REAL NOT NULL, category TEXT, "
+                "reason TEXT, payload TEXT NOT NULL, media BLOB)"
+            )
+            self._db.commit()
+        return self._db
+
+    def add(self, item, reason):
+        """
+        Menyimpan item yang gagal permanen.
+
+        Args:
+            item (dict): Item antrian Discord beserta riwayat percobaannya.
+            reason (str): Alasan kegagalan terakhir.
+
+        Returns:
+            int: ID entri dead-letter, atau None jika gagal disimpan.
+        """
+        payload = json.dumps({key: value for key, value in item.items() if key != "media_bytes" and not key.startswith("_")})
+        try:
+            db = self._connect()
+            cursor = db.execute(
+                "INSERT INTO deadletter (created_at, category, reason, payload, media) VALUES (?, ?, ?, ?, ?)",
+                (time.time(), item.get("category"), reason, payload, item.get("media_bytes"))
+            )
+            db.commit()
+            return cursor.lastrowid
+        except sqlite3.Error as e:
+            logger.error(f"Gagal menyimpan pesan ke dead-letter: {str(e)}")
+            return None
+
+    def _where(self, filter_text):
+        """
+        Menerjemahkan filter admin menjadi klausa SQL: 'all', daftar ID berawalan '#' dipisah koma
+        (misalnya '#3,#7'), nama kategori, atau potongan teks alasan kegagalan (misalnya '401').
+        """
+        filter_text = (filter_text or "all").strip()
+        if filter_text.lower() == "all":
+            return "", ()
+        ids = [part.strip().lstrip("#") for part in filter_text.split(",")]
+        if filter_text.startswith("#") and all(part.isdigit() for part in ids):
+            return f"WHERE id IN ({','.join('?' * len(ids))})", tuple(int(part) for part in ids)
+        if filter_text.upper() in CATEGORY_PRIORITY:
+            return "WHERE category = ?", (filter_text.upper(),)
+        return "WHERE reason LIKE ?", (f"%{filter_text}%",)
+
+    def find(self, filter_text=None, limit=20):
+        """
+        Mencari entri dead-letter terbaru.
+
+        Args:
+            filter_text (str, optional): Filter (lihat _where).
+            limit (int): Jumlah entri maksimum.
+
+        Returns:
+            list: Daftar dict berisi id, created_at, category, reason, message, attempts, has_media.
+        """
+        where, params = self._where(filter_text)
+        rows = self._connect().execute(
+            f"SELECT id, created_at, category, reason, payload, media IS NOT NULL FROM deadletter {where} ORDER BY id DESC LIMIT ?",
+            params + (limit,)
+        ).fetchall()
+        entries = []
+        for row_id, created_at, category, reason, payload, has_blob in rows:
+            item = json.loads(payload)
+            entries.append({
+                "id": row_id,
+                "created_at": created_at,
+                "category": category,
+                "reason": reason,
+                "message": item.get("message", ""),
+                "attempts": len(item.get("history", [])),
+                "has_media": bool(has_blob or item.get("media_path")),
+            })
+        return entries
+
+    def load(self, filter_text):
+        """
+        Memuat item lengkap (termasuk buffer gambar) untuk di-redrive, urut dari yang terlama.
+
+        Args:
+            filter_text (str): Filter (lihat _where).
+
+        Returns:
+            list: Daftar tuple (id, item).
+        """
+        where, params = self._where(filter_text)
+        rows = self._connect().execute(f"SELECT id, payload, media FROM deadletter {where} ORDER BY id", params).fetchall()
+        result = []
+        for row_id, payload, media in rows:
+            item = json.loads(payload)
+            item["media_bytes"] = media
+            result.append((row_id, item))
+        return result
+
+    def delete(self, ids, remove_files=False):
+        """
+        Menghapus entri dead-letter.
+
+        Args:
+            ids (list): ID entri.
+            remove_files (bool): Hapus juga file media yang dirujuk entri.
+        """
+        if not ids:
+            return
+        db = self._connect()
+        placeholders = ",".join("?" * len(ids))
+        if remove_files:
+            for (payload,) in db.execute(f"SELECT payload FROM deadletter WHERE id IN ({placeholders})", tuple(ids)).fetchall():
+                media_path = json.loads(payload).get("media_path")
+                if media_path and os.path.exists(media_path):
+                    os.remove(media_path)
+        db.execute(f"DELETE FROM deadletter WHERE id IN ({placeholders})", tuple(ids))
+        db.commit()
+
+    def purge(self, filter_text):
+        """
+        Menghapus entri yang cocok dengan filter beserta file media yang dirujuknya.
+
+        Args:
+            filter_text (str): Filter (lihat _where).
+
+        Returns:
+            int: Jumlah entri yang dihapus.
+        """
+        where, params = self._where(filter_text)
+        ids = [row_id for (row_id,) in self._connect().execute(f"SELECT id FROM deadletter {where}", params).fetchall()]
+        self.delete(ids, remove_files=True)
+        return len(ids)
+
+    def count(self):
+        """Jumlah entri dead-letter."""
+        return self._connect().execute("SELECT COUNT(*) FROM deadletter").fetchone()[0]
+
+    def close(self):
+        """Menutup koneksi SQLite."""
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+dead_letters = DeadLetterStore()
@@ -0,0 +1,312 @@
+# discord_outbox.py
+import asyncio
+import json
+import sqlite3
+import time
+from config import DISCORD_OUTBOX_PATH, DISCORD_OUTBOX_MAX_MEMORY_BYTES, DISCORD_CATEGORY_TTL, DISCORD_EXPIRED_ACTION, logger
+from discord_scheduler import PriorityLanes, category_rank
+
+def has_media(item):
+    """Memeriksa apakah item membawa lampiran gambar (di memori atau di file)."""
+    return bool(item.get("media_path") or item.get("has_media_bytes"))
+
+# Menit keterlambatan yang ditampilkan dibatasi agar panjang penanda tidak melewati LATE_FLAG_RESERVE
+MAX_LATE_MINUTES = 99999
+LATE_FLAG_RESERVE = len(f"[TERLAMBAT {MAX_LATE_MINUTES} menit] ")
+
+def late_flag(minutes):
+    """Penanda yang ditambahkan di depan pesan kedaluwarsa saat DISCORD_EXPIRED_ACTION = 'flag'."""
+    return f"[TERLAMBAT {min(minutes, MAX_LATE_MINUTES):.0f} menit] "
+
+def late_flag_reserve(item):
+    """
+    Jumlah karakter yang perlu disisihkan untuk penanda terlambat saat item digabung dengan pesan lain,
+    karena penanda bisa ditambahkan setelah penggabungan (misalnya saat menunggu rate limit).
+
+    Returns:
+        int: LATE_FLAG_RESERVE jika item masih bisa ditandai terlambat, selain itu 0.
+    """
+    if DISCORD_EXPIRED_ACTION != "flag" or item.get("delayed") or item.get("source_time") is None:
+        return 0
+    return LATE_FLAG_RESERVE if DISCORD_CATEGORY_TTL.get(item.get("category")) is not None else 0
+
+class DiscordOutbox:
+    """
+    Antrian pesan Discord yang tahan restart. Setiap item ditulis ke SQLite (mode WAL) saat masuk
+    dan dihapus setelah di-ack. Memori dibatasi per byte: jika batas terlampaui, item berprioritas
+    terendah dipindah ke disk lebih dulu untuk memberi tempat item yang lebih penting, dan item di disk
+    dimuat kembali menurut prioritas kategori lalu urutan masuk. Saat startup, semua item yang belum
+    di-ack diputar ulang dengan urutan yang sama.
+    Item di memori diambil lewat PriorityLanes: prioritas per kategori, bergiliran per chat sumber.
+    """
+
+    def __init__(self, db_path=DISCORD_OUTBOX_PATH, max_memory_bytes=DISCORD_OUTBOX_MAX_MEMORY_BYTES):
+        self.db_path = db_path
+        self.max_memory_bytes = max_memory_bytes
+        self._db = None
+        self._memory = PriorityLanes()
+        self._memory_bytes = 0
+        # Jumlah item yang hanya ada di disk, per peringkat kategori
+        self._spilled = {}
+        self._available = asyncio.Event()
+        self.stats = {"enqueued": 0, "acked": 0, "spilled": 0, "replayed": 0}
+
+    def _connect(self):
+        if self._db is None:
+            self._db = sqlite3.connect(self.db_path)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS outbox ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, payload TEXT NOT NULL, "
+                "priority INTEGER NOT NULL DEFAULT 0, spilled INTEGER NOT NULL DEFAULT 1)"
+            )
+            # Outbox dari versi lama belum punya kolom prioritas dan status spill
+            columns = {row[1] for row in self._db.execute("PRAGMA table_info(outbox)")}
+            if "priority" not in columns:
+                self._db.execute("ALTER TABLE outbox ADD COLUMN priority INTEGER NOT NULL DEFAULT 0")
+            if "spilled" not in columns:
+                self._db.execute("ALTER TABLE outbox ADD COLUMN spilled INTEGER NOT NULL DEFAULT 1")
+            self._db.execute("CREATE INDEX IF NOT EXISTS outbox_spilled ON outbox (spilled, priority, id)")
+            self._db.execute("CREATE TABLE IF NOT EXISTS outbox_media (id INTEGER PRIMARY KEY, data BLOB NOT NULL)")
+            # Item dari sesi sebelumnya hanya ada di disk
+            self._db.execute("UPDATE outbox SET spilled = 1")
+            self._db.commit()
+            self._spilled = dict(self._db.execute("SELECT priority, COUNT(*) FROM outbox GROUP BY priority").fetchall())
+            pending = sum(self._spilled.values())
+            if pending:
+                logger.info(f"Outbox Discord berisi {pending} pesan tertunda dari sesi sebelumnya, akan diputar ulang.")
+                self.stats["replayed"] += pending
+        return self._db
+
+    @staticmethod
+    def _serialize(item):
+        # Buffer gambar disimpan terpisah di tabel outbox_media; kunci berawalan '_' hanya untuk memori
+        return json.dumps({key: value for key, value in item.items() if key != "media_bytes" and not key.startswith("_")})
+
+    def _store_media(self, item):
+        # Buffer gambar ditulis sekali saja; salinan di memori hanya untuk menghindari baca ulang dari disk
+        media_bytes = item.get("media_bytes")
+        if media_bytes is not None and not item.get("_media_stored"):
+            self._connect().execute("INSERT OR REPLACE INTO outbox_media (id, data) VALUES (?, ?)", (item["outbox_id"], media_bytes))
+            item["_media_stored"] = True
+
+    def _load_media(self, item):
+        if item.get("has_media_bytes") and item.get("media_bytes") is None:
+            row = self._connect().execute("SELECT data FROM outbox_media WHERE id = ?", (item["outbox_id"],)).fetchone()
+            if row is None:
+                logger.warning(f"Lampiran item outbox {item['outbox_id']} tidak tersimpan, pesan dikirim tanpa gambar.")
+                item["has_media_bytes"] = False
+                return
+            item["media_bytes"] = row[0]
+            item["_media_stored"] = True
+
+    def _spilled_rank(self):
+        ranks = [rank for rank, count in self._spilled.items() if count > 0]
+        return min(ranks) if ranks else None
+
+    def _spill(self, item, rank):
+        # Payload dan buffer gambar di disk selalu mutakhir; cukup tandai baris sebagai spill lalu lepas dari memori
+        self._store_media(item)
+        item.pop("media_bytes", None)
+        item.pop("_size", None)
+        self._connect().execute("UPDATE outbox SET spilled = 1 WHERE id = ?", (item["outbox_id"],))
+        self._spilled[rank] = self._spilled.get(rank, 0) + 1
+
+    def _make_room(self, rank, size):
+        """
+        Memindahkan item berprioritas lebih rendah dari rank ke disk sampai item berukuran size muat.
+
+        Returns:
+            bool: True jika item muat di memori (selalu muat jika memori kosong).
+        """
+        while self._memory and self._memory_bytes + size > self.max_memory_bytes:
+            victim = self._memory.pop_lowest(rank)
+            if victim is None:
+                return False
+            self._memory_bytes -= victim.get("_size", 0)
+            self._spill(victim, category_rank(victim.get("category")))
+            self.stats["spilled"] += 1
+        return True
+
+    async def put(self, item):
+        """
+        Menyimpan item ke outbox. Item baru ditambahkan di akhir; item retry (sudah punya outbox_id)
+        diperbarui di disk lalu dimasukkan kembali ke antrian memori. Waktu masuk pertama (queued_at)
+        dipertahankan saat retry.
+
+        Args:
+            item (dict): Item antrian Discord. Semua kunci harus dapat diserialisasi JSON,
+                kecuali 'media_bytes' (buffer gambar) yang disimpan sebagai BLOB dalam transaksi
+                yang sama dengan barisnya.
+        """
+        db = self._connect()
+        item.setdefault("queued_at", time.time())
+        rank = category_rank(item.get("category"))
+        media_bytes = item.get("media_bytes")
+        if item.get("outbox_id") is None:
+            item["has_media_bytes"] = media_bytes is not None
+            payload = self._serialize(item)
+            cursor = db.execute("INSERT INTO outbox (payload, priority, spilled) VALUES (?, ?, 0)", (payload, rank))
+            item["outbox_id"] = cursor.lastrowid
+            self._store_media(item)
+            self.stats["enqueued"] += 1
+        else:
+            payload = self._serialize(item)
+            db.execute("UPDATE outbox SET payload = ?, priority = ?, spilled = 0 WHERE id = ?", (payload, rank, item["outbox_id"]))
+            self._load_media(item)
+            self._store_media(item)
+            media_bytes = item.get("media_bytes")
+        size = len(payload) + (len(media_bytes) if media_bytes is not None else 0)
+        # Item tidak boleh mendahului item sekategori atau yang lebih penting yang masih menunggu di disk
+        spilled_rank = self._spilled_rank()
+        if (spilled_rank is not None and spilled_rank <= rank) or not self._make_room(rank, size):
+            self._spill(item, rank)
+            self.stats["spilled"] += 1
+        else:
+            item["_size"] = size
+            self._memory.push(item)
+            self._memory_bytes += size
+        db.commit()
+        self._available.set()
+
+    def _load_spilled(self):
+        db = self._connect()
+        # Ukuran BLOB dihitung di SQLite agar buffer hanya dibaca untuk item yang benar-benar muat
+        rows = db.execute(
+            "SELECT outbox.id, payload, priority, COALESCE(LENGTH(outbox_media.data), 0) FROM outbox "
+            "LEFT JOIN outbox_media ON outbox_media.id = outbox.id "
+            "WHERE spilled = 1 ORDER BY priority, outbox.id LIMIT 100"
+        ).fetchall()
+        if not rows:
+            self._spilled = {}
+            return
+        loaded = []
+        for row_id, payload, rank, media_size in rows:
+            if not self._make_room(rank, len(payload) + media_size):
+                break
+            item = json.loads(payload)
+            item["outbox_id"] = row_id
+            self._load_media(item)
+            size = len(payload) + (len(item["media_bytes"]) if item.get("media_bytes") is not None else 0)
+            item["_size"] = size
+            self._memory.push(item)
+            self._memory_bytes += size
+            self._spilled[rank] = max(self._spilled.get(rank, 0) - 1, 0)
+            loaded.append((row_id,))
+        db.executemany("UPDATE outbox SET spilled = 0 WHERE id = ?", loaded)
+        db.commit()
+
+    def _refill(self):
+        # Muat dari disk saat memori kosong atau saat item di disk lebih penting dari kepala antrian memori
+        self._connect()
+        spilled_rank = self._spilled_rank()
+        if spilled_rank is None:
+            return
+        head_rank = self._memory.head_rank()
+        if head_rank is None or spilled_rank < head_rank:
+            self._load_spilled()
+
+    async def get(self):
+        """
+        Mengambil item berikutnya sesuai urutan, menunggu jika outbox kosong.
+
+        Returns:
+            dict: Item antrian Discord.
+        """
+        self._connect()
+        while True:
+            item = self.get_nowait()
+            if item is not None:
+                return item
+            self._available.clear()
+            await self._available.wait()
+
+    def peek(self):
+        """
+        Melihat item berikutnya tanpa mengeluarkannya dari outbox.
+
+        Returns:
+            dict: Item berikutnya, atau None jika outbox kosong.
+        """
+        self._refill()
+        return self._memory.peek()
+
+    def get_nowait(self):
+        """
+        Mengambil item berikutnya tanpa menunggu.
+
+        Returns:
+            dict: Item berikutnya, atau None jika outbox kosong.
+        """
+        self._refill()
+        if not self._memory:
+            return None
+        item = self._memory.pop()
+        self._memory_bytes -= item.pop("_size", 0)
+        return item
+
+    def oldest_age(self):
+        """Umur (detik) item tertua yang masih menunggu di memori, atau None jika kosong."""
+        oldest = self._memory.oldest_queued_at()
+        return time.time() - oldest if oldest is not None else None
+
+    def save(self, item):
+        """
+        Memperbarui item di disk tanpa memasukkannya ke antrian (misalnya saat menunggu retry).
+        Buffer gambar yang berubah sejak put() (misalnya hasil kompresi ulang) ikut ditulis ulang.
+
+        Args:
+            item (dict): Item yang sudah punya outbox_id.
+        """
+        outbox_id = item.get("outbox_id")
+        if outbox_id is None:
+            return
+        try:
+            db = self._connect()
+            db.execute("UPDATE outbox SET payload = ? WHERE id = ?", (self._serialize(item), outbox_id))
+            self._store_media(item)
+            db.commit()
+        except sqlite3.Error as e:
+            logger.error(f"Gagal memperbarui item outbox {outbox_id}: {str(e)}")
+
+    def ack(self, item):
+        """
+        Menghapus item dari outbox setelah selesai (terkirim atau gagal permanen).
+
+        Args:
+            item (dict): Item yang sudah selesai.
+        """
+        outbox_id = item.get("outbox_id")
+        if outbox_id is None:
+            return
+        try:
+            db = self._connect()
+            db.execute("DELETE FROM outbox WHERE id = ?", (outbox_id,))
+            db.execute("DELETE FROM outbox_media WHERE id = ?", (outbox_id,))
+            db.commit()
+            self.stats["acked"] += 1
+        except sqlite3.Error as e:
+            logger.error(f"Gagal menghapus item outbox {outbox_id}: {str(e)}")
+
+    def task_done(self):
+        """Kompatibel dengan asyncio.Queue; penyelesaian item ditandai lewat ack()."""
+
+    def qsize(self):
+        """Jumlah item yang menunggu dikirim (di memori dan di disk)."""
+        return len(self._memory) + sum(self._spilled.values())
+
+    def get_stats(self):
+        """Mengembalikan statistik outbox beserta penggunaan memori."""
+        return {**self.stats, "pending": self.qsize(), "memory_items": len(self._memory), "memory_bytes": self._memory_bytes}
+
+    def lane_stats(self):
+        """Mengembalikan kedalaman dan waktu tunggu per lane kategori (hanya item di memori)."""
+        return self._memory.get_stats()
+
+    def close(self):
+        """Menyimpan perubahan yang tertunda lalu menutup koneksi SQLite."""
+        if self._db is not None:
+            self._db.commit()
+            self._db.close()
+            self._db = None
@@ -0,0 +1,142 @@
+# discord_ratelimit.py
+import asyncio
+import time
+from config import DISCORD_AIMD_PACING, DISCORD_AIMD_MAX_INTERVAL, DISCORD_AIMD_DECREASE, logger
+
+class RateLimitBucket:
+    """
+    Status satu bucket rate limit Discord (dari header X-RateLimit-*).
+    """
+
+    def __init__(self):
+        self.bucket_id = None
+        self.limit = None
+        self.remaining = 1
+        self.reset_at = 0.0
+        self.lock = asyncio.Lock()
+
+class DiscordRateLimiter:
+    """
+    Rate limiter yang mengikuti header Discord: X-RateLimit-Bucket, X-RateLimit-Remaining,
+    X-RateLimit-Reset-After, serta rate limit global. Pesan dikirim secepat yang diizinkan bucket,
+    dan jeda hanya berasal dari informasi Discord. AIMD pacing opsional menambah jarak antar kiriman
+    setelah terkena 429 dan menguranginya perlahan saat kiriman berhasil.
+    """
+
+    def __init__(self, name="discord", aimd_pacing=DISCORD_AIMD_PACING):
+        self.name = name
+        self.aimd_pacing = aimd_pacing
+        self.pacing_interval = 0.0
+        self.global_reset_at = 0.0
+        self.last_sent_at = 0.0
+        self._routes = {}
+        self._buckets = {}
+        self.stats = {"requests": 0, "rate_limited": 0, "global_limited": 0, "waited_seconds": 0.0}
+
+    def _bucket_for(self, route):
+        bucket = self._routes.get(route)
+        if bucket is None:
+            bucket = RateLimitBucket()
+            self._routes[route] = bucket
+        return bucket
+
+    async def acquire(self, route):
+        """
+        Menunggu hingga route boleh dikirimi permintaan, lalu memesan satu slot.
+
+        Args:
+            route (str): Kunci route, misalnya "POST /channels/{id}/messages".
+        """
+        bucket = self._bucket_for(route)
+        async with bucket.lock:
+            while True:
+                now = time.monotonic()
+                wait = 0.0
+                if self.global_reset_at > now:
+                    wait = self.global_reset_at - now
+                elif bucket.remaining <= 0 and bucket.reset_at > now:
+                    wait = bucket.reset_at - now
+                elif self.aimd_pacing and self.pacing_interval > 0 and self.last_sent_at + self.pacing_interval > now:
+                    wait = self.last_sent_at + self.pacing_interval - now
+                if wait <= 0:
+                    break
+                logger.debug(f"[{self.name}] Menunggu rate limit {wait:.2f} detik untuk {route}")
+                self.stats["waited_seconds"] += wait
+                await asyncio.sleep(wait)
+
+            if bucket.reset_at <= time.monotonic():
+                # Jendela bucket sudah lewat, anggap sisa kuota pulih sampai header berikutnya datang
+                bucket.remaining = max(bucket.remaining, 1)
+            bucket.remaining -= 1
+            self.last_sent_at = time.monotonic()
+            self.stats["requests"] += 1
+
+    def update(self, route, status, headers):
+        """
+        Memperbarui status bucket dari header respons Discord.
+
+        Args:
+            route (str): Kunci route yang sama dengan saat acquire.
+            status (int): Status HTTP respons.
+            headers: Header respons (mapping tidak peka huruf besar/kecil).
+
+        Returns:
+            float: Waktu tunggu (detik) sebelum mencoba lagi jika status 429, selain itu 0.
+        """
+        now = time.monotonic()
+        bucket = self._bucket_for(route)
+
+        bucket_id = headers.get("X-RateLimit-Bucket")
+        if bucket_id:
+            shared = self._buckets.get(bucket_id)
+            if shared is not None and shared is not bucket:
+                # Beberapa route berbagi bucket yang sama di Discord
+                self._routes[route] = shared
+                bucket = shared
+            else:
+                self._buckets[bucket_id] = bucket
+            bucket.bucket_id = bucket_id
+
+        remaining = _parse_float(headers.get("X-RateLimit-Remaining"))
+        reset_after = _parse_float(headers.get("X-RateLimit-Reset-After"))
+        limit = _parse_float(headers.get("X-RateLimit-Limit"))
+        if limit is not None:
+            bucket.limit = int(limit)
+        if remaining is not None:
+            bucket.remaining = int(remaining)
+        if reset_after is not None:
+            bucket.reset_at = now + reset_after
+
+        if status != 429:
+            if self.aimd_pacing and self.pacing_interval > 0:
+                self.pacing_interval = max(0.0, self.pacing_interval - DISCORD_AIMD_DECREASE)
+            return 0.0
+
+        self.stats["rate_limited"] += 1
+        retry_after = _parse_float(headers.get("Retry-After"))
+        if retry_after is None:
+            retry_after = reset_after if reset_after is not None else 1.0
+        is_global = str(headers.get("X-RateLimit-Global", "")).lower() == "true" or headers.get("X-RateLimit-Scope") == "global"
+        if is_global:
+            self.stats["global_limited"] += 1
+            self.global_reset_at = now + retry_after
+            logger.warning(f"[{self.name}] Rate limit global Discord, menunggu {retry_after:.2f} detik.")
+        else:
+            bucket.remaining = 0
+            bucket.reset_at = max(bucket.reset_at, now + retry_after)
+            logger.warning(f"[{self.name}] Rate limit Discord untuk {route} (bucket {bucket.bucket_id}), menunggu {retry_after:.2f} detik.")
+
+        if self.aimd_pacing:
+            self.pacing_interval = min(DISCORD_AIMD_MAX_INTERVAL, max(0.5, self.pacing_interval * 2))
+            logger.info(f"[{self.name}] AIMD pacing dinaikkan menjadi {self.pacing_interval:.2f} detik.")
+        return retry_after
+
+    def get_stats(self):
+        """Mengembalikan statistik rate limiter beserta interval pacing saat ini."""
+        return {**self.stats, "pacing_interval": self.pacing_interval, "buckets": len(self._buckets)}
+
+def _parse_float(value):
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
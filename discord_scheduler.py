@@ -0,0 +1,160 @@
+# discord_scheduler.py
+import time
+from collections import OrderedDict, deque
+
+# Urutan prioritas kategori, dari yang paling didahulukan
+CATEGORY_PRIORITY = ["VIP", "SUMMARY", "FILTERED", "IMAGE", "UNFILTERED"]
+DEFAULT_CATEGORY = "UNFILTERED"
+
+def category_rank(category):
+    """Peringkat prioritas kategori (0 paling didahulukan); kategori tak dikenal diperlakukan sebagai DEFAULT_CATEGORY."""
+    return CATEGORY_PRIORITY.index(category if category in CATEGORY_PRIORITY else DEFAULT_CATEGORY)
+
+class LaneStats:
+    """
+    Statistik waktu tunggu antrian untuk satu lane.
+    """
+
+    def __init__(self, window=500):
+        self.dispatched = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.recent_waits = deque(maxlen=window)
+
+    def record(self, wait):
+        self.dispatched += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+        self.recent_waits.append(wait)
+
+    def percentile(self, p):
+        if not self.recent_waits:
+            return None
+        ordered = sorted(self.recent_waits)
+        return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+class PriorityLanes:
+    """
+    Penjadwal pesan dengan prioritas ketat per kategori (VIP > SUMMARY > FILTERED > IMAGE > UNFILTERED).
+    Di dalam setiap kategori, pesan diambil bergiliran (round-robin) per chat_id sumber sehingga
+    satu channel yang ramai tidak membuat channel lain kelaparan.
+    """
+
+    def __init__(self):
+        self._lanes = {category: OrderedDict() for category in CATEGORY_PRIORITY}
+        self._size = 0
+        self.lane_stats = {category: LaneStats() for category in CATEGORY_PRIORITY}
+
+    def __len__(self):
+        return self._size
+
+    def __bool__(self):
+        return self._size > 0
+
+    def push(self, item):
+        """
+        Menambahkan item ke lane kategorinya, di belakang antrian chat_id sumbernya.
+
+        Args:
+            item (dict): Item antrian Discord dengan kunci 'category' dan 'chat_id'.
+        """
+        category = item.get("category") if item.get("category") in self._lanes else DEFAULT_CATEGORY
+        lane = self._lanes[category]
+        source = lane.get(item.get("chat_id"))
+        if source is None:
+            source = deque()
+            lane[item.get("chat_id")] = source
+        item.setdefault("queued_at", time.time())
+        source.append(item)
+        self._size += 1
+
+    def pop(self):
+        """
+        Mengambil item berikutnya: lane dengan prioritas tertinggi yang tidak kosong,
+        lalu chat_id berikutnya secara bergiliran di dalam lane tersebut.
+
+        Returns:
+            dict: Item antrian Discord, atau None jika kosong.
+        """
+        for category in CATEGORY_PRIORITY:
+            lane = self._lanes[category]
+            if not lane:
+                continue
+            chat_id, source = next(iter(lane.items()))
+            item = source.popleft()
+            if source:
+                lane.move_to_end(chat_id)
+            else:
+                del lane[chat_id]
+            self._size -= 1
+            # queued_at tetap disimpan di item agar retry tidak mengulang hitungan umur pesan
+            self.lane_stats[category].record(max(0.0, time.time() - item.get("queued_at", time.time())))
+            return item
+        return None
+
+    def pop_lowest(self, above_rank):
+        """
+        Mengeluarkan item paling baru dari lane berprioritas terendah yang kalah dari above_rank,
+        tanpa mencatat statistik tunggu (item belum dikirim, hanya dipindah ke disk).
+
+        Args:
+            above_rank (int): Peringkat kategori yang harus diberi tempat.
+
+        Returns:
+            dict: Item yang dikeluarkan, atau None jika tidak ada lane berprioritas lebih rendah.
+        """
+        for category in reversed(CATEGORY_PRIORITY[above_rank + 1:]):
+            lane = self._lanes[category]
+            if not lane:
+                continue
+            chat_id, source = next(reversed(lane.items()))
+            item = source.pop()
+            if not source:
+                del lane[chat_id]
+            self._size -= 1
+            return item
+        return None
+
+    def head_rank(self):
+        """Peringkat kategori item yang akan diambil pop() berikutnya, atau None jika kosong."""
+        for rank, category in enumerate(CATEGORY_PRIORITY):
+            if self._lanes[category]:
+                return rank
+        return None
+
+    def peek(self):
+        """
+        Melihat item yang akan diambil pop() berikutnya tanpa mengeluarkannya.
+
+        Returns:
+            dict: Item antrian Discord, atau None jika kosong.
+        """
+        for category in CATEGORY_PRIORITY:
+            lane = self._lanes[category]
+            if lane:
+                return next(iter(lane.values()))[0]
+        return None
+
+    def oldest_queued_at(self):
+        """Waktu masuk item tertua di semua lane, atau None jika kosong."""
+        heads = [source[0].get("queued_at", time.time()) for lane in self._lanes.values() for source in lane.values()]
+        return min(heads) if heads else None
+
+    def depths(self):
+        """Jumlah item per kategori."""
+        return {category: sum(len(source) for source in lane.values()) for category, lane in self._lanes.items()}
+
+    def get_stats(self):
+        """Mengembalikan kedalaman dan statistik waktu tunggu per lane."""
+        depths = self.depths()
+        stats = {}
+        for category in CATEGORY_PRIORITY:
+            lane_stats = self.lane_stats[category]
+            stats[category] = {
+                "depth": depths[category],
+                "dispatched": lane_stats.dispatched,
+                "avg_wait": lane_stats.total_wait / lane_stats.dispatched if lane_stats.dispatched else 0.0,
+                "p95_wait": lane_stats.percentile(0.95),
+                "max_wait": lane_stats.max_wait,
+            }
+        return stats
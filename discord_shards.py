@@ -0,0 +1,115 @@
+# discord_shards.py
+import hashlib
+import os
+from config import DISCORD_API_BASE, DISCORD_AUTH_TOKEN, DISCORD_THREAD_ID, DISCORD_OUTBOX_PATH, DISCORD_SHARDS, logger
+from discord_ratelimit import DiscordRateLimiter
+from discord_outbox import DiscordOutbox
+
+USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/135.0.0.0 Safari/537.36"
+
+class DiscordShard:
+    """
+    Satu jalur pengiriman Discord dengan token, thread, outbox, dan rate limiter sendiri.
+    Setiap shard dilayani pekerjanya sendiri sehingga shard yang terkena rate limit atau
+    tidak berwenang tidak memperlambat shard lain.
+    """
+
+    def __init__(self, name, token, thread_id, categories=(), outbox_path=DISCORD_OUTBOX_PATH, rate_limiter=None):
+        self.name = name
+        self.token = token
+        self.thread_id = thread_id
+        self.categories = {category.upper() for category in categories}
+        self.queue = DiscordOutbox(outbox_path)
+        self.rate_limiter = rate_limiter or DiscordRateLimiter(name=f"discord:{name}")
+        self.url = f"{DISCORD_API_BASE}/channels/{thread_id}/messages"
+        self.route = f"POST /channels/{thread_id}/messages"
+        self.headers = {"Authorization": token, "User-Agent": USER_AGENT}
+        self.stats = {"sent": 0, "failed": 0}
+        self.healthy = True
+
+    def get_stats(self):
+        """Mengembalikan statistik shard beserta outbox dan rate limiter-nya."""
+        return {
+            **self.stats,
+            "thread_id": self.thread_id,
+            "categories": sorted(self.categories),
+            "healthy": self.healthy,
+            "pending": self.queue.qsize(),
+            "rate_limited": self.rate_limiter.get_stats()["rate_limited"],
+        }
+
+def _shard_outbox_path(name):
+    root, ext = os.path.splitext(DISCORD_OUTBOX_PATH)
+    return f"{root}_{name}{ext or '.db'}"
+
+def build_shards():
+    """
+    Membuat daftar shard: shard 'default' dari DISCORD_AUTH_TOKEN/DISCORD_THREAD_ID, ditambah shard
+    dari DISCORD_SHARDS. Shard dengan token yang sama berbagi rate limiter karena bucket dan
+    rate limit global Discord berlaku per token.
+
+    Returns:
+        list: Daftar DiscordShard, shard 'default' selalu di posisi pertama.
+    """
+    limiters = {DISCORD_AUTH_TOKEN: DiscordRateLimiter()}
+    result = [DiscordShard("default", DISCORD_AUTH_TOKEN, DISCORD_THREAD_ID, rate_limiter=limiters[DISCORD_AUTH_TOKEN])]
+    for index, config in enumerate(DISCORD_SHARDS):
+        name = str(config.get("name") or f"shard{index + 1}")
+        if any(shard.name == name for shard in result):
+            logger.error(f"Nama shard Discord '{name}' dipakai lebih dari sekali, shard diabaikan.")
+            continue
+        token = config.get("token") or DISCORD_AUTH_TOKEN
+        thread_id = str(config.get("thread_id") or DISCORD_THREAD_ID)
+        limiter = limiters.get(token)
+        if limiter is None:
+            limiter = DiscordRateLimiter(name=f"discord:{name}")
+            limiters[token] = limiter
+        result.append(DiscordShard(name, token, thread_id, config.get("categories", []), _shard_outbox_path(name), limiter))
+    if len(result) > 1:
+        logger.info(f"Pengiriman Discord dibagi ke {len(result)} shard: {', '.join(f'{shard.name} (thread {shard.thread_id})' for shard in result)}")
+    return result
+
+shards = build_shards()
+default_shard = shards[0]
+
+def get_shard(name):
+    """
+    Mencari shard berdasarkan nama.
+
+    Args:
+        name (str): Nama shard.
+
+    Returns:
+        DiscordShard: Shard dengan nama tersebut, atau shard 'default' jika tidak ditemukan.
+    """
+    for shard in shards:
+        if shard.name == name:
+            return shard
+    return default_shard
+
+def _rendezvous_weight(shard, chat_id):
+    # Bobot per pasangan (shard, channel); shard berbobot tertinggi menjadi shard asal channel
+    digest = hashlib.sha1(f"{shard.name}:{chat_id}".encode()).digest()
+    return int.from_bytes(digest[:8], "big")
+
+def shard_for(category, chat_id):
+    """
+    Memilih shard untuk pesan baru. Hanya shard sehat yang dipertimbangkan (semua shard jika
+    tidak ada yang sehat). Shard yang mencantumkan kategori pesan didahulukan; selain itu pesan
+    dibagi dengan rendezvous hashing chat_id sumber ke shard tanpa daftar kategori, sehingga urutan
+    pesan dari satu channel tetap terjaga di satu shard. Saat shard lain sakit atau pulih, hanya
+    channel yang shard asalnya sakit yang berpindah.
+
+    Args:
+        category (str): Kategori pesan.
+        chat_id (int): ID channel sumber.
+
+    Returns:
+        DiscordShard: Shard tujuan.
+    """
+    available = [shard for shard in shards if shard.healthy] or shards
+    for shard in available:
+        if category in shard.categories:
+            return shard
+    candidates = [shard for shard in available if not shard.categories] or available
+    return max(candidates, key=lambda shard: _rendezvous_weight(shard, chat_id))
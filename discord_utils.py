@@ -1,166 +1,698 @@
 # discord_utils.py
 import aiohttp
 import asyncio
+import hashlib
+import heapq
+import itertools
 import time
 import random
 import os
 import json
-from config import DISCORD_AUTH_TOKEN, DISCORD_THREAD_ID, logger
+from config import (
+    DISCORD_MAX_RETRIES, DISCORD_RETRY_BASE_DELAY, DISCORD_RETRY_MAX_DELAY,
+    DISCORD_COALESCE, DISCORD_COALESCE_DEPTH, DISCORD_COALESCE_AGE, DISCORD_CATEGORY_TTL, DISCORD_EXPIRED_ACTION, DISCORD_API_BASE,
+    DISCORD_BLOCK_PREDICTOR, DISCORD_IMAGE_PROCESSING, DISCORD_SHARD_RECHECK_INTERVAL, logger
+)
 from utils import guess_blocked_keywords
+from http_sessions import get_session
+from discord_outbox import has_media, late_flag, late_flag_reserve
+from discord_shards import shards, default_shard, get_shard, shard_for
+from discord_deadletter import dead_letters
+from block_predictor import block_predictor
+from media_processing import process_item_media, add_media_field, record_upload
+from discord_webhook import webhook_queue, uses_webhook, pack_embeds, build_webhook_payload, post_to_webhook
 
-message_queue = asyncio.Queue()
+# Antrian utama (shard default) disimpan di disk sehingga pesan tertunda tidak hilang saat restart atau gangguan panjang
+message_queue = default_shard.queue
 failed_message_queue = asyncio.Queue()
+rate_limiter = default_shard.rate_limiter
 
-async def send_message_to_discord_thread(message, media_path=None):
+# Heap timer untuk pesan yang menunggu retry: (waktu jatuh tempo, urutan, item)
+retry_heap = []
+retry_wakeup = asyncio.Event()
+_retry_sequence = itertools.count()
+
+# Batas kirim ulang langsung saat terkena 429 sebelum pesan dianggap gagal
+MAX_RATE_LIMIT_RETRIES = 5
+
+# Jumlah kiriman gabungan dan pesan di dalamnya saat antrian menumpuk
+coalesce_stats = {"posts": 0, "messages": 0}
+
+# Jumlah pesan kedaluwarsa per kategori: dibuang sebelum dikirim atau dikirim dengan penanda terlambat
+expired_stats = {}
+
+def discord_warmup_urls():
+    """
+    Mengembalikan URL ringan di API Discord untuk pemanasan koneksi (tidak memerlukan token).
+    
+    Returns:
+        list: Daftar URL.
+    """
+    return [f"{DISCORD_API_BASE}/gateway"]
+
+def queue_for(item):
+    """
+    Memilih outbox milik jalur pengiriman item: webhook atau shard token pengguna.
+    
+    Args:
+        item (dict): Item antrian Discord.
+    
+    Returns:
+        DiscordOutbox: Outbox tempat item disimpan.
+    """
+    return webhook_queue if item.get("sink") == "webhook" else get_shard(item.get("sink")).queue
+
+def make_nonce():
+    """
+    Membuat nonce unik (maksimal 25 karakter) untuk idempotensi pesan Discord.
+    Nonce yang sama dipakai di setiap retry sehingga Discord tidak memposting pesan dua kali.
+    
+    Returns:
+        str: Nonce berupa angka.
+    """
+    return str(time.time_ns() // 1000 * 1000 + random.randint(0, 999))
+
+def merged_nonce(items):
+    """
+    Menurunkan nonce kiriman gabungan dari nonce anggotanya, sehingga gabungan yang sama
+    selalu dikirim dengan nonce yang sama.
+    
+    Args:
+        items (list): Item dalam kiriman gabungan.
+    
+    Returns:
+        str: Nonce berupa angka (maksimal 19 digit).
+    """
+    digest = hashlib.sha1(",".join(queued["nonce"] for queued in items).encode()).hexdigest()
+    return str(int(digest, 16) % 10 ** 19)
+
+async def send_message_to_discord_thread(message, media_path=None, category="UNFILTERED", chat_id=None, media_bytes=None, source_time=None):
     """
     Menambahkan pesan ke antrian untuk dikirim ke thread Discord.
     
     Args:
         message (str): Pesan yang akan dikirim.
-        media_path (str, optional): Path lokal ke file media (misalnya, gambar) untuk diunggah.
+        media_path (str, optional): Path lokal ke file media (misalnya, gambar besar) untuk diunggah.
+        media_bytes (bytes, optional): Isi gambar di memori, diunggah langsung tanpa file sementara.
+        category (str): Kategori pesan untuk prioritas antrian (VIP, SUMMARY, FILTERED, IMAGE, UNFILTERED).
+        chat_id (int, optional): ID channel sumber, untuk giliran yang adil antar channel.
+        source_time (float, optional): Waktu terbit pesan di sumber (epoch detik), untuk batas umur per kategori.
     """
-    await message_queue.put((message, media_path))
-    logger.info(f"Pesan ditambahkan ke antrian utama: {message[:50]}...")
+    sink = "webhook" if uses_webhook(category) else shard_for(category, chat_id).name
+    item = {
+        "message": message,
+        "media_path": media_path,
+        "media_bytes": media_bytes,
+        "category": category,
+        "chat_id": chat_id,
+        "sink": sink,
+        "source_time": source_time or time.time(),
+        "nonce": make_nonce(),
+        "attempts": 0
+    }
+    prediction = block_predictor.predict(message) if DISCORD_BLOCK_PREDICTOR else None
+    if prediction is not None:
+        # Pesan yang hampir pasti diblokir Discord langsung masuk dead-letter tanpa memakai slot rate limit
+        feature, confidence = prediction
+        reason = f"Diprediksi diblokir Discord: '{feature}' (keyakinan {confidence:.0%})"
+        logger.warning(f"{reason}, pesan tidak dikirim: {message[:50]}...")
+        dead_letter_id = dead_letters.add(item, reason)
+        release_media(item, delete_file=dead_letter_id is None)
+        await failed_message_queue.put((message, f"{reason}. Tersimpan di dead-letter #{dead_letter_id}" if dead_letter_id else reason))
+        return
+    if DISCORD_IMAGE_PROCESSING and has_media(item):
+        await process_item_media(item)
+    await queue_for(item).put(item)
+    logger.info(f"Pesan ditambahkan ke antrian {sink}: {message[:50]}...")
 
-async def validate_thread_access(session, headers):
+async def validate_thread_access(session, shard):
     """
-    Memeriksa apakah bot memiliki akses ke thread Discord.
+    Memeriksa apakah token shard memiliki akses ke thread Discord-nya.
+    
+    Args:
+        session: Sesi aiohttp.
+        shard (DiscordShard): Shard yang diperiksa.
     
     Returns:
         bool: True jika akses valid, False jika tidak.
     """
-    url = f"https://discord.com/api/v10/channels/{DISCORD_THREAD_ID}"
+    url = f"{DISCORD_API_BASE}/channels/{shard.thread_id}"
     try:
-        async with session.get(url, headers=headers, timeout=5) as response:
+        async with session.get(url, headers=shard.headers, timeout=5) as response:
             if response.status == 200:
-                logger.info(f"Thread Discord {DISCORD_THREAD_ID} dapat diakses.")
+                logger.info(f"Thread Discord {shard.thread_id} dapat diakses (shard {shard.name}).")
                 return True
             else:
-                logger.error(f"Gagal mengakses thread Discord {DISCORD_THREAD_ID}: {response.status} - {await response.text()}")
+                logger.error(f"Gagal mengakses thread Discord {shard.thread_id} (shard {shard.name}): {response.status} - {await response.text()}")
                 return False
     except Exception as e:
-        logger.error(f"Error saat memvalidasi thread Discord {DISCORD_THREAD_ID}: {str(e)}")
+        logger.error(f"Error saat memvalidasi thread Discord {shard.thread_id} (shard {shard.name}): {str(e)}")
         return False
 
-async def handle_failed_message(message, media_path=None, retry_count=0, max_retries=3, reason="Tidak diketahui"):
+def release_media(item, delete_file=True):
     """
-    Menangani pesan yang gagal dengan delay dan retry.
+    Melepas buffer gambar dan menghapus file media sementara milik item setelah pesan selesai
+    (berhasil atau gagal permanen).
     
     Args:
-        message (str): Pesan yang gagal.
-        media_path (str, optional): Path file media yang gagal.
-        retry_count (int): Jumlah percobaan saat ini.
-        max_retries (int): Maksimum percobaan ulang.
+        item (dict): Item antrian Discord.
+        delete_file (bool): Hapus file media; False jika file masih dirujuk dead-letter.
+    """
+    item.pop("media_bytes", None)
+    media_path = item.get("media_path")
+    if delete_file and media_path and os.path.exists(media_path):
+        try:
+            os.remove(media_path)
+            logger.info(f"File sementara dihapus: {media_path}")
+        except Exception as e:
+            logger.error(f"Gagal menghapus file sementara {media_path}: {str(e)}")
+
+def item_deadline(item):
+    """
+    Menghitung batas waktu kirim item dari waktu terbit sumber dan TTL kategorinya.
+    
+    Args:
+        item (dict): Item antrian Discord.
+    
+    Returns:
+        float: Batas waktu (epoch detik), atau None jika kategori tidak dibatasi umurnya.
+    """
+    ttl = DISCORD_CATEGORY_TTL.get(item.get("category"))
+    if ttl is None or item.get("source_time") is None:
+        return None
+    return item["source_time"] + ttl
+
+def drop_expired(item, queue):
+    """
+    Membuang item kedaluwarsa dari outbox tanpa mengirimnya dan mencatatnya per kategori.
+    
+    Args:
+        item (dict): Item yang kedaluwarsa.
+        queue (DiscordOutbox): Outbox asal item.
+    """
+    category = item.get("category", "UNFILTERED")
+    expired_stats.setdefault(category, {"dropped": 0, "delayed": 0})["dropped"] += 1
+    late_minutes = (time.time() - item["source_time"]) / 60
+    logger.warning(f"Pesan {category} dibuang karena sudah {late_minutes:.1f} menit sejak terbit: {item['message'][:50]}...")
+    release_media(item)
+    queue.ack(item)
+
+def send_deadline(items):
+    """
+    Batas waktu kirim paling awal dari item yang belum ditandai terlambat.
+    
+    Args:
+        items (list): Item yang akan dikirim dalam satu permintaan.
+    
+    Returns:
+        float: Batas waktu (epoch detik), atau None jika tidak ada item yang dibatasi umurnya.
+    """
+    deadlines = [item_deadline(queued) for queued in items if not queued.get("delayed")]
+    deadlines = [deadline for deadline in deadlines if deadline is not None]
+    return min(deadlines) if deadlines else None
+
+def filter_expired(items, queue):
+    """
+    Memeriksa batas umur item sebelum dikirim. Sesuai DISCORD_EXPIRED_ACTION, item kedaluwarsa
+    dibuang ("drop") atau tetap dikirim dengan penanda terlambat ("flag").
+    
+    Args:
+        items (list): Item yang akan dikirim dalam satu permintaan.
+        queue (DiscordOutbox): Outbox asal item.
+    
+    Returns:
+        list: Item yang tetap dikirim.
+    """
+    live = []
+    now = time.time()
+    for queued in items:
+        deadline = item_deadline(queued)
+        if deadline is None or now < deadline:
+            live.append(queued)
+        elif DISCORD_EXPIRED_ACTION == "flag":
+            if not queued.get("delayed"):
+                queued["delayed"] = True
+                flag = late_flag((now - queued["source_time"]) / 60)
+                queued["message"] = flag + queued["message"]
+                if queued.get("parts"):
+                    queued["parts"][0] = flag + queued["parts"][0]
+                expired_stats.setdefault(queued.get("category", "UNFILTERED"), {"dropped": 0, "delayed": 0})["delayed"] += 1
+            live.append(queued)
+        else:
+            drop_expired(queued, queue)
+    return live
+
+async def handle_failed_message(item, reason="Tidak diketahui", max_retries=DISCORD_MAX_RETRIES):
+    """
+    Menjadwalkan retry untuk pesan yang gagal tanpa memblokir pekerja Discord.
+    Jeda retry bertambah eksponensial dengan jitter; setelah max_retries pesan dianggap gagal permanen.
+    
+    Args:
+        item (dict): Item antrian Discord yang gagal.
         reason (str): Alasan kegagalan.
+        max_retries (int): Maksimum percobaan ulang.
     """
-    if retry_count >= max_retries:
+    message = item["message"]
+    item["attempts"] += 1
+    item["last_error"] = reason
+    item.setdefault("history", []).append({"at": time.time(), "error": reason})
+    if item["attempts"] > max_retries:
         suspected_keywords = guess_blocked_keywords(message)
         full_reason = f"Gagal permanen: {reason}. Keyword yang mungkin diblokir: {', '.join(suspected_keywords) if suspected_keywords else 'Tidak diketahui'}"
         logger.critical(f"Pesan gagal setelah {max_retries} percobaan: {message[:50]}... ({full_reason})")
-        await failed_message_queue.put((message, full_reason))
+        # Simpan ke dead-letter sebelum dihapus dari outbox agar pesan dan lampirannya dapat di-redrive
+        dead_letter_id = dead_letters.add(item, full_reason)
+        release_media(item, delete_file=dead_letter_id is None)
+        queue_for(item).ack(item)
+        await failed_message_queue.put((message, f"{full_reason}. Tersimpan di dead-letter #{dead_letter_id}" if dead_letter_id else full_reason))
+        return
+
+    backoff = min(DISCORD_RETRY_MAX_DELAY, DISCORD_RETRY_BASE_DELAY * 2 ** (item["attempts"] - 1))
+    delay = random.uniform(backoff / 2, backoff)
+    deadline = item_deadline(item)
+    if DISCORD_EXPIRED_ACTION == "drop" and deadline is not None and time.time() + delay >= deadline:
+        # Retry baru akan jatuh tempo setelah batas umur pesan; buang sekarang daripada menahannya di heap
+        drop_expired(item, queue_for(item))
         return
+    queue_for(item).save(item)
+    # Buffer gambar sudah tersimpan di outbox; lepaskan dari memori selama menunggu retry
+    item.pop("media_bytes", None)
+    heapq.heappush(retry_heap, (time.monotonic() + delay, next(_retry_sequence), item))
+    retry_wakeup.set()
+    logger.info(f"Pesan gagal, retry ke-{item['attempts']} dijadwalkan dalam {delay:.2f} detik: {message[:50]}...")
 
-    delay = random.uniform(60, 300)
-    logger.info(f"Pesan gagal, menunggu {delay:.2f} detik sebelum retry ke-{retry_count + 1}: {message[:50]}...")
-    await asyncio.sleep(delay)
+async def redrive_dead_letters(filter_text):
+    """
+    Memasukkan kembali entri dead-letter ke antrian pengiriman biasa (dengan rate limit), lalu
+    menghapusnya dari dead-letter. Rute dihitung ulang dari konfigurasi saat ini sehingga perbaikan
+    token, izin, atau shard langsung berlaku. Batas umur pesan dihitung dari waktu redrive.
+    
+    Args:
+        filter_text (str): Filter entri: 'all', daftar ID ('#3,#7'), kategori, atau potongan alasan.
     
-    await message_queue.put((message, media_path))
-    logger.info(f"Pesan ditambahkan kembali ke antrian utama untuk retry: {message[:50]}...")
+    Returns:
+        int: Jumlah pesan yang dimasukkan kembali.
+    """
+    entries = dead_letters.load(filter_text)
+    for dead_letter_id, item in entries:
+        media_path = item.get("media_path")
+        if media_path and not os.path.exists(media_path):
+            logger.warning(f"File media dead-letter #{dead_letter_id} sudah tidak ada, pesan dikirim tanpa lampiran.")
+            item["media_path"] = None
+        category = item.get("category", "UNFILTERED")
+        item.pop("outbox_id", None)
+        item.pop("has_media_bytes", None)
+        item.update({
+            "sink": "webhook" if uses_webhook(category) else shard_for(category, item.get("chat_id")).name,
+            "attempts": 0,
+            "source_time": time.time(),
+            "redriven_from": dead_letter_id,
+        })
+        await queue_for(item).put(item)
+        dead_letters.delete([dead_letter_id])
+    if entries:
+        logger.info(f"{len(entries)} pesan dead-letter dimasukkan kembali ke antrian (filter: {filter_text}).")
+    return len(entries)
+
+async def retry_scheduler():
+    """
+    Pekerja yang mengembalikan pesan dari heap retry ke antrian utama saat waktunya tiba.
+    """
+    while True:
+        retry_wakeup.clear()
+        now = time.monotonic()
+        while retry_heap and retry_heap[0][0] <= now:
+            _, _, item = heapq.heappop(retry_heap)
+            await queue_for(item).put(item)
+            logger.info(f"Pesan ditambahkan kembali ke antrian untuk retry ke-{item['attempts']}: {item['message'][:50]}...")
+
+        timeout = retry_heap[0][0] - now if retry_heap else None
+        try:
+            await asyncio.wait_for(retry_wakeup.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+
+def coalesce_backlog(item, queue):
+    """
+    Saat antrian menumpuk (kedalaman atau umur item tertua melewati ambang), menggabungkan pesan teks
+    berikutnya dari lane kategori yang sama ke dalam satu kiriman selama masih muat 2000 karakter,
+    termasuk ruang untuk penanda terlambat yang mungkin ditambahkan filter_expired setelahnya.
+    Saat antrian sepi, pesan tetap dikirim satu per satu.
+    
+    Args:
+        item (dict): Item yang baru diambil dari antrian.
+        queue (DiscordOutbox): Outbox asal item.
+    
+    Returns:
+        list: Daftar item yang dikirim bersama (minimal berisi item itu sendiri).
+    """
+    items = [item]
+    # Pesan yang sedang di-retry dikirim sendiri agar satu pesan bermasalah tidak menggagalkan pesan lain berulang kali
+    if not DISCORD_COALESCE or has_media(item) or item["attempts"]:
+        return items
+    oldest_age = queue.oldest_age()
+    if queue.qsize() < DISCORD_COALESCE_DEPTH and (oldest_age is None or oldest_age < DISCORD_COALESCE_AGE):
+        return items
+
+    length = len(item["message"]) + late_flag_reserve(item)
+    while True:
+        next_item = queue.peek()
+        if next_item is None or has_media(next_item) or next_item["attempts"] or next_item.get("category") != item.get("category"):
+            break
+        next_length = 1 + len(next_item["message"]) + late_flag_reserve(next_item)
+        if length + next_length > 2000:
+            break
+        items.append(queue.get_nowait())
+        length += next_length
+    if len(items) > 1:
+        coalesce_stats["posts"] += 1
+        coalesce_stats["messages"] += len(items)
+        logger.info(f"Antrian menumpuk ({queue.qsize()} tertunda), {len(items)} pesan digabung menjadi satu kiriman.")
+    return items
 
-async def discord_worker():
+async def post_to_discord(session, shard, payload, media_path=None, media_bytes=None, media_processed=False, deadline=None):
     """
-    Pekerja yang mengambil pesan dari antrian dan mengirimkannya ke thread Discord.
+    Mengirim satu permintaan ke thread Discord milik shard setelah mendapat slot dari rate limiter shard.
+    
+    Args:
+        session: Sesi aiohttp.
+        shard (DiscordShard): Shard pengirim (token, thread, dan rate limiter).
+        payload (dict): Payload pesan.
+        media_path (str, optional): Path file gambar yang akan diunggah (dialirkan dari disk).
+        media_bytes (bytes, optional): Isi gambar di memori yang akan diunggah.
+        media_processed (bool): True jika gambar sudah dikompresi ulang, untuk statistik unggah.
+        deadline (float, optional): Batas waktu kirim (epoch detik), diperiksa ulang tepat sebelum permintaan dikirim.
+    
+    Returns:
+        tuple: (status HTTP, teks respons); status None jika deadline terlewati sebelum permintaan dikirim.
     """
-    if not DISCORD_AUTH_TOKEN or not DISCORD_THREAD_ID:
-        logger.critical("DISCORD_AUTH_TOKEN atau DISCORD_THREAD_ID tidak valid atau kosong.")
-        await failed_message_queue.put(("", "Startup gagal: DISCORD_AUTH_TOKEN atau DISCORD_THREAD_ID kosong."))
+    await shard.rate_limiter.acquire(shard.route)
+    media_file = None
+    try:
+        if media_bytes is not None or (media_path and os.path.exists(media_path)):
+            form = aiohttp.FormData()
+            form.add_field("payload_json", json.dumps(payload))
+            media_file = add_media_field(form, "file", media_path, media_bytes)
+            request_kwargs = {"data": form}
+        else:
+            request_kwargs = {"json": payload}
+
+        if deadline is not None and time.time() >= deadline:
+            # Pesan kedaluwarsa selama menunggu rate limit; jangan kirim dan biarkan pemanggil memutuskan
+            return None, "Batas umur pesan terlewati sebelum dikirim"
+        started = time.monotonic()
+        async with session.post(shard.url, headers=shard.headers, timeout=aiohttp.ClientTimeout(total=30), **request_kwargs) as response:
+            response_text = await response.text()
+            shard.rate_limiter.update(shard.route, response.status, response.headers)
+            if "data" in request_kwargs and response.status == 200:
+                record_upload(media_path, media_bytes, time.monotonic() - started, media_processed)
+            logger.info(f"Discord response ({shard.name}): {response.status} - {response_text}")
+            return response.status, response_text
+    finally:
+        if media_file is not None:
+            media_file.close()
+
+def is_blocked_response(status, response_text):
+    """Memeriksa apakah respons Discord berarti pesan diblokir (misalnya oleh AutoMod)."""
+    return status == 400 and "blocked" in response_text.lower()
+
+async def fail_items(items, reason, blocked=False, ambiguous=False):
+    """
+    Meneruskan item dari satu kiriman yang gagal ke penanganan retry. Jika satu pesan ditolak
+    karena diblokir, isinya dipelajari prediktor blokir dan pesan langsung masuk dead-letter,
+    karena mengirim ulang konten yang sama akan diblokir lagi. Kiriman gabungan yang pasti ditolak
+    (misalnya diblokir) di-retry per pesan sehingga pesan penyebabnya dapat dikenali. Jika hasilnya
+    tidak pasti (exception atau 5xx), kiriman mungkin sudah diposting: anggotanya dilebur menjadi
+    satu item dengan teks dan nonce gabungan yang sama agar retry tidak memposting pesan dua kali.
+    Teks tiap anggota disimpan di 'parts' sehingga kiriman webhook di-retry dengan embed yang sama.
+    
+    Args:
+        items (list): Item dalam kiriman yang gagal.
+        reason (str): Alasan kegagalan.
+        blocked (bool): True jika Discord menolak kiriman karena diblokir.
+        ambiguous (bool): True jika tidak pasti apakah Discord sudah memposting kiriman.
+    """
+    if ambiguous and len(items) > 1:
+        item = items[0]
+        nonce = merged_nonce(items)
+        item["parts"] = [queued["message"] for queued in items]
+        item["message"] = "\n".join(item["parts"])
+        item["nonce"] = nonce
+        for queued in items[1:]:
+            queue_for(queued).ack(queued)
+        logger.info(f"Kiriman gabungan {len(items)} pesan gagal tanpa kepastian, di-retry utuh dengan nonce {nonce}.")
+        await handle_failed_message(item, reason=reason)
         return
+    if blocked and len(items) == 1:
+        block_predictor.record_blocked(items[0]["message"])
+        await handle_failed_message(items[0], reason=reason, max_retries=0)
+        return
+    for queued in items:
+        await handle_failed_message(queued, reason=reason)
+
+def describe_failure(status, response_text, message, destination="webhook"):
+    """
+    Menerjemahkan respons gagal dari Discord menjadi alasan kegagalan yang dicatat dan dikirim ke admin.
+    
+    Args:
+        status (int): Status HTTP respons.
+        response_text (str): Isi respons.
+        message (str): Pesan yang dikirim, untuk log.
+        destination (str): Tujuan pengiriman untuk pesan error, misalnya "thread 123".
+    
+    Returns:
+        str: Alasan kegagalan.
+    """
+    if status == 401:
+        reason = f"Unauthorized: Bot tidak diizinkan mengakses {destination}"
+        logger.error(f"{reason}: {response_text}")
+    elif status == 404:
+        reason = f"Tidak ditemukan: thread atau webhook Discord tidak ada - {response_text}"
+        logger.error(reason)
+    elif status == 429:
+        reason = f"Rate limit Discord masih berlaku setelah {MAX_RATE_LIMIT_RETRIES} percobaan"
+        logger.warning(reason)
+    elif is_blocked_response(status, response_text):
+        reason = "Pesan diblokir oleh server"
+        logger.warning(f"Pesan diblokir oleh server Discord: {message[:50]}...")
+    else:
+        reason = f"Error API: {status} - {response_text}"
+        logger.critical(f"Gagal mengirim pesan ke Discord: {reason}")
+    return reason
 
-    url = f"https://discord.com/api/v10/channels/{DISCORD_THREAD_ID}/messages"
-    headers = {
-        "Authorization": DISCORD_AUTH_TOKEN,
-        "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/135.0.0.0 Safari/537.36",
+async def move_to_shard(item, source, target):
+    """
+    Memindahkan item dari outbox shard asal ke outbox shard lain, beserta lampirannya.
+    
+    Args:
+        item (dict): Item yang sudah diambil dari outbox shard asal.
+        source (DiscordShard): Shard asal.
+        target (DiscordShard): Shard tujuan.
+    """
+    # Item baru dimasukkan ke outbox tujuan sebelum dihapus dari outbox asal agar tidak hilang di tengah jalan
+    outbox_id = item.pop("outbox_id", None)
+    item.pop("has_media_bytes", None)
+    item.pop("_media_stored", None)
+    item["sink"] = target.name
+    await target.queue.put(item)
+    source.queue.ack({"outbox_id": outbox_id})
+
+async def evacuate_shard(shard):
+    """
+    Memindahkan pesan tertunda dari shard yang tidak sehat ke shard sehat sesuai shard_for. Jika tidak
+    ada shard sehat lain, pesan tetap tersimpan di outbox shard dan dikirim setelah shard pulih.
+    
+    Args:
+        shard (DiscordShard): Shard yang tidak sehat.
+    
+    Returns:
+        int: Jumlah pesan yang dipindahkan.
+    """
+    moved = 0
+    while True:
+        item = shard.queue.peek()
+        if item is None:
+            break
+        target = shard_for(item.get("category", "UNFILTERED"), item.get("chat_id"))
+        if target is shard:
+            break
+        await move_to_shard(shard.queue.get_nowait(), shard, target)
+        moved += 1
+    if moved:
+        logger.warning(f"{moved} pesan tertunda dipindahkan dari shard {shard.name} yang tidak sehat ke shard lain.")
+    return moved
+
+def build_discord_payload(items):
+    """
+    Menyusun teks dan payload API untuk satu kiriman (satu pesan atau gabungan).
+    
+    Args:
+        items (list): Item yang dikirim bersama.
+    
+    Returns:
+        tuple: (teks pesan, payload JSON).
+    """
+    message = "\n".join(queued["message"] for queued in items) if len(items) > 1 else items[0]["message"]
+    payload = {
+        # Pesan gabungan tidak pernah dipotong karena semua anggotanya di-ack setelah terkirim;
+        # coalesce_backlog sudah menyisihkan ruang untuk penanda terlambat
+        "content": message if len(items) > 1 else message[:2000],
+        # Nonce pesan gabungan diturunkan dari nonce anggotanya sehingga stabil selama retry
+        "nonce": items[0]["nonce"] if len(items) == 1 else merged_nonce(items),
+        "enforce_nonce": True,
+        "tts": False,
+        "flags": 0
     }
+    return message, payload
+
+async def discord_worker(shard=default_shard):
+    """
+    Pekerja yang mengambil pesan dari antrian shard dan mengirimkannya ke thread Discord shard tersebut.
+    Kecepatan kirim hanya dibatasi oleh rate limit yang dilaporkan Discord lewat header.
+    Shard yang tidak dapat mengakses thread-nya (saat startup atau karena 401) ditandai tidak sehat:
+    pesan barunya dialihkan shard_for, pesan tertundanya dipindahkan ke shard sehat, dan aksesnya
+    divalidasi ulang setiap DISCORD_SHARD_RECHECK_INTERVAL detik sampai pulih.
+    
+    Args:
+        shard (DiscordShard): Shard yang dilayani pekerja ini.
+    """
+    if not shard.token or not shard.thread_id:
+        logger.critical(f"Token atau thread ID shard Discord {shard.name} tidak valid atau kosong.")
+        await failed_message_queue.put(("", f"Startup gagal: token atau thread ID shard {shard.name} kosong."))
+        shard.healthy = False
+        await evacuate_shard(shard)
+        return
+
+    session = get_session("discord")
+    queue = shard.queue
+    validated = False
+    while True:
+        if not validated:
+            if await validate_thread_access(session, shard):
+                if not shard.healthy:
+                    logger.info(f"Shard {shard.name} kembali sehat, pengiriman ke thread {shard.thread_id} dilanjutkan.")
+                shard.healthy = True
+                validated = True
+                continue
+            if shard.healthy:
+                logger.critical(f"Shard {shard.name} tidak memiliki akses ke thread Discord {shard.thread_id}. Periksa izin bot atau konfigurasi shard.")
+                await failed_message_queue.put(("", f"Shard {shard.name} tidak memiliki akses ke thread Discord {shard.thread_id}; pesannya dialihkan ke shard lain."))
+            shard.healthy = False
+            # Pesan retry yang kembali ke outbox shard ini ikut dipindahkan pada pemeriksaan berikutnya
+            await evacuate_shard(shard)
+            await asyncio.sleep(DISCORD_SHARD_RECHECK_INTERVAL)
+            continue
+
+        item = await queue.get()
+        items = filter_expired(coalesce_backlog(item, queue), queue)
+        if not items:
+            queue.task_done()
+            continue
+        item = items[0]
+        message, payload = build_discord_payload(items)
+        media_path = item.get("media_path")
+        media_bytes = item.get("media_bytes")
+        logger.info(f"[{shard.name}] Mengambil pesan dari antrian: {message[:50]}... (media: {media_path or (f'{len(media_bytes)} byte di memori' if media_bytes is not None else None)}, percobaan: {item['attempts'] + 1}, digabung: {len(items)})")
+
+        try:
+            while True:
+                # Pada 429, rate limiter sudah mencatat waktu tunggu dari header; kirim ulang pesan yang sama agar urutan terjaga
+                for _ in range(MAX_RATE_LIMIT_RETRIES):
+                    status, response_text = await post_to_discord(session, shard, payload, media_path, media_bytes, item.get("media_processed", False), send_deadline(items))
+                    if status != 429:
+                        break
+                if status is not None:
+                    break
+                # Batas umur terlewati saat menunggu rate limit: item dibuang atau ditandai, sisanya dikirim
+                items = filter_expired(items, queue)
+                if not items:
+                    break
+                item = items[0]
+                message, payload = build_discord_payload(items)
+            if not items:
+                continue
+
+            if status == 401:
+                # Token ditolak: shard divalidasi ulang di awal loop, kiriman ini dan antriannya dipindahkan ke shard sehat
+                validated = False
+                shard.healthy = False
+                await failed_message_queue.put(("", f"Token shard {shard.name} ditolak Discord (401); pesannya dialihkan ke shard lain sampai akses pulih."))
+                for queued in items:
+                    target = shard_for(queued.get("category", "UNFILTERED"), queued.get("chat_id"))
+                    if target is not shard:
+                        await move_to_shard(queued, shard, target)
+                    else:
+                        await queue.put(queued)
+                continue
+            if status == 200:
+                logger.info(f"Pesan {'dengan lampiran ' if has_media(item) else ''}berhasil dikirim ke thread Discord {shard.thread_id} ({len(items)} pesan)")
+                shard.stats["sent"] += len(items)
+                for queued in items:
+                    block_predictor.record_delivered(queued["message"])
+                    release_media(queued)
+                    queue.ack(queued)
+                continue
+            reason = describe_failure(status, response_text, message, f"thread {shard.thread_id} (shard {shard.name})")
+            blocked = is_blocked_response(status, response_text)
+            ambiguous = status >= 500
+        except Exception as e:
+            reason = f"Exception: {str(e)}"
+            blocked = False
+            ambiguous = True
+            logger.critical(f"Exception saat mengirim pesan ke Discord (shard {shard.name}): {str(e)}")
+        finally:
+            queue.task_done()
+
+        shard.stats["failed"] += len(items)
+        await fail_items(items, reason, blocked, ambiguous)
+
+async def discord_webhook_worker():
+    """
+    Pekerja yang mengirim pesan dari antrian webhook ke thread Discord lewat webhook.
+    Pesan teks yang sudah menunggu dikemas hingga 10 embed per permintaan, dengan rate limiter
+    sendiri sehingga tidak bersaing dengan jalur token pengguna.
+    """
+    session = get_session("discord_webhook")
+    while True:
+        item = await webhook_queue.get()
+        items = filter_expired(pack_embeds(item), webhook_queue)
+        if not items:
+            continue
+        item = items[0]
+        payload = build_webhook_payload(items)
+        logger.info(f"Mengambil pesan dari antrian webhook: {item['message'][:50]}... (percobaan: {item['attempts'] + 1}, embed: {len(payload.get('embeds', []))})")
+
+        try:
+            while True:
+                for _ in range(MAX_RATE_LIMIT_RETRIES):
+                    status, response_text = await post_to_webhook(session, payload, item.get("media_path"), item.get("media_bytes"), item.get("media_processed", False), send_deadline(items))
+                    if status != 429:
+                        break
+                if status is not None:
+                    break
+                # Batas umur terlewati saat menunggu rate limit: item dibuang atau ditandai, sisanya dikirim
+                items = filter_expired(items, webhook_queue)
+                if not items:
+                    break
+                item = items[0]
+                payload = build_webhook_payload(items)
+            if not items:
+                continue
+
+            if status == 200:
+                logger.info(f"Pesan {'dengan lampiran ' if has_media(item) else ''}berhasil dikirim lewat webhook Discord ({len(items)} pesan)")
+                for queued in items:
+                    block_predictor.record_delivered(queued["message"])
+                    release_media(queued)
+                    webhook_queue.ack(queued)
+                continue
+            reason = describe_failure(status, response_text, item["message"])
+            blocked = is_blocked_response(status, response_text)
+            ambiguous = status >= 500
+        except Exception as e:
+            reason = f"Exception: {str(e)}"
+            blocked = False
+            ambiguous = True
+            logger.critical(f"Exception saat mengirim pesan ke webhook Discord: {str(e)}")
 
-    async with aiohttp.ClientSession() as session:
-        if not await validate_thread_access(session, headers):
-            logger.critical("Bot tidak memiliki akses ke thread Discord. Periksa izin bot atau thread ID di .env.")
-            await failed_message_queue.put(("", "Startup gagal: Bot tidak memiliki akses ke thread Discord."))
-            return
-
-        while True:
-            item = await message_queue.get()
-            message, media_path = item
-            logger.info(f"Mengambil pesan dari antrian: {message[:50]}... (media: {media_path})")
-
-            payload = {
-                "content": message[:2000],
-                "nonce": str(int(time.time() * 1000)),
-                "tts": False,
-                "flags": 0
-            }
-
-            logger.info("Menunggu 10 detik sebelum mengirim pesan ke Discord...")
-            await asyncio.sleep(10)
-            logger.info("Delay selesai, mengirim pesan ke Discord.")
-
-            try:
-                if media_path and os.path.exists(media_path):
-                    form = aiohttp.FormData()
-                    form.add_field("payload_json", json.dumps(payload))
-                    form.add_field("file", open(media_path, "rb"), filename=os.path.basename(media_path), content_type="image/jpeg")
-
-                    async with session.post(url, headers=headers, data=form, timeout=aiohttp.ClientTimeout(total=30)) as response:
-                        response_text = await response.text()
-                        logger.info(f"Discord response: {response.status} - {response_text}")
-                        if response.status == 200:
-                            logger.info(f"Pesan dengan lampiran berhasil dikirim ke thread Discord {DISCORD_THREAD_ID}")
-                        elif response.status == 401:
-                            reason = f"Unauthorized: Bot tidak diizinkan mengakses thread {DISCORD_THREAD_ID}"
-                            logger.error(f"{reason}: {response_text}")
-                            await handle_failed_message(message, media_path, retry_count=0, reason=reason)
-                        elif response.status == 429:
-                            retry_after = int(response.headers.get("Retry-After", 5))
-                            logger.warning(f"Rate limit tercapai. Menunggu {retry_after} detik...")
-                            await asyncio.sleep(retry_after)
-                            await message_queue.put((message, media_path))
-                        elif response.status == 400 and "blocked" in response_text.lower():
-                            logger.warning(f"Pesan diblokir oleh server Discord: {message[:50]}...")
-                            await handle_failed_message(message, media_path, retry_count=0, reason="Pesan diblokir oleh server")
-                        else:
-                            reason = f"Error API: {response.status} - {response_text}"
-                            logger.critical(f"Gagal mengirim pesan ke Discord: {reason}")
-                            await handle_failed_message(message, media_path, retry_count=0, reason=reason)
-                else:
-                    async with session.post(url, headers=headers, json=payload, timeout=aiohttp.ClientTimeout(total=30)) as response:
-                        response_text = await response.text()
-                        logger.info(f"Discord response: {response.status} - {response_text}")
-                        if response.status == 200:
-                            logger.info(f"Pesan berhasil dikirim ke thread Discord {DISCORD_THREAD_ID}")
-                        elif response.status == 401:
-                            reason = f"Unauthorized: Bot tidak diizinkan mengakses thread {DISCORD_THREAD_ID}"
-                            logger.error(f"{reason}: {response_text}")
-                            await handle_failed_message(message, retry_count=0, reason=reason)
-                        elif response.status == 429:
-                            retry_after = int(response.headers.get("Retry-After", 5))
-                            logger.warning(f"Rate limit tercapai. Menunggu {retry_after} detik...")
-                            await asyncio.sleep(retry_after)
-                            await message_queue.put((message, None))
-                        elif response.status == 400 and "blocked" in response_text.lower():
-                            logger.warning(f"Pesan diblokir oleh server Discord: {message[:50]}...")
-                            await handle_failed_message(message, retry_count=0, reason="Pesan diblokir oleh server")
-                        else:
-                            reason = f"Error API: {response.status} - {response_text}"
-                            logger.critical(f"Gagal mengirim pesan ke Discord: {reason}")
-                            await handle_failed_message(message, retry_count=0, reason=reason)
-            except Exception as e:
-                logger.critical(f"Exception saat mengirim pesan ke Discord: {str(e)}")
-                await handle_failed_message(message, media_path, retry_count=0, reason=f"Exception: {str(e)}")
-            finally:
-                if media_path and os.path.exists(media_path):
-                    try:
-                        os.remove(media_path)
-                        logger.info(f"File sementara dihapus: {media_path}")
-                    except Exception as e:
-                        logger.error(f"Gagal menghapus file sementara {media_path}: {str(e)}")
-                message_queue.task_done()
\ No newline at end of file
+        await fail_items(items, reason, blocked, ambiguous)
@@ -0,0 +1,134 @@
+# discord_webhook.py
+import json
+import os
+import re
+import time
+import aiohttp
+from config import DISCORD_WEBHOOK_URL, DISCORD_WEBHOOK_THREAD_ID, DISCORD_WEBHOOK_CATEGORIES, DISCORD_WEBHOOK_OUTBOX_PATH, logger
+from discord_ratelimit import DiscordRateLimiter
+from discord_outbox import DiscordOutbox, has_media, late_flag_reserve
+from media_processing import add_media_field, record_upload
+
+# Batas Discord untuk satu permintaan webhook
+MAX_EMBEDS = 10
+MAX_EMBED_DESCRIPTION = 4096
+MAX_EMBED_TOTAL_CHARS = 6000
+
+# Antrian dan rate limiter webhook terpisah dari jalur token pengguna sehingga keduanya tidak saling menahan
+webhook_queue = DiscordOutbox(DISCORD_WEBHOOK_OUTBOX_PATH)
+webhook_limiter = DiscordRateLimiter(name="webhook")
+
+# Jumlah permintaan webhook dan embed di dalamnya
+webhook_stats = {"posts": 0, "embeds": 0}
+
+def uses_webhook(category):
+    """
+    Memeriksa apakah kategori pesan dikirim lewat webhook.
+
+    Args:
+        category (str): Kategori pesan (VIP, SUMMARY, FILTERED, IMAGE, UNFILTERED).
+
+    Returns:
+        bool: True jika webhook dikonfigurasi dan kategori termasuk DISCORD_WEBHOOK_CATEGORIES.
+    """
+    return bool(DISCORD_WEBHOOK_URL) and category in DISCORD_WEBHOOK_CATEGORIES
+
+def webhook_route():
+    """Kunci route rate limit untuk webhook (tanpa token webhook)."""
+    match = re.search(r'/webhooks/(\d+)', DISCORD_WEBHOOK_URL or "")
+    return f"POST /webhooks/{match.group(1) if match else 'unknown'}"
+
+def pack_embeds(item):
+    """
+    Mengambil pesan teks berikutnya dari antrian webhook dan mengemasnya bersama item pertama
+    sebagai embed, maksimal 10 embed dan 6000 karakter per permintaan. Hanya pesan yang sudah
+    menunggu di antrian yang diambil; pengiriman tidak ditunda untuk menunggu pesan lain.
+
+    Args:
+        item (dict): Item yang baru diambil dari antrian webhook.
+
+    Returns:
+        list: Daftar item yang dikirim bersama (minimal berisi item itu sendiri).
+    """
+    items = [item]
+    # Pesan yang sedang di-retry dikirim sendiri agar satu pesan bermasalah tidak menggagalkan pesan lain berulang kali
+    if has_media(item) or item["attempts"]:
+        return items
+    # Ruang untuk penanda terlambat disisihkan karena filter_expired menandai item setelah dikemas
+    total = min(len(item["message"]) + late_flag_reserve(item), MAX_EMBED_DESCRIPTION)
+    while len(items) < MAX_EMBEDS:
+        next_item = webhook_queue.peek()
+        if next_item is None or has_media(next_item) or next_item["attempts"]:
+            break
+        length = min(len(next_item["message"]) + late_flag_reserve(next_item), MAX_EMBED_DESCRIPTION)
+        if total + length > MAX_EMBED_TOTAL_CHARS:
+            break
+        items.append(webhook_queue.get_nowait())
+        total += length
+    return items
+
+def build_webhook_payload(items):
+    """
+    Membuat payload webhook: pesan bergambar dikirim sebagai konten biasa, pesan teks sebagai embed.
+    Item hasil peleburan kiriman yang gagal tanpa kepastian membawa 'parts' dan dikirim ulang
+    sebagai embed yang sama seperti kiriman aslinya.
+
+    Args:
+        items (list): Item antrian yang dikirim dalam satu permintaan.
+
+    Returns:
+        dict: Payload JSON untuk webhook Discord.
+    """
+    if len(items) == 1 and has_media(items[0]):
+        return {"content": items[0]["message"][:2000]}
+    parts = [part for queued in items for part in (queued.get("parts") or [queued["message"]])]
+    return {"embeds": [{"description": part[:MAX_EMBED_DESCRIPTION]} for part in parts]}
+
+async def post_to_webhook(session, payload, media_path=None, media_bytes=None, media_processed=False, deadline=None):
+    """
+    Mengirim satu permintaan ke webhook Discord (ke thread DISCORD_WEBHOOK_THREAD_ID)
+    setelah mendapat slot dari rate limiter webhook.
+
+    Args:
+        session: Sesi aiohttp.
+        payload (dict): Payload webhook.
+        media_path (str, optional): Path file gambar yang akan diunggah.
+        media_bytes (bytes, optional): Isi gambar di memori yang akan diunggah.
+        media_processed (bool): True jika gambar sudah dikompresi ulang, untuk statistik unggah.
+        deadline (float, optional): Batas waktu kirim (epoch detik), diperiksa ulang tepat sebelum permintaan dikirim.
+
+    Returns:
+        tuple: (status HTTP, teks respons); status None jika deadline terlewati sebelum permintaan dikirim.
+    """
+    route = webhook_route()
+    params = {"wait": "true"}
+    if DISCORD_WEBHOOK_THREAD_ID:
+        params["thread_id"] = DISCORD_WEBHOOK_THREAD_ID
+    await webhook_limiter.acquire(route)
+    media_file = None
+    try:
+        if media_bytes is not None or (media_path and os.path.exists(media_path)):
+            form = aiohttp.FormData()
+            form.add_field("payload_json", json.dumps(payload))
+            media_file = add_media_field(form, "files[0]", media_path, media_bytes)
+            request_kwargs = {"data": form}
+        else:
+            request_kwargs = {"json": payload}
+
+        if deadline is not None and time.time() >= deadline:
+            # Pesan kedaluwarsa selama menunggu rate limit; jangan kirim dan biarkan pemanggil memutuskan
+            return None, "Batas umur pesan terlewati sebelum dikirim"
+        started = time.monotonic()
+        async with session.post(DISCORD_WEBHOOK_URL, params=params, timeout=aiohttp.ClientTimeout(total=30), **request_kwargs) as response:
+            response_text = await response.text()
+            webhook_limiter.update(route, response.status, response.headers)
+            if "data" in request_kwargs and response.status == 200:
+                record_upload(media_path, media_bytes, time.monotonic() - started, media_processed)
+            logger.info(f"Discord webhook response: {response.status} - {response_text[:200]}")
+            if response.status == 200:
+                webhook_stats["posts"] += 1
+                webhook_stats["embeds"] += len(payload.get("embeds", []))
+            return response.status, response_text
+    finally:
+        if media_file is not None:
+            media_file.close()
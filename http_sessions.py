@@ -0,0 +1,173 @@
+# http_sessions.py
+import asyncio
+import time
+from collections import deque
+from urllib.parse import urlsplit
+import aiohttp
+from config import HTTP_LIMIT_PER_HOST, HTTP_KEEPALIVE_TIMEOUT, HTTP_DNS_CACHE_TTL, HTTP_KEEPALIVE_INTERVAL, logger
+
+# Sesi aiohttp bersama yang hidup selama aplikasi berjalan, per nama (misalnya 'translation', 'discord')
+_sessions = {}
+
+class ConnectionStats:
+    """
+    Latensi permintaan (sampai header respons diterima) untuk satu sesi, dipisah antara permintaan
+    yang membuka koneksi baru (cold: DNS, TCP, TLS) dan yang memakai ulang koneksi (warm),
+    beserta waktu terakhir setiap host dipakai (koneksi keep-alive disimpan per host).
+    """
+
+    def __init__(self, window=500):
+        self.warm = deque(maxlen=window)
+        self.cold = deque(maxlen=window)
+        self.last_used = 0.0
+        self.host_last_used = {}
+        self.probes = 0
+        self.probe_failures = 0
+
+    def record(self, latency, cold, host=None):
+        (self.cold if cold else self.warm).append(latency)
+        self.touch(host)
+
+    def touch(self, host):
+        now = time.monotonic()
+        self.last_used = now
+        if host:
+            self.host_last_used[host] = now
+
+    @staticmethod
+    def _percentile(values, p):
+        if not values:
+            return None
+        ordered = sorted(values)
+        return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+    def to_dict(self):
+        return {
+            "warm_count": len(self.warm),
+            "warm_p50": self._percentile(self.warm, 0.5),
+            "warm_p95": self._percentile(self.warm, 0.95),
+            "cold_count": len(self.cold),
+            "cold_p50": self._percentile(self.cold, 0.5),
+            "cold_p95": self._percentile(self.cold, 0.95),
+            "probes": self.probes,
+            "probe_failures": self.probe_failures,
+        }
+
+connection_stats = {}
+
+def get_connection_stats(name):
+    """Mengambil (atau membuat) statistik koneksi untuk sesi bernama."""
+    stats = connection_stats.get(name)
+    if stats is None:
+        stats = ConnectionStats()
+        connection_stats[name] = stats
+    return stats
+
+def _make_trace_config(name):
+    # Probe keep-alive ditandai lewat trace_request_ctx agar tidak tercampur dengan latensi lalu lintas nyata
+    async def on_request_start(session, context, params):
+        context.start = time.monotonic()
+        context.cold = False
+
+    async def on_connection_create_start(session, context, params):
+        context.cold = True
+
+    async def on_request_end(session, context, params):
+        if isinstance(context.trace_request_ctx, dict) and context.trace_request_ctx.get("probe"):
+            return
+        get_connection_stats(name).record(time.monotonic() - context.start, context.cold, params.url.host)
+
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_request_start.append(on_request_start)
+    trace_config.on_connection_create_start.append(on_connection_create_start)
+    trace_config.on_request_end.append(on_request_end)
+    return trace_config
+
+def get_session(name):
+    """
+    Mengambil sesi HTTP bersama berdasarkan nama, membuatnya jika belum ada.
+    Koneksi dipakai ulang (keep-alive) dan hasil DNS di-cache sehingga tiap permintaan tidak membayar DNS dan TLS lagi.
+
+    Args:
+        name (str): Nama sesi.
+
+    Returns:
+        aiohttp.ClientSession: Sesi yang siap dipakai.
+    """
+    session = _sessions.get(name)
+    if session is None or session.closed:
+        connector = aiohttp.TCPConnector(
+            limit_per_host=HTTP_LIMIT_PER_HOST,
+            keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT,
+            ttl_dns_cache=HTTP_DNS_CACHE_TTL,
+            use_dns_cache=True
+        )
+        session = aiohttp.ClientSession(connector=connector, trace_configs=[_make_trace_config(name)])
+        _sessions[name] = session
+        logger.info(f"Sesi HTTP '{name}' dibuat (limit per host: {HTTP_LIMIT_PER_HOST}).")
+    return session
+
+async def warm_connections(name, urls):
+    """
+    Membuka (atau menyegarkan) koneksi sesi ke setiap host dengan permintaan HEAD ringan,
+    sehingga permintaan nyata berikutnya tidak membayar DNS, TCP, dan TLS.
+    Status respons tidak penting; yang dibutuhkan hanya koneksi yang terbuka.
+
+    Args:
+        name (str): Nama sesi.
+        urls (list): URL per host yang akan dihangatkan.
+    """
+    session = get_session(name)
+    stats = get_connection_stats(name)
+
+    async def probe(url):
+        stats.probes += 1
+        try:
+            async with session.head(url, allow_redirects=False, timeout=aiohttp.ClientTimeout(total=10), trace_request_ctx={"probe": True}):
+                pass
+        except Exception as e:
+            stats.probe_failures += 1
+            logger.warning(f"Gagal menghangatkan koneksi '{name}' ke {url.split('?')[0]}: {str(e)}")
+        stats.touch(urlsplit(url).hostname)
+
+    await asyncio.gather(*(probe(url) for url in urls))
+
+async def keepalive_worker(name, urls, interval=HTTP_KEEPALIVE_INTERVAL):
+    """
+    Menghangatkan koneksi sesi saat startup, lalu mengirim probe keep-alive ke setiap host yang
+    menganggur selama interval, agar pesan pertama setelah masa sepi memakai koneksi yang sudah terbuka.
+    Waktu menganggur dihitung per host, sehingga host yang sepi tetap di-probe walaupun host lain
+    di sesi yang sama ramai.
+
+    Args:
+        name (str): Nama sesi.
+        urls (list): URL per host yang dijaga tetap hangat.
+        interval (float): Lama menganggur (detik) sebelum probe dikirim.
+    """
+    if not urls:
+        return
+    await warm_connections(name, urls)
+    logger.info(f"Koneksi '{name}' dihangatkan ke {len(urls)} host.")
+    stats = get_connection_stats(name)
+    hosts = {urlsplit(url).hostname: url for url in urls}
+    while True:
+        now = time.monotonic()
+        idle_urls = [url for host, url in hosts.items() if now - stats.host_last_used.get(host, 0.0) >= interval]
+        if idle_urls:
+            await warm_connections(name, idle_urls)
+            continue
+        next_due = min(stats.host_last_used.get(host, 0.0) for host in hosts) + interval
+        await asyncio.sleep(max(0.0, next_due - now))
+
+async def close_sessions():
+    """
+    Menutup semua sesi HTTP bersama dengan aman.
+    """
+    for name, session in list(_sessions.items()):
+        try:
+            if not session.closed:
+                await session.close()
+            logger.info(f"Sesi HTTP '{name}' ditutup.")
+        except Exception as e:
+            logger.error(f"Gagal menutup sesi HTTP '{name}': {str(e)}")
+    _sessions.clear()
@@ -0,0 +1,142 @@
+# language_detect.py
+import asyncio
+import re
+from functools import lru_cache
+from langdetect import DetectorFactory, detect
+
+# Hasil langdetect deterministik
+DetectorFactory.seed = 0
+
+URL_PATTERN = re.compile(r'https?://\S+|www\.\S+|\b[\w-]+\.(?:com|io|xyz|org|net|finance|app|gg|co)\b\S*', re.IGNORECASE)
+USERNAME_PATTERN = re.compile(r'@[a-zA-Z0-9_]+')
+WALLET_PATTERN = re.compile(r'\b0x[a-fA-F0-9]{40}\b|\b[1-9A-HJ-NP-Za-km-z]{32,44}\b')
+CASHTAG_PATTERN = re.compile(r'[$#][A-Za-z][A-Za-z0-9]{0,14}\b')
+PAIR_PATTERN = re.compile(r'\b[A-Z0-9]{2,10}[/-](?:USDT|USDC|USD|BTC|ETH|IDR|KRW)\b')
+NUMBER_PATTERN = re.compile(r'[-+]?[$€£¥]?\d[\d.,:]*\s*[%kKmMbBxX]?')
+WORD_PATTERN = re.compile(r'[^\W\d_]+')
+
+INDONESIAN_STOPWORDS = frozenset("""
+yang dan di ke dari untuk dengan ini itu pada adalah dalam tidak akan juga atau sudah telah
+oleh karena bisa dapat kami kita mereka saya anda sebagai lebih masih belum hanya setelah saat
+secara menjadi tersebut bahwa jika ada tak para bagi namun serta agar sangat baru
+""".split())
+
+ENGLISH_STOPWORDS = frozenset("""
+the and of to in for on with is are was were be been this that it as at by from or not will
+has have had but its their they we you he she said after over new into than more about up
+""".split())
+
+# Kata Inggris umum di judul berita; kata huruf besar pendek yang ada di sini bukan ticker ("FED HOLDS RATES")
+COMMON_ENGLISH_WORDS = frozenset("""
+us fed cut cuts hike hikes hold holds rate rates raise raises keep keeps pause pauses halt halts
+jobs job data sales price prices oil gold bank banks stock stocks bond bonds deal deals talks talk
+war ban bans tax taxes law laws bill vote votes rule rules plan plans probe sue sues fine fines
+hack hacks hit hits fall falls rise rises jump jumps drop drops surge soar soars sink sinks dip dips
+high low highs lows top big new old end ends set sets buy buys sell sells sold list lists file files
+says say warn warns see sees call calls beat beats miss misses win wins lose loses lost leak leaks
+back live just now today week year month day first last next open close gains gain loss losses
+news alert update breaking report trade trump china japan korea india peace fire crash
+""".split())
+
+# Jumlah pesan per jalur deteksi, untuk memantau seberapa sering fallback langdetect dipakai
+detection_stats = {"not_translatable": 0, "heuristic": 0, "fallback": 0}
+
+def strip_untranslatable(text):
+    """
+    Menghapus bagian teks yang tidak perlu diterjemahkan: URL, username, alamat wallet, cashtag, pasangan ticker, dan angka.
+
+    Args:
+        text (str): Teks asli.
+
+    Returns:
+        str: Sisa teks yang berisi kata-kata biasa.
+    """
+    for pattern in (URL_PATTERN, USERNAME_PATTERN, WALLET_PATTERN, PAIR_PATTERN, CASHTAG_PATTERN, NUMBER_PATTERN):
+        text = pattern.sub(' ', text)
+    return text
+
+def looks_like_ticker(word):
+    """
+    Memeriksa apakah kata menyerupai ticker: 1-5 huruf besar dan bukan stopword atau kata Inggris umum.
+
+    Args:
+        word (str): Kata tanpa angka dan tanda baca (cashtag '$' sudah dibuang strip_untranslatable).
+
+    Returns:
+        bool: True jika kata kemungkinan ticker.
+    """
+    if not (word.isupper() and len(word) <= 5):
+        return False
+    lowered = word.lower()
+    return lowered not in ENGLISH_STOPWORDS and lowered not in COMMON_ENGLISH_WORDS
+
+def is_translatable(text):
+    """
+    Memeriksa apakah teks berisi kata-kata yang layak diterjemahkan, bukan hanya ticker, angka, URL, wallet, atau username.
+    Judul berita huruf besar (misalnya "FED HOLDS RATES") tetap diterjemahkan.
+
+    Args:
+        text (str): Teks yang akan diperiksa.
+
+    Returns:
+        bool: False jika teks tidak perlu diterjemahkan.
+    """
+    if not text:
+        return False
+    words = WORD_PATTERN.findall(strip_untranslatable(text))
+    # Teks yang seluruh katanya menyerupai ticker (misalnya "BTC ETH SOL") tidak diterjemahkan
+    regular_words = [word for word in words if not looks_like_ticker(word)]
+    if regular_words:
+        return True
+    return len(words) > 3
+
+def guess_language(text):
+    """
+    Menebak bahasa dengan heuristik stopword untuk Indonesia dan Inggris.
+
+    Args:
+        text (str): Teks yang akan diperiksa.
+
+    Returns:
+        str: 'id', 'en', atau None jika hasilnya ambigu.
+    """
+    words = [word.lower() for word in WORD_PATTERN.findall(strip_untranslatable(text))]
+    if not words:
+        return None
+    # Teks dengan banyak huruf non-ASCII (misalnya Mandarin atau Rusia) diserahkan ke detektor lengkap
+    non_ascii = sum(1 for word in words if not word.isascii())
+    if non_ascii * 2 > len(words):
+        return None
+
+    id_hits = sum(1 for word in words if word in INDONESIAN_STOPWORDS)
+    en_hits = sum(1 for word in words if word in ENGLISH_STOPWORDS)
+    if id_hits >= 2 and id_hits > 2 * en_hits:
+        return "id"
+    if en_hits >= 2 and en_hits > 2 * id_hits:
+        return "en"
+    return None
+
+@lru_cache(maxsize=4096)
+def _detect_cached(text):
+    try:
+        return detect(text)
+    except Exception:
+        return None
+
+async def detect_language(text):
+    """
+    Mendeteksi bahasa teks dengan pemeriksaan cepat terlebih dahulu.
+    langdetect (dengan seed dan cache) hanya dipakai jika heuristik ambigu, dan dijalankan di thread terpisah.
+
+    Args:
+        text (str): Teks yang akan diperiksa.
+
+    Returns:
+        str: Kode bahasa, atau None jika tidak dapat ditentukan.
+    """
+    guessed = guess_language(text)
+    if guessed is not None:
+        detection_stats["heuristic"] += 1
+        return guessed
+    detection_stats["fallback"] += 1
+    return await asyncio.to_thread(_detect_cached, re.sub(r'\s+', ' ', text).strip())
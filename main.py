@@ -1,8 +1,13 @@
 import asyncio
 from telethon import TelegramClient, events
-from config import API_ID, API_HASH, PHONE, ADMINS, setup_logging, load_env, FILTERED_CHANNELS, UNFILTERED_CHANNELS, VIP_CHANNELS, SUMMARY_CHANNELS, SUMMARY_KEYWORDS, IMAGE_CHANNELS
-from utils import login
-from discord_utils import discord_worker, failed_message_queue
+from config import API_ID, API_HASH, PHONE, ADMINS, DISCORD_WEBHOOK_URL, HTTP_PREWARM, ADMISSION_CONTROL, setup_logging, load_env, FILTERED_CHANNELS, UNFILTERED_CHANNELS, VIP_CHANNELS, SUMMARY_CHANNELS, SUMMARY_KEYWORDS, IMAGE_CHANNELS
+from utils import login, get_probe_providers, get_translation_warmup_urls
+from discord_utils import discord_warmup_urls, discord_worker, discord_webhook_worker, retry_scheduler, failed_message_queue
+from discord_webhook import webhook_queue
+from discord_shards import shards
+from discord_deadletter import dead_letters
+from block_predictor import block_predictor
+from telegram_sender import telegram_sender
 from telegram_handlers import (
     forward_message, 
     add_filter_channel, 
@@ -28,8 +33,23 @@ from telegram_handlers import (
     list_image_channel,
     add_blocked_keyword,
     remove_blocked_keyword,
-    list_blocked_keyword
+    list_blocked_keyword,
+    translation_stats,
+    provider_status,
+    discord_status,
+    deadletter_list,
+    deadletter_redrive,
+    deadletter_purge,
+    list_learned_blocked,
+    forget_learned_blocked,
+    pipeline_status,
+    message_pipeline,
+    admission_controller,
+    telegram_status
 )
+from translation_cache import translation_cache
+from http_sessions import close_sessions, keepalive_worker
+from translation_providers import provider_probe_worker
 
 # Inisialisasi logger
 logger = setup_logging()
@@ -55,12 +75,42 @@ async def main():
     await login(client, code_queue)
     logger.info("Memulai fungsi main()")
 
+    # Bersihkan entri cache terjemahan yang kedaluwarsa
+    translation_cache.purge_expired()
+
+    # Hangatkan koneksi ke Discord dan penyedia terjemahan, lalu jaga tetap hangat saat sepi
+    if HTTP_PREWARM:
+        asyncio.create_task(keepalive_worker("discord", discord_warmup_urls()))
+        if DISCORD_WEBHOOK_URL:
+            asyncio.create_task(keepalive_worker("discord_webhook", discord_warmup_urls()))
+        asyncio.create_task(keepalive_worker("translation", get_translation_warmup_urls()))
+
     # Jalankan pekerja Discord di latar belakang
-    asyncio.create_task(discord_worker())
+    for shard in shards:
+        asyncio.create_task(discord_worker(shard))
+    asyncio.create_task(retry_scheduler())
+    if DISCORD_WEBHOOK_URL:
+        asyncio.create_task(discord_webhook_worker())
+    elif webhook_queue.qsize():
+        logger.warning(f"Antrian webhook berisi {webhook_queue.qsize()} pesan tetapi DISCORD_WEBHOOK_URL kosong; pesan tersebut tidak dikirim.")
     
+    # Jalankan probe half-open untuk penyedia terjemahan yang circuit breaker-nya terbuka
+    asyncio.create_task(provider_probe_worker(get_probe_providers()))
+
+    # Simpan hitungan prediktor blokir secara berkala, di luar jalur pengiriman
+    asyncio.create_task(block_predictor.flush_worker())
+
     # Jalankan tugas notifikasi pesan gagal
     asyncio.create_task(notify_failed_messages_with_telegram(client))
 
+    # Jalankan pengirim antrian ke TARGET_CHANNEL
+    telegram_sender.start(client)
+
+    # Jalankan pipeline pemrosesan pesan (ingest -> classify -> translate -> render -> deliver)
+    message_pipeline.start()
+    if ADMISSION_CONTROL:
+        asyncio.create_task(admission_controller.run(lambda text: notify_admins(client, text)))
+
     # Daftarkan handler untuk pesan baru
     chats = list(set(FILTERED_CHANNELS + UNFILTERED_CHANNELS + VIP_CHANNELS + SUMMARY_CHANNELS + IMAGE_CHANNELS))  # Hindari duplikasi
     if not chats:
@@ -99,7 +149,17 @@ async def main():
         (list_image_channel, r'^/list_image_channel\b'),
         (add_blocked_keyword, r'^/add_blocked_keyword (.+)'),
         (remove_blocked_keyword, r'^/remove_blocked_keyword (.+)'),
-        (list_blocked_keyword, r'^/list_blocked_keyword\b')
+        (list_blocked_keyword, r'^/list_blocked_keyword\b'),
+        (translation_stats, r'^/translation_stats\b'),
+        (provider_status, r'^/provider_status\b'),
+        (discord_status, r'^/discord_status\b'),
+        (deadletter_list, r'^/deadletter_list(?:\s+(.+))?$'),
+        (deadletter_redrive, r'^/deadletter_redrive (.+)'),
+        (deadletter_purge, r'^/deadletter_purge (.+)'),
+        (list_learned_blocked, r'^/list_learned_blocked\b'),
+        (forget_learned_blocked, r'^/forget_learned_blocked (.+)'),
+        (pipeline_status, r'^/pipeline_status\b'),
+        (telegram_status, r'^/telegram_status\b')
     ]
 
     for handler, pattern in admin_commands:
@@ -110,20 +170,44 @@ async def main():
         client.add_event_handler(handler, events.NewMessage(pattern=pattern))
 
     # Jalankan klien hingga terputus
-    await client.run_until_disconnected()
+    try:
+        await client.run_until_disconnected()
+    finally:
+        await message_pipeline.stop()
+        await telegram_sender.stop()
+        await close_sessions()
+        translation_cache.close()
+        for shard in shards:
+            shard.queue.close()
+        webhook_queue.close()
+        dead_letters.close()
+        block_predictor.close()
+
+async def notify_admins(client, text):
+    """
+    Mengirim pemberitahuan ke semua admin melalui Telegram.
+    """
+    for admin in ADMINS:
+        try:
+            await client.send_message(int(admin), text)
+        except Exception as e:
+            logger.error(f"Gagal mengirim pemberitahuan ke admin {admin}: {str(e)}")
 
 async def notify_failed_messages_with_telegram(client):
     """
     Mengirim notifikasi pesan gagal ke admin melalui Telegram.
     """
     while True:
-        message, reason = await failed_message_queue.get()
+        # Entri berisi (pesan, alasan) atau (pesan, alasan, tujuan); tanpa tujuan berarti Discord
+        entry = await failed_message_queue.get()
+        message, reason = entry[:2]
+        destination = entry[2] if len(entry) > 2 else "Discord"
         for admin in ADMINS:
             try:
                 if message:
-                    await client.send_message(int(admin), f"Pesan gagal dikirim ke Discord: {message[:100]}...\nAlasan: {reason}")
+                    await client.send_message(int(admin), f"Pesan gagal dikirim ke {destination}: {message[:100]}...\nAlasan: {reason}")
                 else:
-                    await client.send_message(int(admin), f"Error Discord: {reason}")
+                    await client.send_message(int(admin), f"Error {destination}: {reason}")
                 logger.info(f"Notifikasi pesan gagal dikirim ke admin {admin}: {message[:50] if message else reason}...")
             except Exception as e:
                 logger.error(f"Gagal mengirim notifikasi ke admin {admin}: {str(e)}")
@@ -0,0 +1,204 @@
+# media_processing.py
+import asyncio
+import io
+import os
+import time
+from collections import deque
+from config import DISCORD_IMAGE_PROCESSING, DISCORD_IMAGE_MAX_DIMENSION, DISCORD_IMAGE_QUALITY, DISCORD_IMAGE_MAX_BYTES, DISCORD_MEDIA_MEMORY_LIMIT, logger
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+    if DISCORD_IMAGE_PROCESSING:
+        logger.warning("DISCORD_IMAGE_PROCESSING aktif tetapi Pillow tidak terpasang; gambar diunggah tanpa kompresi ulang.")
+
+# Batas bawah saat menurunkan kualitas atau ukuran demi memenuhi DISCORD_IMAGE_MAX_BYTES
+MIN_QUALITY = 40
+MIN_DIMENSION = 320
+
+# Statistik kompresi ulang: jumlah gambar, byte sebelum/sesudah, dan waktu proses di thread
+media_stats = {"processed": 0, "unchanged": 0, "failed": 0, "bytes_in": 0, "bytes_out": 0, "seconds": 0.0}
+
+def sniff_image_type(head):
+    """
+    Menentukan content type gambar dari byte awalnya, bukan dari nama file.
+
+    Args:
+        head (bytes): Minimal 12 byte pertama isi file.
+
+    Returns:
+        tuple: (content type, ekstensi file), atau ("application/octet-stream", "") jika tidak dikenal.
+    """
+    if head.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg", ".jpg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png", ".png"
+    if head[:6] in (b"GIF87a", b"GIF89a"):
+        return "image/gif", ".gif"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp", ".webp"
+    return "application/octet-stream", ""
+
+def add_media_field(form, field_name, media_path=None, media_bytes=None):
+    """
+    Menambahkan lampiran ke form multipart dengan content type dan ekstensi hasil sniffing.
+
+    Args:
+        form (aiohttp.FormData): Form permintaan.
+        field_name (str): Nama field ("file" untuk API bot, "files[0]" untuk webhook).
+        media_path (str, optional): Path file gambar (dialirkan dari disk).
+        media_bytes (bytes, optional): Isi gambar di memori.
+
+    Returns:
+        file: File yang dibuka untuk media_path (harus ditutup pemanggil), atau None.
+    """
+    if media_bytes is not None:
+        content_type, ext = sniff_image_type(media_bytes[:12])
+        form.add_field(field_name, media_bytes, filename=f"image{ext or '.jpg'}", content_type=content_type)
+        return None
+    media_file = open(media_path, "rb")
+    content_type, ext = sniff_image_type(media_file.read(12))
+    media_file.seek(0)
+    filename = os.path.basename(media_path)
+    if ext and not filename.lower().endswith(ext):
+        filename = os.path.splitext(filename)[0] + ext
+    form.add_field(field_name, media_file, filename=filename, content_type=content_type)
+    return media_file
+
+def _encode(image, quality):
+    buffer = io.BytesIO()
+    if image.mode in ("RGBA", "LA"):
+        image.save(buffer, format="PNG", optimize=True)
+    else:
+        image.save(buffer, format="JPEG", quality=quality, optimize=True, progressive=True)
+    return buffer.getvalue()
+
+def recompress_image(data, max_dimension=DISCORD_IMAGE_MAX_DIMENSION, quality=DISCORD_IMAGE_QUALITY, max_bytes=DISCORD_IMAGE_MAX_BYTES):
+    """
+    Mengecilkan gambar: memutar sesuai EXIF, memperkecil sisi terpanjang ke max_dimension, lalu
+    menyandikan ulang sebagai JPEG (atau PNG jika transparan). Jika max_bytes diisi, kualitas
+    diturunkan bertahap lalu ukuran diperkecil sampai hasilnya muat. Dijalankan di thread terpisah.
+
+    Args:
+        data (bytes): Isi gambar asli.
+        max_dimension (int): Panjang sisi terpanjang maksimum (piksel), 0 berarti tidak diperkecil.
+        quality (int): Kualitas JPEG awal.
+        max_bytes (int): Batas ukuran hasil (byte), 0 berarti tanpa batas.
+
+    Returns:
+        bytes: Gambar hasil kompresi, atau None jika gambar animasi atau hasilnya tidak lebih kecil.
+    """
+    image = Image.open(io.BytesIO(data))
+    if getattr(image, "is_animated", False):
+        return None
+    image = ImageOps.exif_transpose(image)
+    if image.mode == "P" and "transparency" in image.info:
+        image = image.convert("RGBA")
+    elif image.mode not in ("RGB", "RGBA", "LA", "L"):
+        image = image.convert("RGB")
+    if max_dimension and max(image.size) > max_dimension:
+        image.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+
+    encoded = _encode(image, quality)
+    while max_bytes and len(encoded) > max_bytes:
+        if image.mode not in ("RGBA", "LA") and quality > MIN_QUALITY:
+            quality = max(MIN_QUALITY, quality - 10)
+        elif max(image.size) * 3 // 4 >= MIN_DIMENSION:
+            image = image.resize((image.width * 3 // 4, image.height * 3 // 4), Image.LANCZOS)
+        else:
+            break
+        encoded = _encode(image, quality)
+    return encoded if len(encoded) < len(data) else None
+
+def _process_sync(media_path, media_bytes):
+    if media_bytes is None:
+        with open(media_path, "rb") as f:
+            media_bytes = f.read()
+    return media_bytes, recompress_image(media_bytes)
+
+async def process_item_media(item):
+    """
+    Mengompresi ulang lampiran item antrian Discord di thread terpisah agar event loop tidak terblokir.
+    Hasil yang muat di DISCORD_MEDIA_MEMORY_LIMIT disimpan di memori dan file sementara aslinya dihapus;
+    hasil yang lebih besar menimpa file aslinya. Jika Pillow tidak ada atau kompresi gagal, item tidak diubah.
+
+    Args:
+        item (dict): Item antrian dengan media_path atau media_bytes.
+    """
+    if Image is None:
+        return
+    media_path = item.get("media_path")
+    started = time.monotonic()
+    try:
+        original, processed = await asyncio.to_thread(_process_sync, media_path, item.get("media_bytes"))
+    except Exception as e:
+        media_stats["failed"] += 1
+        logger.warning(f"Gagal mengompresi ulang gambar, diunggah apa adanya: {str(e)}")
+        return
+    elapsed = time.monotonic() - started
+    media_stats["seconds"] += elapsed
+    media_stats["bytes_in"] += len(original)
+    if processed is None:
+        media_stats["unchanged"] += 1
+        media_stats["bytes_out"] += len(original)
+        return
+
+    media_stats["processed"] += 1
+    media_stats["bytes_out"] += len(processed)
+    if len(processed) <= DISCORD_MEDIA_MEMORY_LIMIT:
+        item["media_bytes"] = processed
+        # Buffer hasil kompresi harus ditulis ulang ke outbox saat item disimpan lagi
+        item.pop("_media_stored", None)
+        if media_path:
+            item["media_path"] = None
+            if os.path.exists(media_path):
+                os.remove(media_path)
+    else:
+        with open(media_path, "wb") as f:
+            f.write(processed)
+    item["media_processed"] = True
+    logger.info(f"Gambar dikompresi ulang: {len(original)} -> {len(processed)} byte dalam {elapsed * 1000:.0f} ms")
+
+class UploadStats:
+    """
+    Latensi unggah lampiran ke Discord (permintaan sampai respons diterima) beserta ukurannya,
+    dipisah antara gambar asli dan hasil kompresi ulang agar dampaknya terlihat.
+    """
+
+    def __init__(self, window=200):
+        self.samples = deque(maxlen=window)
+
+    def record(self, size, latency):
+        self.samples.append((size, latency))
+
+    def to_dict(self):
+        latencies = sorted(latency for _, latency in self.samples)
+        total_bytes = sum(size for size, _ in self.samples)
+        return {
+            "count": len(self.samples),
+            "avg_bytes": total_bytes / len(self.samples) if self.samples else 0,
+            "p50": latencies[len(latencies) // 2] if latencies else None,
+            "p95": latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))] if latencies else None,
+            "throughput": total_bytes / sum(latencies) if latencies and sum(latencies) > 0 else 0,
+        }
+
+upload_stats = {"original": UploadStats(), "processed": UploadStats()}
+
+def record_upload(media_path, media_bytes, latency, processed):
+    """
+    Mencatat satu unggahan lampiran yang berhasil.
+
+    Args:
+        media_path (str): Path file yang diunggah (jika bukan dari memori).
+        media_bytes (bytes): Isi gambar yang diunggah dari memori.
+        latency (float): Lama permintaan (detik).
+        processed (bool): True jika gambar sudah dikompresi ulang.
+    """
+    if media_bytes is not None:
+        size = len(media_bytes)
+    elif media_path and os.path.exists(media_path):
+        size = os.path.getsize(media_path)
+    else:
+        return
+    upload_stats["processed" if processed else "original"].record(size, latency)
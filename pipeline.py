@@ -0,0 +1,157 @@
+# pipeline.py
+import asyncio
+import time
+import zlib
+from config import logger
+
+class PipelineStage:
+    """
+    Satu tahap pipeline dengan sejumlah pekerja. Setiap pekerja punya antrian terbatas sendiri dan
+    job dibagi ke pekerja dengan hash chat_id, sehingga job dari satu channel selalu diproses
+    berurutan oleh pekerja yang sama sementara channel lain berjalan paralel. Antrian yang penuh
+    membuat tahap sebelumnya menunggu (backpressure), bukan menumpuk job tanpa batas. Job masuk ke
+    setiap antrian lewat kunci FIFO, sehingga job yang datang belakangan tidak dapat menyalip job
+    yang sedang menunggu tempat.
+    """
+
+    def __init__(self, name, handler, concurrency=1, queue_size=100):
+        self.name = name
+        self.handler = handler
+        self.concurrency = max(1, concurrency)
+        self.lanes = [asyncio.Queue(maxsize=max(1, queue_size // self.concurrency)) for _ in range(self.concurrency)]
+        self._entry_locks = [asyncio.Lock() for _ in range(self.concurrency)]
+        self.next_stage = None
+        self.on_error = None
+        self.tasks = []
+        self.busy = 0
+        self.stats = {"processed": 0, "stopped": 0, "failed": 0, "seconds": 0.0, "blocked_seconds": 0.0}
+
+    def _lane_index(self, chat_id):
+        return zlib.crc32(str(chat_id).encode()) % self.concurrency
+
+    async def put(self, job):
+        """
+        Memasukkan job ke antrian pekerja yang memegang chat_id job; menunggu jika antrian penuh.
+
+        Args:
+            job (dict): Job pipeline, minimal berisi chat_id.
+        """
+        index = self._lane_index(job["chat_id"])
+        lane = self.lanes[index]
+        lock = self._entry_locks[index]
+        # asyncio.Lock melayani penunggu sesuai urutan datang; tanpa kunci, job baru dapat mengisi slot
+        # yang baru kosong sebelum job lama yang menunggu di lane.put sempat bangun
+        blocked = lock.locked() or lane.full()
+        started = time.monotonic()
+        async with lock:
+            await lane.put(job)
+        if blocked:
+            self.stats["blocked_seconds"] += time.monotonic() - started
+
+    async def _worker(self, lane):
+        while True:
+            job = await lane.get()
+            self.busy += 1
+            started = time.monotonic()
+            try:
+                result = await self.handler(job)
+                self.stats["processed"] += 1
+                if self.next_stage is None:
+                    pass
+                elif result is None:
+                    self.stats["stopped"] += 1
+                else:
+                    await self.next_stage.put(result)
+            except Exception as e:
+                self.stats["failed"] += 1
+                logger.critical(f"Tahap pipeline {self.name} gagal memproses job dari {job.get('chat_id')}: {str(e)}")
+                if self.on_error is not None:
+                    try:
+                        await self.on_error(self.name, job, e)
+                    except Exception as report_error:
+                        logger.error(f"Gagal melaporkan galat tahap {self.name}: {str(report_error)}")
+            finally:
+                self.stats["seconds"] += time.monotonic() - started
+                self.busy -= 1
+                lane.task_done()
+
+    def start(self):
+        """Menjalankan pekerja tahap ini."""
+        if not self.tasks:
+            self.tasks = [asyncio.create_task(self._worker(lane)) for lane in self.lanes]
+
+    def depth(self):
+        """Jumlah job yang menunggu di semua antrian pekerja tahap ini."""
+        return sum(lane.qsize() for lane in self.lanes)
+
+    def in_flight(self):
+        """Jumlah job yang menunggu atau sedang diproses di tahap ini."""
+        return self.depth() + self.busy
+
+    def get_stats(self):
+        """Mengembalikan statistik tahap: kedalaman antrian, pekerja sibuk, dan jumlah job."""
+        processed = self.stats["processed"] + self.stats["failed"]
+        return {
+            **self.stats,
+            "concurrency": self.concurrency,
+            "busy": self.busy,
+            "depth": self.depth(),
+            "max_lane_depth": max(lane.qsize() for lane in self.lanes),
+            "capacity": sum(lane.maxsize for lane in self.lanes),
+            "avg_seconds": self.stats["seconds"] / processed if processed else 0.0,
+        }
+
+class Pipeline:
+    """
+    Rangkaian tahap yang disambung berurutan: hasil handler satu tahap menjadi job tahap berikutnya,
+    dan handler yang mengembalikan None menghentikan job di tahap tersebut.
+    """
+
+    def __init__(self, stages, on_error=None):
+        self.stages = stages
+        for stage, next_stage in zip(stages, stages[1:]):
+            stage.next_stage = next_stage
+        for stage in stages:
+            stage.on_error = on_error
+        # Job yang menunggu tempat di antrian tahap pertama
+        self.waiting = 0
+
+    async def submit(self, job):
+        """
+        Memasukkan job ke tahap pertama.
+
+        Args:
+            job (dict): Job pipeline, minimal berisi chat_id.
+        """
+        self.waiting += 1
+        try:
+            await self.stages[0].put(job)
+        finally:
+            self.waiting -= 1
+
+    def get_stage(self, name):
+        """Mencari tahap berdasarkan nama, atau None jika tidak ada."""
+        return next((stage for stage in self.stages if stage.name == name), None)
+
+    def in_flight(self):
+        """Jumlah job di pipeline, termasuk yang masih menunggu masuk ke tahap pertama."""
+        return self.waiting + sum(stage.in_flight() for stage in self.stages)
+
+    def start(self):
+        """Menjalankan pekerja semua tahap."""
+        for stage in self.stages:
+            stage.start()
+        logger.info("Pipeline pesan berjalan: " + " -> ".join(f"{stage.name} ({stage.concurrency})" for stage in self.stages))
+
+    async def stop(self):
+        """Menghentikan pekerja semua tahap; job yang masih di antrian dibuang."""
+        tasks = [task for stage in self.stages for task in stage.tasks]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for stage in self.stages:
+            stage.tasks = []
+
+    def get_stats(self):
+        """Mengembalikan statistik per tahap, urut sesuai pipeline."""
+        return {stage.name: stage.get_stats() for stage in self.stages}
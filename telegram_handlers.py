@@ -4,14 +4,49 @@ import re
 import os
 import tempfile
 from collections import deque
+from datetime import datetime
 from telethon import events
 from telethon.tl.types import MessageMediaPhoto
-from config import FILTERED_CHANNELS, UNFILTERED_CHANNELS, VIP_CHANNELS, SUMMARY_CHANNELS, IMAGE_CHANNELS, KEYWORDS, SUMMARY_KEYWORDS, BLOCKED_KEYWORDS, ADMINS, TARGET_CHANNEL, DISCORD_THREAD_ID, logger
-from utils import extract_username, contains_keyword, contains_blocked_keyword, translate_text, remove_markdown, contains_username
-from discord_utils import send_message_to_discord_thread, failed_message_queue
+from config import FILTERED_CHANNELS, UNFILTERED_CHANNELS, VIP_CHANNELS, SUMMARY_CHANNELS, IMAGE_CHANNELS, KEYWORDS, SUMMARY_KEYWORDS, BLOCKED_KEYWORDS, ADMINS, TARGET_CHANNEL, DISCORD_THREAD_ID, DISCORD_MEDIA_MEMORY_LIMIT, DISCORD_WEBHOOK_URL, DISCORD_WEBHOOK_CATEGORIES, DISCORD_EXPIRED_ACTION, PIPELINE_QUEUE_SIZE, PIPELINE_CONCURRENCY, ADMISSION_CONTROL, ADMISSION_DROP_CATEGORIES, logger
+from utils import extract_username, contains_keyword, contains_blocked_keyword, translate_text, remove_markdown, contains_username, get_translation_providers, translation_batcher, refresh_keyword_matchers
+from discord_utils import send_message_to_discord_thread, failed_message_queue, message_queue, rate_limiter, coalesce_stats, expired_stats, redrive_dead_letters
+from discord_webhook import webhook_queue, webhook_limiter, webhook_stats
+from discord_shards import shards
+from discord_deadletter import dead_letters
+from block_predictor import block_predictor
+from media_processing import media_stats, upload_stats
+from pipeline import Pipeline, PipelineStage
+from admission import AdmissionController, ADMISSION_STEPS
+from telegram_sender import telegram_sender
+from translation_cache import translation_cache
+from http_sessions import connection_stats
+from translation_providers import provider_stats, rank_providers
+from language_detect import detection_stats
 
 # Gunakan deque untuk melacak pesan yang sudah diproses (batas maksimal 1000 pesan)
 processed_messages = deque(maxlen=1000)
+# Label kategori pada log pesan yang diteruskan
+CATEGORY_LABELS = {"SUMMARY": "ringkasan ", "VIP": "VIP "}
+
+def estimate_photo_size(media):
+    """
+    Memperkirakan ukuran file foto terbesar dari metadata Telegram tanpa mengunduhnya.
+    
+    Args:
+        media (MessageMediaPhoto): Media foto dari pesan Telegram.
+    
+    Returns:
+        int: Perkiraan ukuran dalam byte, atau None jika tidak diketahui.
+    """
+    photo = getattr(media, "photo", None)
+    sizes = []
+    for photo_size in getattr(photo, "sizes", None) or []:
+        if getattr(photo_size, "size", None) is not None:
+            sizes.append(photo_size.size)
+        elif getattr(photo_size, "sizes", None):
+            # PhotoSizeProgressive menyimpan daftar ukuran per tahap; yang terakhir adalah ukuran penuh
+            sizes.append(max(photo_size.sizes))
+    return max(sizes) if sizes else None
 
 async def update_monitored_chats(client):
     """
@@ -67,139 +102,306 @@ def transform_summary_message(message, for_discord=False):
     logger.debug(f"Keluar transform_summary_message: {cleaned_message}")
     return cleaned_message
 
-async def forward_message(event):
+def format_connection_stats(name):
     """
-    Meneruskan pesan dari channel sumber ke target berdasarkan aturan.
+    Meringkas latensi permintaan warm dan cold untuk satu sesi HTTP.
     
     Args:
-        event: Event dari Telethon yang berisi pesan baru.
+        name (str): Nama sesi HTTP.
+    
+    Returns:
+        str: Ringkasan satu baris, atau string kosong jika belum ada data.
     """
-    try:
-        message = event.message
-        chat_id = event.chat_id
-        message_id = message.id
-        
-        unique_id = f"{chat_id}:{message_id}"
-        if unique_id in processed_messages:
-            logger.debug(f"Pesan {unique_id} sudah diproses, dilewati.")
-            return
-        
-        processed_messages.append(unique_id)
-        
-        source_username = f"@{event.chat.username}" if event.chat.username else f"Channel ID: {chat_id}"
-        logger.info(f"Memproses pesan {message.id} dari {chat_id}: {message.text}")
-
-        # Tangani pesan bergambar dari IMAGE_CHANNELS
-        if chat_id in IMAGE_CHANNELS and message.media and isinstance(message.media, MessageMediaPhoto):
-            translated_text = ""
-            if message.text:
-                if contains_username(message.text):
-                    logger.debug(f"Pesan mengandung username, melewati terjemahan: {message.text}")
-                    translated_text = message.text.strip()
-                else:
-                    translated_text = await translate_text(message.text.strip())
-                    logger.debug(f"Teks setelah terjemahan (image): {translated_text}")
-                translated_text = remove_markdown(translated_text)
-                logger.debug(f"Teks setelah remove_markdown (image): {translated_text}")
-            else:
-                translated_text = ""
-
-            final_message_telegram = f"{translated_text} - {source_username}" if translated_text else f"- {source_username}"
-            await event.client.send_message(TARGET_CHANNEL, file=message.media, message=final_message_telegram)
-            logger.info(f"Pesan bergambar {message.id} diteruskan dari {chat_id} ke {TARGET_CHANNEL}")
-            
-            final_message_discord = f"## {translated_text} - {source_username}" if translated_text else f"- {source_username}"
-            if translated_text and contains_blocked_keyword(translated_text, BLOCKED_KEYWORDS):
-                logger.warning(f"Pesan {message.id} tidak dikirim ke Discord karena mengandung kata yang diblokir: {translated_text}")
-                await failed_message_queue.put((final_message_discord, "Mengandung kata yang diblokir"))
-            else:
-                temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".jpg")
-                media_path = temp_file.name
-                try:
-                    await event.client.download_media(message.media, media_path)
-                    await send_message_to_discord_thread(final_message_discord, media_path=media_path)
-                    logger.info(f"Pesan bergambar {message.id} dikirim ke antrian Discord dari {chat_id}")
-                except Exception as e:
-                    logger.error(f"Gagal mengunduh atau mengirim gambar ke Discord: {str(e)}")
-                    await failed_message_queue.put((final_message_discord, f"Gagal mengunduh gambar: {str(e)}"))
-                finally:
-                    temp_file.close()
-            return
+    stats = connection_stats.get(name)
+    if stats is None:
+        return ""
+    data = stats.to_dict()
 
-        # Tangani pesan teks
-        translated_text = message.text
-        if message.text:
-            if contains_username(message.text):
-                logger.debug(f"Pesan mengandung username, melewati terjemahan: {message.text}")
-                translated_text = message.text.strip()
-            else:
-                translated_text = await translate_text(message.text.strip())
-                logger.debug(f"Teks setelah terjemahan: {translated_text}")
-            translated_text = remove_markdown(translated_text)
-            logger.debug(f"Teks setelah remove_markdown: {translated_text}")
-        else:
-            translated_text = "(Tidak ada teks)"
-
-        # Prioritaskan aturan untuk mencegah pemrosesan ganda
-        if chat_id in SUMMARY_CHANNELS and message.text and contains_keyword(message.text, SUMMARY_KEYWORDS):
-            base_message_telegram = transform_summary_message(translated_text, for_discord=False)
-            base_message_discord = transform_summary_message(translated_text, for_discord=True)
-            final_message_telegram = f"{base_message_telegram} - {source_username}"
-            final_message_discord = f"### {base_message_discord} - {source_username}"
-            await event.client.send_message(TARGET_CHANNEL, final_message_telegram)
-            if contains_blocked_keyword(base_message_discord, BLOCKED_KEYWORDS):
-                logger.warning(f"Pesan {message.id} tidak dikirim ke Discord karena mengandung kata yang diblokir: {base_message_discord}")
-                await failed_message_queue.put((final_message_discord, "Mengandung kata yang diblokir"))
-            else:
-                await send_message_to_discord_thread(final_message_discord)
-                logger.info(f"Pesan ringkasan {message.id} diteruskan dari {chat_id} ke {TARGET_CHANNEL} dan antrian Discord")
-            return  # Keluar setelah memproses sebagai SUMMARY_CHANNEL
-        elif chat_id in VIP_CHANNELS:
-            base_message = translated_text
-            final_message_telegram = f"**{base_message} - {source_username}**"
-            final_message_discord = f"### {base_message} - {source_username}"
-            await event.client.send_message(TARGET_CHANNEL, final_message_telegram)
-            if contains_blocked_keyword(base_message, BLOCKED_KEYWORDS):
-                logger.warning(f"Pesan {message.id} tidak dikirim ke Discord karena mengandung kata yang diblokir: {base_message}")
-                await failed_message_queue.put((final_message_discord, "Mengandung kata yang diblokir"))
-            else:
-                await send_message_to_discord_thread(final_message_discord)
-                logger.info(f"Pesan VIP {message.id} diteruskan dari {chat_id} ke {TARGET_CHANNEL} dan antrian Discord")
-            return  # Keluar setelah memproses sebagai VIP_CHANNEL
-        elif chat_id in FILTERED_CHANNELS and message.text and contains_keyword(message.text, KEYWORDS):
-            base_message = translated_text
-            final_message_telegram = f"{base_message} - {source_username}"
-            final_message_discord = f"### {base_message} - {source_username}"
-            await event.client.send_message(TARGET_CHANNEL, final_message_telegram)
-            if contains_blocked_keyword(base_message, BLOCKED_KEYWORDS):
-                logger.warning(f"Pesan {message.id} tidak dikirim ke Discord karena  karena mengandung kata yang diblokir: {base_message}")
-                await failed_message_queue.put((final_message_discord, "Mengandung kata yang diblokir"))
-            else:
-                await send_message_to_discord_thread(final_message_discord)
-                logger.info(f"Pesan {message.id} diteruskan dari {chat_id} ke {TARGET_CHANNEL} dan antrian Discord")
-            return  # Keluar setelah memproses sebagai FILTERED_CHANNEL
-        elif chat_id in UNFILTERED_CHANNELS:
-            base_message = translated_text
-            final_message_telegram = f"{base_message} - {source_username}"
-            final_message_discord = f"{base_message} - {source_username}"
-            await event.client.send_message(TARGET_CHANNEL, final_message_telegram)
-            if contains_blocked_keyword(base_message, BLOCKED_KEYWORDS):
-                logger.warning(f"Pesan {message.id} tidak dikirim ke Discord karena mengandung kata yang diblokir: {base_message}")
-                await failed_message_queue.put((final_message_discord, "Mengandung kata yang diblokir"))
-            else:
-                await send_message_to_discord_thread(final_message_discord)
-                logger.info(f"Pesan {message.id} diteruskan dari {chat_id} ke {TARGET_CHANNEL} dan antrian Discord")
-            return  # Keluar setelah memproses sebagai UNFILTERED_CHANNEL
+    def fmt(value):
+        return f"{value * 1000:.0f}ms" if value is not None else "-"
+
+    return (f"Koneksi {name}: warm {data['warm_count']}x p50 {fmt(data['warm_p50'])} p95 {fmt(data['warm_p95'])}, "
+            f"cold {data['cold_count']}x p50 {fmt(data['cold_p50'])} p95 {fmt(data['cold_p95'])}, probe {data['probes']} (gagal {data['probe_failures']})\n")
+
+def format_media_stats():
+    """
+    Menyusun baris status kompresi ulang gambar dan latensi unggah lampiran (asli vs dikompresi ulang).
+
+    Returns:
+        str: Baris status, atau string kosong jika belum ada gambar yang diproses atau diunggah.
+    """
+    lines = ""
+    handled = media_stats["processed"] + media_stats["unchanged"]
+    if handled or media_stats["failed"]:
+        saved = media_stats["bytes_in"] - media_stats["bytes_out"]
+        ratio = saved / media_stats["bytes_in"] if media_stats["bytes_in"] else 0
+        lines += (f"Kompresi gambar: {media_stats['processed']} dikecilkan, {media_stats['unchanged']} tetap, {media_stats['failed']} gagal, "
+                  f"hemat {saved / 1024:.0f} KB ({ratio:.0%}), rata-rata {media_stats['seconds'] / max(handled, 1) * 1000:.0f} ms\n")
+    for kind, label in (("original", "asli"), ("processed", "dikompresi")):
+        upload = upload_stats[kind].to_dict()
+        if upload["count"]:
+            lines += (f"Unggah gambar {label}: {upload['count']}x, rata-rata {upload['avg_bytes'] / 1024:.0f} KB, "
+                      f"p50 {upload['p50']:.2f}s/p95 {upload['p95']:.2f}s, {upload['throughput'] / 1024:.0f} KB/s\n")
+    return lines
+
+def classify_message(chat_id, text):
+    """
+    Menentukan kategori pengiriman pesan teks berdasarkan channel sumber dan teks asli (sebelum diterjemahkan).
+    
+    Args:
+        chat_id (int): ID channel sumber.
+        text (str): Teks asli pesan.
+    
+    Returns:
+        str: 'SUMMARY', 'VIP', 'FILTERED', 'UNFILTERED', atau None jika pesan tidak diteruskan.
+    """
+    # Prioritaskan aturan untuk mencegah pemrosesan ganda
+    if chat_id in SUMMARY_CHANNELS and text and contains_keyword(text, SUMMARY_KEYWORDS):
+        return "SUMMARY"
+    if chat_id in VIP_CHANNELS:
+        return "VIP"
+    if chat_id in FILTERED_CHANNELS and text and contains_keyword(text, KEYWORDS):
+        return "FILTERED"
+    if chat_id in UNFILTERED_CHANNELS:
+        return "UNFILTERED"
+    return None
+
+async def prepare_text(text):
+    """
+    Menerjemahkan teks (kecuali mengandung username) lalu menghapus markdown.
+    
+    Args:
+        text (str): Teks yang akan ditampilkan.
+    
+    Returns:
+        str: Teks siap kirim.
+    """
+    if contains_username(text):
+        logger.debug(f"Pesan mengandung username, melewati terjemahan: {text}")
+        translated_text = text
+    else:
+        translated_text = await translate_text(text)
+        logger.debug(f"Teks setelah terjemahan: {translated_text}")
+    translated_text = remove_markdown(translated_text)
+    logger.debug(f"Teks setelah remove_markdown: {translated_text}")
+    return translated_text
+
+async def ingest_stage(job):
+    """
+    Tahap ingest: membuang pesan yang sudah diproses dan melengkapi job dengan data sumber.
+    
+    Args:
+        job (dict): Job berisi event Telethon dan chat_id.
+    
+    Returns:
+        dict: Job yang diteruskan ke tahap klasifikasi, atau None jika pesan duplikat.
+    """
+    event = job["event"]
+    message = event.message
+    unique_id = f"{job['chat_id']}:{message.id}"
+    if unique_id in processed_messages:
+        logger.debug(f"Pesan {unique_id} sudah diproses, dilewati.")
+        return None
+    processed_messages.append(unique_id)
+
+    job["message"] = message
+    job["source_username"] = f"@{event.chat.username}" if event.chat.username else f"Channel ID: {job['chat_id']}"
+    # Waktu terbit pesan di Telegram, dipakai untuk batas umur pesan di antrian Discord
+    job["source_time"] = message.date.timestamp() if message.date else None
+    logger.info(f"Memproses pesan {message.id} dari {job['chat_id']}: {message.text}")
+    return job
+
+async def classify_stage(job):
+    """
+    Tahap klasifikasi: menentukan kategori dari channel sumber dan teks asli, sebelum diterjemahkan,
+    agar pesan yang tidak diteruskan tidak ikut diterjemahkan.
+    
+    Returns:
+        dict: Job dengan kategori, atau None jika pesan tidak diteruskan.
+    """
+    message = job["message"]
+    chat_id = job["chat_id"]
+    if chat_id in IMAGE_CHANNELS and message.media and isinstance(message.media, MessageMediaPhoto):
+        job["category"] = "IMAGE"
+        return job
+    job["category"] = classify_message(chat_id, message.text)
+    if job["category"] is None:
+        logger.info(f"Pesan dari {chat_id} tidak memenuhi kriteria pengiriman: {message.text}")
+        return None
+    if job["admission_level"] >= 3 and job["category"] in ADMISSION_DROP_CATEGORIES:
+        admission_controller.stats["dropped"] += 1
+        logger.warning(f"Pesan {message.id} ({job['category']}) dari {chat_id} dibuang oleh kontrol beban tahap {job['admission_level']}")
+        return None
+    return job
+
+async def translate_stage(job):
+    """
+    Tahap terjemahan: menerjemahkan hanya bagian yang akan ditampilkan, yaitu baris pertama untuk
+    ringkasan dan seluruh teks untuk kategori lain. Saat kontrol beban aktif, pesan UNFILTERED tidak
+    diterjemahkan (tahap 1) dan pesan FILTERED/UNFILTERED dipotong ke baris pertama (tahap 2).
+    
+    Returns:
+        dict: Job dengan translated_text.
+    """
+    text = job["message"].text
+    if job["category"] == "IMAGE":
+        job["translated_text"] = await prepare_text(text.strip()) if text else ""
+    elif text:
+        rendered_text = text.strip()
+        level = job["admission_level"]
+        if job["category"] == "SUMMARY":
+            rendered_text = rendered_text.split('\n')[0]
+        elif level >= 2 and job["category"] in ("FILTERED", "UNFILTERED") and '\n' in rendered_text:
+            admission_controller.stats["summarized"] += 1
+            rendered_text = rendered_text.split('\n')[0]
+        if level >= 1 and job["category"] == "UNFILTERED":
+            admission_controller.stats["untranslated"] += 1
+            job["translated_text"] = remove_markdown(rendered_text)
         else:
-            logger.info(f"Pesan dari {chat_id} tidak memenuhi kriteria pengiriman: {message.text}")
+            job["translated_text"] = await prepare_text(rendered_text)
+    else:
+        job["translated_text"] = "(Tidak ada teks)"
+    return job
+
+async def render_stage(job):
+    """
+    Tahap render: menyusun pesan akhir untuk Telegram dan Discord sesuai kategori, serta menandai
+    pesan yang tidak boleh dikirim ke Discord karena mengandung kata yang diblokir.
     
+    Returns:
+        dict: Job dengan telegram_text, discord_text, dan blocked.
+    """
+    category = job["category"]
+    translated_text = job["translated_text"]
+    source_username = job["source_username"]
+    if category == "IMAGE":
+        job["telegram_text"] = f"{translated_text} - {source_username}" if translated_text else f"- {source_username}"
+        job["discord_text"] = f"## {translated_text} - {source_username}" if translated_text else f"- {source_username}"
+        job["blocked"] = bool(translated_text) and contains_blocked_keyword(translated_text, BLOCKED_KEYWORDS)
+        return job
+    if category == "SUMMARY":
+        base_message_telegram = transform_summary_message(translated_text, for_discord=False)
+        base_message_discord = transform_summary_message(translated_text, for_discord=True)
+        job["telegram_text"] = f"{base_message_telegram} - {source_username}"
+        job["discord_text"] = f"### {base_message_discord} - {source_username}"
+        job["blocked"] = contains_blocked_keyword(base_message_discord, BLOCKED_KEYWORDS)
+        return job
+    if category == "VIP":
+        job["telegram_text"] = f"**{translated_text} - {source_username}**"
+        job["discord_text"] = f"### {translated_text} - {source_username}"
+    elif category == "FILTERED":
+        job["telegram_text"] = f"{translated_text} - {source_username}"
+        job["discord_text"] = f"### {translated_text} - {source_username}"
+    else:
+        job["telegram_text"] = f"{translated_text} - {source_username}"
+        job["discord_text"] = f"{translated_text} - {source_username}"
+    job["blocked"] = contains_blocked_keyword(translated_text, BLOCKED_KEYWORDS)
+    return job
+
+async def deliver_image(job):
+    """
+    Mengunduh gambar (ke memori jika cukup kecil, selain itu ke file sementara) lalu memasukkannya ke antrian Discord.
+    """
+    event = job["event"]
+    message = job["message"]
+    chat_id = job["chat_id"]
+    media_path = None
+    try:
+        photo_size = estimate_photo_size(message.media)
+        if photo_size is not None and photo_size <= DISCORD_MEDIA_MEMORY_LIMIT:
+            # Unduh langsung ke memori; buffer ini yang diunggah ke Discord
+            media_bytes = await event.client.download_media(message.media, file=bytes)
+            await send_message_to_discord_thread(job["discord_text"], media_bytes=media_bytes, category="IMAGE", chat_id=chat_id, source_time=job["source_time"])
+        else:
+            temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".jpg")
+            media_path = temp_file.name
+            temp_file.close()
+            await event.client.download_media(message.media, media_path)
+            await send_message_to_discord_thread(job["discord_text"], media_path=media_path, category="IMAGE", chat_id=chat_id, source_time=job["source_time"])
+        logger.info(f"Pesan bergambar {message.id} dikirim ke antrian Discord dari {chat_id}")
     except Exception as e:
-        logger.critical(f"Gagal memproses pesan {message.id}: {str(e)}")
-        for admin in ADMINS:
-            try:
-                await event.client.send_message(int(admin), f"Galat memproses pesan {message.id} dari {source_username}: {str(e)}\nTeks: {message.text}")
-            except Exception as send_error:
-                logger.error(f"Gagal mengirim pesan ke admin {admin}: {str(send_error)}")
+        logger.error(f"Gagal mengunduh atau mengirim gambar ke Discord: {str(e)}")
+        await failed_message_queue.put((job["discord_text"], f"Gagal mengunduh gambar: {str(e)}"))
+        if media_path and os.path.exists(media_path):
+            os.remove(media_path)
+
+async def deliver_stage(job):
+    """
+    Tahap kirim: memasukkan pesan ke antrian kirim TARGET_CHANNEL lalu ke antrian Discord. Pesan yang
+    mengandung kata yang diblokir hanya dilaporkan ke admin, tidak dikirim ke Discord.
+    
+    Returns:
+        None: Tahap terakhir pipeline.
+    """
+    message = job["message"]
+    chat_id = job["chat_id"]
+    category = job["category"]
+    # Pengiriman ke Telegram lewat antrian sendiri agar FloodWait tidak menahan pipeline
+    telegram_sender.enqueue(job["telegram_text"], category=category, file=message.media if category == "IMAGE" else None)
+    if category == "IMAGE":
+        logger.info(f"Pesan bergambar {message.id} dari {chat_id} masuk antrian kirim ke {TARGET_CHANNEL}")
+
+    if job["blocked"]:
+        logger.warning(f"Pesan {message.id} tidak dikirim ke Discord karena mengandung kata yang diblokir: {job['translated_text']}")
+        await failed_message_queue.put((job["discord_text"], "Mengandung kata yang diblokir"))
+    elif category == "IMAGE":
+        await deliver_image(job)
+    else:
+        await send_message_to_discord_thread(job["discord_text"], category=category, chat_id=chat_id, source_time=job["source_time"])
+        logger.info(f"Pesan {CATEGORY_LABELS.get(category, '')}{message.id} diteruskan dari {chat_id} ke {TARGET_CHANNEL} dan antrian Discord")
+    return None
+
+async def report_pipeline_error(stage_name, job, error):
+    """
+    Memberi tahu admin bahwa sebuah pesan gagal diproses di salah satu tahap pipeline.
+    
+    Args:
+        stage_name (str): Nama tahap yang gagal.
+        job (dict): Job yang gagal.
+        error (Exception): Galat yang terjadi.
+    """
+    event = job["event"]
+    message = event.message
+    source_username = job.get("source_username", f"Channel ID: {job['chat_id']}")
+    for admin in ADMINS:
+        try:
+            await event.client.send_message(int(admin), f"Galat memproses pesan {message.id} dari {source_username} (tahap {stage_name}): {str(error)}\nTeks: {message.text}")
+        except Exception as send_error:
+            logger.error(f"Gagal mengirim pesan ke admin {admin}: {str(send_error)}")
+
+message_pipeline = Pipeline([
+    PipelineStage(name, handler, PIPELINE_CONCURRENCY[name], PIPELINE_QUEUE_SIZE)
+    for name, handler in (
+        ("ingest", ingest_stage),
+        ("classify", classify_stage),
+        ("translate", translate_stage),
+        ("render", render_stage),
+        ("deliver", deliver_stage),
+    )
+], on_error=report_pipeline_error)
+
+def discord_backlog():
+    """Jumlah pesan yang menunggu di semua antrian Discord (shard dan webhook)."""
+    return sum(shard.queue.qsize() for shard in shards) + webhook_queue.qsize()
+
+admission_controller = AdmissionController({
+    "in_flight": message_pipeline.in_flight,
+    "translation": message_pipeline.get_stage("translate").in_flight,
+    "discord": discord_backlog,
+})
+
+async def forward_message(event):
+    """
+    Handler Telethon untuk pesan baru dari channel sumber. Pesan hanya dimasukkan ke pipeline
+    (ingest -> classify -> translate -> render -> deliver) bersama tahap kontrol beban saat ini;
+    jika antrian ingest penuh, handler menunggu sampai ada tempat.
+    
+    Args:
+        event: Event dari Telethon yang berisi pesan baru.
+    """
+    # Tahap kontrol beban dibaca saat pesan masuk dan berlaku untuk pesan ini di semua tahap pipeline
+    admission_level = admission_controller.level if ADMISSION_CONTROL else 0
+    await message_pipeline.submit({"event": event, "chat_id": event.chat_id, "admission_level": admission_level})
 
 async def update_channel_list(event, channel_list, list_name, action, channel_name):
     """
@@ -313,6 +515,7 @@ async def add_keyword_summary(event):
     keyword = event.pattern_match.group(1).strip()
     if keyword not in SUMMARY_KEYWORDS:
         SUMMARY_KEYWORDS.append(keyword)
+        refresh_keyword_matchers(SUMMARY_KEYWORDS)
         with open('summary_keywords.json', 'w') as f:
             json.dump({'SUMMARY_KEYWORDS': SUMMARY_KEYWORDS}, f)
         await event.reply(f"Kata kunci summary {keyword} ditambahkan.")
@@ -328,6 +531,7 @@ async def remove_keyword_summary(event):
     keyword = event.pattern_match.group(1).strip()
     if keyword in SUMMARY_KEYWORDS:
         SUMMARY_KEYWORDS.remove(keyword)
+        refresh_keyword_matchers(SUMMARY_KEYWORDS)
         with open('summary_keywords.json', 'w') as f:
             json.dump({'SUMMARY_KEYWORDS': SUMMARY_KEYWORDS}, f)
         await event.reply(f"Kata kunci summary {keyword} dihapus.")
@@ -365,6 +569,7 @@ async def add_keyword(event):
     keyword = event.pattern_match.group(1).strip()
     if keyword not in KEYWORDS:
         KEYWORDS.append(keyword)
+        refresh_keyword_matchers(KEYWORDS)
         with open('keywords.json', 'w') as f:
             json.dump({'KEYWORDS': KEYWORDS}, f)
         await event.reply(f"Kata kunci {keyword} ditambahkan.")
@@ -390,6 +595,7 @@ async def remove_keyword(event):
     keyword = event.pattern_match.group(1).strip()
     if keyword in KEYWORDS:
         KEYWORDS.remove(keyword)
+        refresh_keyword_matchers(KEYWORDS)
         with open('keywords.json', 'w') as f:
             json.dump({'KEYWORDS': KEYWORDS}, f)
         await event.reply(f"Kata kunci {keyword} dihapus.")
@@ -481,6 +687,7 @@ async def add_blocked_keyword(event):
     keyword = event.pattern_match.group(1).strip()
     if keyword not in BLOCKED_KEYWORDS:
         BLOCKED_KEYWORDS.append(keyword)
+        refresh_keyword_matchers(BLOCKED_KEYWORDS)
         with open('blocked_keywords.json', 'w') as f:
             json.dump({'BLOCKED_KEYWORDS': BLOCKED_KEYWORDS}, f)
         await event.reply(f"Kata yang diblokir {keyword} ditambahkan.")
@@ -496,6 +703,7 @@ async def remove_blocked_keyword(event):
     keyword = event.pattern_match.group(1).strip()
     if keyword in BLOCKED_KEYWORDS:
         BLOCKED_KEYWORDS.remove(keyword)
+        refresh_keyword_matchers(BLOCKED_KEYWORDS)
         with open('blocked_keywords.json', 'w') as f:
             json.dump({'BLOCKED_KEYWORDS': BLOCKED_KEYWORDS}, f)
         await event.reply(f"Kata yang diblokir {keyword} dihapus.")
@@ -513,4 +721,185 @@ async def list_blocked_keyword(event):
         list_str += "\n".join([f"{i+1}. {keyword}" for i, keyword in enumerate(BLOCKED_KEYWORDS)])
         await event.reply(f"```\n{list_str}\n```")
     else:
-        await event.reply("Tidak ada kata yang diblokir.")
\ No newline at end of file
+        await event.reply("Tidak ada kata yang diblokir.")
+
+async def translation_stats(event):
+    if event.sender_id not in ADMINS:
+        await event.reply("Kamu tidak berwenang menggunakan perintah ini.")
+        return
+    
+    stats = translation_cache.get_stats()
+    list_str = "Statistik Cache Terjemahan:\n"
+    list_str += f"Hit memori: {stats['memory_hits']}\n"
+    list_str += f"Hit disk: {stats['disk_hits']}\n"
+    list_str += f"Miss: {stats['misses']}\n"
+    list_str += f"Permintaan bersamaan yang dibagi: {stats['shared_inflight']}\n"
+    list_str += f"Hit rate: {stats['hit_rate']:.1%}\n"
+    list_str += f"Entri memori: {stats['memory_size']}/{translation_cache.max_size}\n"
+    list_str += f"TTL: {translation_cache.ttl:.0f} detik\n"
+    list_str += f"Deteksi bahasa: heuristik {detection_stats['heuristic']}, langdetect {detection_stats['fallback']}, tidak diterjemahkan {detection_stats['not_translatable']}\n"
+    batch_stats = translation_batcher.stats
+    if batch_stats["batches"]:
+        list_str += f"Batch: {batch_stats['batches']} ({batch_stats['items']} teks, terbesar {batch_stats['largest_batch']}, gagal {batch_stats['failed_batches']})\n"
+    list_str += format_connection_stats("translation")
+    for name, stats in provider_stats.items():
+        data = stats.to_dict()
+        p50 = f"{data['p50']:.2f}s" if data['p50'] is not None else "-"
+        p90 = f"{data['p90']:.2f}s" if data['p90'] is not None else "-"
+        list_str += f"\n{name}: menang {data['wins']}/{data['attempts']}, gagal {data['failures']}, dibatalkan {data['cancelled']}, p50 {p50}, p90 {p90}"
+    await event.reply(f"```\n{list_str}\n```")
+
+async def provider_status(event):
+    if event.sender_id not in ADMINS:
+        await event.reply("Kamu tidak berwenang menggunakan perintah ini.")
+        return
+    
+    ranked = rank_providers(get_translation_providers())
+    list_str = "Status Penyedia Terjemahan (urutan saat ini):\n"
+    for i, (name, _) in enumerate(ranked):
+        data = provider_stats[name].to_dict() if name in provider_stats else None
+        if not data:
+            list_str += f"{i+1}. {name}: belum ada data\n"
+            continue
+        ewma = f"{data['ewma_latency']:.2f}s" if data['ewma_latency'] is not None else "-"
+        list_str += f"{i+1}. {name}: {data['circuit']}, EWMA {ewma}, sukses {data['ewma_success']:.0%}, gagal beruntun {data['consecutive_failures']}\n"
+    skipped = [name for name, _ in get_translation_providers() if name not in [n for n, _ in ranked]]
+    for name in skipped:
+        data = provider_stats[name].to_dict()
+        list_str += f"- {name}: {data['circuit']} (dilewati), gagal beruntun {data['consecutive_failures']}\n"
+    await event.reply(f"```\n{list_str}\n```")
+
+async def discord_status(event):
+    if event.sender_id not in ADMINS:
+        await event.reply("Kamu tidak berwenang menggunakan perintah ini.")
+        return
+    
+    outbox = message_queue.get_stats()
+    limiter = rate_limiter.get_stats()
+    list_str = "Status Pengiriman Discord:\n"
+    list_str += f"Outbox: {outbox['pending']} tertunda ({outbox['memory_items']} di memori, {outbox['memory_bytes']} byte), {outbox['spilled']} pernah ditumpahkan ke disk\n"
+    list_str += f"Rate limit: {limiter['rate_limited']}x 429 ({limiter['global_limited']} global), menunggu total {limiter['waited_seconds']:.1f} detik, pacing {limiter['pacing_interval']:.2f} detik\n"
+    list_str += f"Penggabungan: {coalesce_stats['messages']} pesan dalam {coalesce_stats['posts']} kiriman\n"
+    list_str += format_connection_stats("discord") + format_connection_stats("discord_webhook")
+    list_str += format_media_stats()
+    if expired_stats:
+        list_str += f"Kedaluwarsa ({DISCORD_EXPIRED_ACTION}): " + ", ".join(f"{category} {counts['dropped']} dibuang/{counts['delayed']} terlambat" for category, counts in expired_stats.items()) + "\n"
+    if len(shards) > 1:
+        list_str += "\nShard (thread, kategori, tertunda, terkirim/gagal, 429):\n"
+        for shard in shards:
+            shard_stats = shard.get_stats()
+            list_str += f"{shard.name}{'' if shard_stats['healthy'] else ' [TIDAK SEHAT]'}: {shard_stats['thread_id']}, {','.join(shard_stats['categories']) or 'hash'}, {shard_stats['pending']}, {shard_stats['sent']}/{shard_stats['failed']}, {shard_stats['rate_limited']}\n"
+    if DISCORD_WEBHOOK_URL:
+        webhook_outbox = webhook_queue.get_stats()
+        webhook_limits = webhook_limiter.get_stats()
+        list_str += f"Webhook ({', '.join(DISCORD_WEBHOOK_CATEGORIES) or 'tidak ada kategori'}): {webhook_outbox['pending']} tertunda, {webhook_stats['posts']} kiriman berisi {webhook_stats['embeds']} embed, {webhook_limits['rate_limited']}x 429\n"
+    list_str += "\nLane (kedalaman, terkirim, rata-rata/p95/maks tunggu):\n"
+    for category, lane in message_queue.lane_stats().items():
+        p95 = f"{lane['p95_wait']:.1f}s" if lane['p95_wait'] is not None else "-"
+        list_str += f"{category}: {lane['depth']}, {lane['dispatched']}, {lane['avg_wait']:.1f}s/{p95}/{lane['max_wait']:.1f}s\n"
+    await event.reply(f"```\n{list_str}\n```")
+
+async def deadletter_list(event):
+    if event.sender_id not in ADMINS:
+        await event.reply("Kamu tidak berwenang menggunakan perintah ini.")
+        return
+    
+    filter_text = (event.pattern_match.group(1) or "all").strip()
+    entries = dead_letters.find(filter_text)
+    if not entries:
+        await event.reply(f"Tidak ada pesan dead-letter untuk filter: {filter_text}")
+        return
+    list_str = f"Dead-letter ({dead_letters.count()} total, filter: {filter_text}, {len(entries)} terbaru):\n"
+    for entry in entries:
+        created = datetime.fromtimestamp(entry['created_at']).strftime('%Y-%m-%d %H:%M')
+        media = " [gambar]" if entry['has_media'] else ""
+        list_str += f"#{entry['id']} {created} {entry['category']}{media}, {entry['attempts']} percobaan: {entry['message'][:60]}\n"
+        list_str += f"    {entry['reason'][:120]}\n"
+    await event.reply(f"```\n{list_str}\n```")
+
+async def deadletter_redrive(event):
+    if event.sender_id not in ADMINS:
+        await event.reply("Kamu tidak berwenang menggunakan perintah ini.")
+        return
+    
+    filter_text = event.pattern_match.group(1).strip()
+    count = await redrive_dead_letters(filter_text)
+    await event.reply(f"{count} pesan dead-letter dimasukkan kembali ke antrian Discord (filter: {filter_text}).")
+    logger.info(f"Admin {event.sender_id} me-redrive {count} pesan dead-letter (filter: {filter_text})")
+
+async def deadletter_purge(event):
+    if event.sender_id not in ADMINS:
+        await event.reply("Kamu tidak berwenang menggunakan perintah ini.")
+        return
+    
+    filter_text = event.pattern_match.group(1).strip()
+    count = dead_letters.purge(filter_text)
+    await event.reply(f"{count} pesan dead-letter dihapus (filter: {filter_text}).")
+    logger.info(f"Admin {event.sender_id} menghapus {count} pesan dead-letter (filter: {filter_text})")
+
+async def list_learned_blocked(event):
+    if event.sender_id not in ADMINS:
+        await event.reply("Kamu tidak berwenang menggunakan perintah ini.")
+        return
+    
+    features = block_predictor.top_features()
+    if not features:
+        await event.reply("Prediktor blokir belum mempelajari apa pun.")
+        return
+    list_str = f"Prediktor Blokir (ambang {block_predictor.threshold:.0%}, minimal {block_predictor.min_evidence} blokir):\n"
+    list_str += f"Dipelajari dari {block_predictor.stats['learned_blocks']} pesan diblokir, {block_predictor.stats['predicted']} pesan ditahan, {block_predictor.stats['probes']} probe sejak start\n"
+    list_str += f"Laju blokir latar: {block_predictor.background_rate():.1%}\n"
+    for i, (feature, confidence, blocked, delivered) in enumerate(features):
+        marker = " *" if confidence >= block_predictor.threshold else ""
+        list_str += f"{i+1}. {feature}: {confidence:.0%} (diblokir {blocked}, terkirim {delivered}){marker}\n"
+    await event.reply(f"```\n{list_str}\n```")
+
+async def forget_learned_blocked(event):
+    if event.sender_id not in ADMINS:
+        await event.reply("Kamu tidak berwenang menggunakan perintah ini.")
+        return
+    
+    feature = event.pattern_match.group(1).strip().lower()
+    if block_predictor.forget(feature):
+        await event.reply(f"Fitur {feature} dihapus dari prediktor blokir.")
+        logger.info(f"Fitur {feature} dihapus dari prediktor blokir oleh admin {event.sender_id}")
+    else:
+        await event.reply(f"Fitur {feature} tidak ada di prediktor blokir.")
+
+async def pipeline_status(event):
+    if event.sender_id not in ADMINS:
+        await event.reply("Kamu tidak berwenang menggunakan perintah ini.")
+        return
+    
+    list_str = "Status Pipeline Pesan (pekerja sibuk/total, antrian/kapasitas, lane terpanjang, diproses, berhenti, gagal, rata-rata, menunggu tahap berikut):\n"
+    for name, stage in message_pipeline.get_stats().items():
+        list_str += (f"{name}: {stage['busy']}/{stage['concurrency']}, {stage['depth']}/{stage['capacity']}, {stage['max_lane_depth']}, "
+                     f"{stage['processed']}, {stage['stopped']}, {stage['failed']}, {stage['avg_seconds'] * 1000:.0f} ms, {stage['blocked_seconds']:.1f}s\n")
+    if ADMISSION_CONTROL:
+        admission = admission_controller.stats
+        list_str += f"\nKontrol beban: tahap {admission_controller.level} ({ADMISSION_STEPS[admission_controller.level]})\n"
+        list_str += f"Sinyal (nilai/ambang): {admission_controller.format_readings() or '-'}\n"
+        list_str += (f"Naik tahap {admission['escalations']}x; tanpa terjemahan {admission['untranslated']}, "
+                     f"dipotong {admission['summarized']}, dibuang {admission['dropped']} ({', '.join(ADMISSION_DROP_CATEGORIES) or '-'})\n")
+    else:
+        list_str += "\nKontrol beban: nonaktif\n"
+    await event.reply(f"```\n{list_str}\n```")
+
+async def telegram_status(event):
+    if event.sender_id not in ADMINS:
+        await event.reply("Kamu tidak berwenang menggunakan perintah ini.")
+        return
+    
+    sender = telegram_sender.get_stats()
+    list_str = f"Status Pengiriman Telegram ke {TARGET_CHANNEL}:\n"
+    list_str += f"Antrian: {sender['pending']}/{sender['capacity']}, laju {sender['rate_per_minute']:.0f} pesan/menit, menunggu jatah total {sender['paced_seconds']:.1f} detik\n"
+    paused = [f"{kind} {seconds:.0f}s" for kind, seconds in sender["paused"].items() if seconds]
+    if paused:
+        list_str += f"FloodWait aktif: {', '.join(paused)}\n"
+    list_str += "\nLane (tertunda, terkirim, gagal, dibuang, FloodWait, rata-rata/p95/maks tunggu):\n"
+    for category, lane in sender["lanes"].items():
+        p95 = f"{lane['p95_wait']:.1f}s" if lane['p95_wait'] is not None else "-"
+        paused = f" [dijeda {lane['paused_for']:.0f}s]" if lane['paused_for'] else ""
+        list_str += (f"{category}{paused}: {lane['depth']}, {lane['sent']}, {lane['failed']}, {lane['dropped']}, "
+                     f"{lane['flood_waits']}x/{lane['flood_wait_seconds']}s, {lane['avg_wait']:.1f}s/{p95}/{lane['max_wait']:.1f}s\n")
+    await event.reply(f"```\n{list_str}\n```")
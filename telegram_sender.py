@@ -0,0 +1,229 @@
+# telegram_sender.py
+import asyncio
+import time
+from collections import deque
+from telethon import functions, utils
+from telethon.errors import FloodWaitError
+from config import TARGET_CHANNEL, TELEGRAM_SEND_RATE, TELEGRAM_SEND_BURST, TELEGRAM_SEND_QUEUE_SIZE, logger
+from discord_scheduler import CATEGORY_PRIORITY, DEFAULT_CATEGORY, LaneStats
+from discord_utils import failed_message_queue
+
+# Tambahan jeda di atas waktu FloodWait dari Telegram (detik)
+FLOOD_WAIT_PADDING = 1.0
+
+# Jenis permintaan Telethon per pesan: teks (SendMessageRequest) atau media (SendMediaRequest)
+REQUEST_KINDS = {"text": "teks", "media": "media"}
+
+def request_kind(item):
+    """Jenis permintaan yang dipakai untuk mengirim item: 'media' jika ada file, selain itu 'text'."""
+    return "media" if item["file"] is not None else "text"
+
+class SenderLane:
+    """
+    Antrian FIFO satu kategori beserta statistiknya.
+    """
+
+    def __init__(self, category):
+        self.category = category
+        self.items = deque()
+        self.wait_stats = LaneStats()
+        self.stats = {"sent": 0, "failed": 0, "dropped": 0, "flood_waits": 0, "flood_wait_seconds": 0}
+
+class TelegramSender:
+    """
+    Pengirim pesan ke TARGET_CHANNEL yang terpisah dari pipeline pemrosesan. Pesan diambil dengan
+    prioritas ketat per kategori (VIP > SUMMARY > FILTERED > IMAGE > UNFILTERED) dan dijatah dengan
+    token bucket sesuai batas posting channel. Telethon mencatat FloodWait per jenis permintaan untuk
+    seluruh klien, sehingga FloodWaitError menjeda semua lane yang pesan terdepannya memakai jenis
+    permintaan yang sama (teks atau media); pesannya dikembalikan ke depan lane dan lane dengan jenis
+    lain tetap berjalan. Kegagalan selain FloodWait dilaporkan ke admin lewat failed_message_queue.
+    """
+
+    def __init__(self, target=TARGET_CHANNEL, rate_per_minute=TELEGRAM_SEND_RATE, burst=TELEGRAM_SEND_BURST, max_size=TELEGRAM_SEND_QUEUE_SIZE):
+        self.target = target
+        self.rate = rate_per_minute / 60.0
+        self.burst = burst
+        self.max_size = max_size
+        self.lanes = {category: SenderLane(category) for category in CATEGORY_PRIORITY}
+        self.client = None
+        self.paused_until = {kind: 0.0 for kind in REQUEST_KINDS}
+        self._tokens = float(burst)
+        self._refilled_at = time.monotonic()
+        self._wakeup = asyncio.Event()
+        self._task = None
+        self.stats = {"queued": 0, "paced_seconds": 0.0}
+
+    def qsize(self):
+        """Jumlah pesan yang menunggu di semua lane."""
+        return sum(len(lane.items) for lane in self.lanes.values())
+
+    def _shed(self, category):
+        """
+        Membuang pesan tertua dari lane berprioritas paling rendah yang tidak lebih penting dari pesan baru.
+
+        Returns:
+            bool: True jika ada tempat untuk pesan baru.
+        """
+        new_rank = CATEGORY_PRIORITY.index(category)
+        for victim in reversed(CATEGORY_PRIORITY[new_rank:]):
+            lane = self.lanes[victim]
+            if lane.items:
+                dropped = lane.items.popleft()
+                lane.stats["dropped"] += 1
+                logger.warning(f"Antrian Telegram penuh ({self.max_size}), pesan {victim} dibuang: {dropped['text'][:50]}...")
+                return True
+        self.lanes[category].stats["dropped"] += 1
+        logger.warning(f"Antrian Telegram penuh ({self.max_size}), pesan {category} baru dibuang")
+        return False
+
+    def enqueue(self, text, category=DEFAULT_CATEGORY, file=None):
+        """
+        Memasukkan pesan ke antrian kirim tanpa menunggu pengiriman.
+
+        Args:
+            text (str): Teks pesan.
+            category (str): Kategori pesan untuk prioritas.
+            file: Media Telethon yang ikut dikirim (opsional).
+
+        Returns:
+            bool: True jika pesan masuk antrian, False jika dibuang karena antrian penuh.
+        """
+        category = category if category in self.lanes else DEFAULT_CATEGORY
+        if self.qsize() >= self.max_size and not self._shed(category):
+            return False
+        self.lanes[category].items.append({"text": text, "file": file, "queued_at": time.monotonic()})
+        self.stats["queued"] += 1
+        self._wakeup.set()
+        return True
+
+    def _paused_for(self, lane, now):
+        # Lane tertahan selama jenis permintaan pesan terdepannya masih dalam FloodWait
+        if not lane.items:
+            return 0.0
+        return max(0.0, self.paused_until[request_kind(lane.items[0])] - now)
+
+    def _next_lane(self, now):
+        for category in CATEGORY_PRIORITY:
+            lane = self.lanes[category]
+            if lane.items and not self._paused_for(lane, now):
+                return lane
+        return None
+
+    def _next_resume(self, now):
+        resumes = [self._paused_for(lane, now) for lane in self.lanes.values()]
+        resumes = [resume for resume in resumes if resume > 0]
+        return min(resumes) if resumes else None
+
+    async def _pace(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._refilled_at) * self.rate)
+        self._refilled_at = now
+        if self._tokens < 1:
+            delay = (1 - self._tokens) / self.rate
+            self.stats["paced_seconds"] += delay
+            await asyncio.sleep(delay)
+            self._tokens = 1.0
+            self._refilled_at = time.monotonic()
+        self._tokens -= 1
+
+    async def _request(self, item):
+        """
+        Mengirim item dengan SendMessageRequest atau SendMediaRequest (media yang sudah ada di Telegram)
+        dan flood_sleep_threshold=0 hanya untuk permintaan ini, sehingga FloodWait dilempar untuk ditangani
+        pengirim tanpa mengubah ambang klien yang juga dipakai download_media, balasan admin, dan get_entity.
+
+        Args:
+            item (dict): Item antrian dengan 'text' dan 'file' (media pesan sumber atau None).
+        """
+        client = self.client
+        entity = await client.get_input_entity(self.target)
+        # Format teks sama dengan send_message (parse_mode bawaan klien)
+        text, entities = await client._parse_message_text(item["text"], ())
+        if item["file"] is not None:
+            request = functions.messages.SendMediaRequest(peer=entity, media=utils.get_input_media(item["file"]), message=text, entities=entities)
+        else:
+            request = functions.messages.SendMessageRequest(peer=entity, message=text, entities=entities)
+        # TelegramClient.__call__ di Telethon 1.39 tidak meneruskan flood_sleep_threshold; _call yang memakainya
+        await client._call(client._sender, request, flood_sleep_threshold=0)
+
+    async def _send(self, lane, item):
+        try:
+            await self._request(item)
+        except FloodWaitError as e:
+            kind = request_kind(item)
+            lane.items.appendleft(item)
+            self.paused_until[kind] = max(self.paused_until[kind], time.monotonic() + e.seconds + FLOOD_WAIT_PADDING)
+            lane.stats["flood_waits"] += 1
+            lane.stats["flood_wait_seconds"] += e.seconds
+            waiting = sum(len(other.items) for other in self.lanes.values() if other.items and request_kind(other.items[0]) == kind)
+            logger.warning(f"FloodWait {e.seconds} detik dari Telegram pada lane {lane.category}, semua pengiriman {REQUEST_KINDS[kind]} dijeda ({waiting} pesan tertunda)")
+            return
+        except Exception as e:
+            lane.stats["failed"] += 1
+            logger.error(f"Gagal mengirim pesan {lane.category} ke {self.target}: {str(e)}")
+            await failed_message_queue.put((item["text"], f"Gagal mengirim ke {self.target}: {str(e)}", "Telegram"))
+            return
+        lane.stats["sent"] += 1
+        lane.wait_stats.record(time.monotonic() - item["queued_at"])
+
+    async def run(self):
+        """Pekerja yang mengirim pesan dari antrian ke TARGET_CHANNEL."""
+        while True:
+            self._wakeup.clear()
+            now = time.monotonic()
+            lane = self._next_lane(now)
+            if lane is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self._next_resume(now))
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._pace()
+            # Lane berprioritas lebih tinggi mungkin terisi selama menunggu jatah kirim
+            lane = self._next_lane(time.monotonic()) or lane
+            if not lane.items:
+                continue
+            await self._send(lane, lane.items.popleft())
+
+    def start(self, client):
+        """
+        Menjalankan pekerja pengirim dengan klien Telegram yang sudah login.
+
+        Args:
+            client: TelegramClient.
+        """
+        self.client = client
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        """Menghentikan pekerja pengirim; pesan yang masih di antrian dibuang."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self.qsize():
+            logger.warning(f"{self.qsize()} pesan Telegram belum terkirim saat berhenti")
+
+    def get_stats(self):
+        """
+        Mengembalikan statistik pengirim dan setiap lane.
+
+        Returns:
+            dict: Statistik global dan per kategori (tertunda, terkirim, gagal, dibuang, FloodWait, waktu tunggu).
+        """
+        now = time.monotonic()
+        lanes = {}
+        for category, lane in self.lanes.items():
+            lanes[category] = {
+                **lane.stats,
+                "depth": len(lane.items),
+                "paused_for": self._paused_for(lane, now),
+                "avg_wait": lane.wait_stats.total_wait / lane.wait_stats.dispatched if lane.wait_stats.dispatched else 0.0,
+                "p95_wait": lane.wait_stats.percentile(0.95),
+                "max_wait": lane.wait_stats.max_wait,
+            }
+        paused = {kind: max(0.0, until - now) for kind, until in self.paused_until.items()}
+        return {**self.stats, "pending": self.qsize(), "capacity": self.max_size, "rate_per_minute": self.rate * 60, "paused": paused, "lanes": lanes}
+
+telegram_sender = TelegramSender()
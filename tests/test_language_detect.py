@@ -0,0 +1,28 @@
+# tests/test_language_detect.py
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from language_detect import is_translatable
+
+class IsTranslatableTest(unittest.TestCase):
+    """Hanya teks berisi ticker, angka, URL, atau username yang dilewati penerjemah."""
+
+    def test_ticker_only_text_is_skipped(self):
+        for text in ("BTC ETH SOL", "$BTC $ETH", "BTC/USDT 65,000", "SOL +12%", "@whale_alert https://x.com/a", "PEPE"):
+            with self.subTest(text=text):
+                self.assertFalse(is_translatable(text))
+
+    def test_all_caps_headlines_are_translated(self):
+        for text in ("FED HOLDS RATES", "US CPI 3.1%", "BREAKING: SEC SUES BINANCE", "OIL PRICES DROP"):
+            with self.subTest(text=text):
+                self.assertTrue(is_translatable(text))
+
+    def test_regular_sentences_are_translated(self):
+        self.assertTrue(is_translatable("Binance lists SOL perpetuals"))
+        self.assertTrue(is_translatable("ETF inflows hit a record"))
+
+if __name__ == "__main__":
+    unittest.main()
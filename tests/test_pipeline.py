@@ -0,0 +1,65 @@
+# tests/test_pipeline.py
+import asyncio
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# config.py memvalidasi variabel wajib saat diimpor; isi nilai uji jika belum ada
+for name, value in (("TELEGRAM_API_ID", "1"), ("TELEGRAM_API_HASH", "test"), ("TELEGRAM_PHONE", "+0"),
+                    ("TARGET_CHANNEL", "test"), ("DISCORD_AUTH_TOKEN", "test"), ("DISCORD_THREAD_ID", "1")):
+    os.environ.setdefault(name, value)
+
+from pipeline import Pipeline, PipelineStage
+
+class PipelineOrderingTest(unittest.IsolatedAsyncioTestCase):
+    """Urutan job per chat harus terjaga walaupun antrian penuh dan banyak job menunggu masuk."""
+
+    async def run_jobs(self, chats, jobs_per_chat, concurrency, queue_size, burst=2):
+        processed = {}
+
+        async def passthrough(job):
+            await asyncio.sleep(0)
+            return job
+
+        async def record(job):
+            processed.setdefault(job["chat_id"], []).append(job["seq"])
+            return job
+
+        pipeline = Pipeline([
+            PipelineStage("first", passthrough, concurrency=concurrency, queue_size=queue_size),
+            PipelineStage("last", record, concurrency=concurrency, queue_size=queue_size),
+        ])
+        pipeline.start()
+        # Setiap job dimasukkan dari task sendiri, seperti handler event Telethon, dan job baru terus
+        # datang selama antrian penuh sehingga job baru bertemu slot yang baru dikosongkan pekerja
+        submits = []
+        for seq in range(jobs_per_chat):
+            for chat in range(chats):
+                submits.append(asyncio.create_task(pipeline.submit({"chat_id": chat, "seq": seq})))
+                if len(submits) % burst == 0:
+                    await asyncio.sleep(0)
+        await asyncio.gather(*submits)
+        while pipeline.in_flight():
+            await asyncio.sleep(0.01)
+        await pipeline.stop()
+        return processed
+
+    async def test_single_chat_order_under_backpressure(self):
+        processed = await self.run_jobs(chats=1, jobs_per_chat=200, concurrency=1, queue_size=5)
+        self.assertEqual(processed[0], list(range(200)))
+
+    async def test_per_chat_order_with_parallel_lanes(self):
+        processed = await self.run_jobs(chats=7, jobs_per_chat=60, concurrency=3, queue_size=6)
+        self.assertEqual(sorted(processed), list(range(7)))
+        for chat, sequence in processed.items():
+            self.assertEqual(sequence, list(range(60)), f"urutan chat {chat} tertukar")
+
+    async def test_blocked_time_counts_only_waiting_puts(self):
+        stage = PipelineStage("idle", lambda job: job, concurrency=1, queue_size=10)
+        await stage.put({"chat_id": 1})
+        self.assertEqual(stage.stats["blocked_seconds"], 0.0)
+
+if __name__ == "__main__":
+    unittest.main()
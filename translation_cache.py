@@ -0,0 +1,164 @@
+# translation_cache.py
+import asyncio
+import hashlib
+import re
+import sqlite3
+import time
+from collections import OrderedDict
+from config import TRANSLATION_CACHE_SIZE, TRANSLATION_CACHE_TTL, TRANSLATION_CACHE_PATH, logger
+
+class TranslationCache:
+    """
+    Cache terjemahan dua tingkat: LRU di memori dan SQLite di disk dengan TTL.
+    Permintaan yang sama dan sedang berjalan dibagi ke semua pemanggil.
+    """
+
+    def __init__(self, max_size=TRANSLATION_CACHE_SIZE, ttl=TRANSLATION_CACHE_TTL, db_path=TRANSLATION_CACHE_PATH):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.db_path = db_path
+        self._memory = OrderedDict()
+        self._inflight = {}
+        self._db = None
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "shared_inflight": 0, "stores": 0}
+
+    def _connect(self):
+        if self._db is None:
+            self._db = sqlite3.connect(self.db_path)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS translations ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._db.commit()
+        return self._db
+
+    @staticmethod
+    def make_key(text, target_lang):
+        """
+        Membuat kunci cache dari teks yang dinormalisasi dan bahasa target.
+
+        Args:
+            text (str): Teks sumber.
+            target_lang (str): Kode bahasa target.
+
+        Returns:
+            str: Kunci cache (hash SHA-1).
+        """
+        normalized = re.sub(r'\s+', ' ', text).strip()
+        return hashlib.sha1(f"{target_lang}\x00{normalized}".encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """Mengambil terjemahan dari memori, lalu dari disk. Mengembalikan None jika tidak ada."""
+        now = time.time()
+        entry = self._memory.get(key)
+        if entry is not None:
+            value, expires_at = entry
+            if expires_at > now:
+                self._memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return value
+            del self._memory[key]
+
+        try:
+            row = self._connect().execute(
+                "SELECT value, expires_at FROM translations WHERE key = ? AND expires_at > ?", (key, now)
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.error(f"Gagal membaca cache terjemahan: {str(e)}")
+            row = None
+        if row:
+            self._remember(key, row[0], row[1])
+            self.stats["disk_hits"] += 1
+            return row[0]
+
+        self.stats["misses"] += 1
+        return None
+
+    def set(self, key, value):
+        """Menyimpan terjemahan ke memori dan disk."""
+        expires_at = time.time() + self.ttl
+        self._remember(key, value, expires_at)
+        try:
+            db = self._connect()
+            db.execute("INSERT OR REPLACE INTO translations (key, value, expires_at) VALUES (?, ?, ?)", (key, value, expires_at))
+            db.commit()
+        except sqlite3.Error as e:
+            logger.error(f"Gagal menyimpan cache terjemahan: {str(e)}")
+        self.stats["stores"] += 1
+
+    def _remember(self, key, value, expires_at):
+        self._memory[key] = (value, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_size:
+            self._memory.popitem(last=False)
+
+    def purge_expired(self):
+        """Menghapus entri kedaluwarsa dari disk."""
+        try:
+            db = self._connect()
+            deleted = db.execute("DELETE FROM translations WHERE expires_at <= ?", (time.time(),)).rowcount
+            db.commit()
+            if deleted:
+                logger.info(f"{deleted} entri cache terjemahan kedaluwarsa dihapus.")
+        except sqlite3.Error as e:
+            logger.error(f"Gagal membersihkan cache terjemahan: {str(e)}")
+
+    async def get_or_translate(self, text, target_lang, translate_func):
+        """
+        Mengambil terjemahan dari cache atau menjalankan translate_func sekali untuk semua pemanggil yang bersamaan.
+
+        Args:
+            text (str): Teks yang akan diterjemahkan.
+            target_lang (str): Kode bahasa target.
+            translate_func: Coroutine function (text, target_lang) -> str atau None jika gagal.
+
+        Returns:
+            str: Teks hasil terjemahan, atau None jika terjemahan gagal.
+        """
+        key = self.make_key(text, target_lang)
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+
+        future = self._inflight.get(key)
+        if future is not None:
+            self.stats["shared_inflight"] += 1
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await translate_func(text, target_lang)
+            if result is not None:
+                self.set(key, result)
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Hindari peringatan "exception was never retrieved" jika tidak ada pemanggil lain
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    def get_stats(self):
+        """Mengembalikan statistik cache beserta jumlah entri di memori."""
+        lookups = self.stats["memory_hits"] + self.stats["disk_hits"] + self.stats["misses"]
+        hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+        return {
+            **self.stats,
+            "memory_size": len(self._memory),
+            "hit_rate": hits / lookups if lookups else 0.0,
+        }
+
+    def close(self):
+        """Menutup koneksi SQLite."""
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+translation_cache = TranslationCache()
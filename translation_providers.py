@@ -0,0 +1,344 @@
+# translation_providers.py
+import asyncio
+import time
+from collections import deque
+from config import (
+    TRANSLATION_HEDGE_DELAY, TRANSLATION_HEDGE_PERCENTILE, TRANSLATION_DEADLINE,
+    TRANSLATION_EWMA_ALPHA, TRANSLATION_BREAKER_THRESHOLD, TRANSLATION_BREAKER_COOLDOWN, logger
+)
+
+CIRCUIT_CLOSED = "closed"
+CIRCUIT_OPEN = "open"
+CIRCUIT_HALF_OPEN = "half_open"
+
+# Teks pendek untuk probe half-open
+PROBE_TEXT = "Good morning"
+
+class ProviderStats:
+    """
+    Statistik per penyedia terjemahan: latensi terbaru, jumlah percobaan, kemenangan, dan kegagalan,
+    beserta EWMA latensi/tingkat keberhasilan dan status circuit breaker untuk penjadwalan adaptif.
+    """
+
+    def __init__(self, name, window=100):
+        self.name = name
+        self.latencies = deque(maxlen=window)
+        self.attempts = 0
+        self.successes = 0
+        self.failures = 0
+        self.cancelled = 0
+        self.wins = 0
+        self.ewma_latency = None
+        self.ewma_success = 1.0
+        self.consecutive_failures = 0
+        self.circuit = CIRCUIT_CLOSED
+        self.opened_at = None
+
+    def _update_ewma(self, latency, success):
+        if self.ewma_latency is None:
+            self.ewma_latency = latency
+        else:
+            self.ewma_latency += TRANSLATION_EWMA_ALPHA * (latency - self.ewma_latency)
+        self.ewma_success += TRANSLATION_EWMA_ALPHA * ((1.0 if success else 0.0) - self.ewma_success)
+
+    def record_success(self, latency):
+        self.successes += 1
+        self.latencies.append(latency)
+        self._update_ewma(latency, True)
+        self.consecutive_failures = 0
+        if self.circuit != CIRCUIT_CLOSED:
+            logger.info(f"Circuit breaker penyedia {self.name} ditutup kembali.")
+        self.circuit = CIRCUIT_CLOSED
+        self.opened_at = None
+
+    def record_failure(self, latency):
+        self.failures += 1
+        self.latencies.append(latency)
+        self._update_ewma(latency, False)
+        self.consecutive_failures += 1
+        if self.circuit == CIRCUIT_HALF_OPEN or (
+            self.circuit == CIRCUIT_CLOSED and self.consecutive_failures >= TRANSLATION_BREAKER_THRESHOLD
+        ):
+            self.circuit = CIRCUIT_OPEN
+            self.opened_at = time.monotonic()
+            logger.warning(f"Circuit breaker penyedia {self.name} terbuka setelah {self.consecutive_failures} kegagalan beruntun.")
+
+    def probe_due(self):
+        """True jika circuit terbuka dan masa tunggu sudah lewat sehingga probe half-open boleh dikirim."""
+        return self.circuit == CIRCUIT_OPEN and time.monotonic() - self.opened_at >= TRANSLATION_BREAKER_COOLDOWN
+
+    def score(self):
+        """Skor peringkat (lebih kecil lebih baik): EWMA latensi dibagi tingkat keberhasilan."""
+        if self.ewma_latency is None:
+            return None
+        return self.ewma_latency / max(self.ewma_success, 0.05)
+
+    def percentile(self, p):
+        """Mengembalikan persentil latensi terbaru (detik), atau None jika belum ada data."""
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        index = min(len(ordered) - 1, int(p * len(ordered)))
+        return ordered[index]
+
+    def hedge_delay(self):
+        """
+        Anggaran latensi sebelum penyedia berikutnya dijalankan secara paralel.
+        Memakai persentil latensi terbaru, atau TRANSLATION_HEDGE_DELAY jika data belum cukup.
+        """
+        if len(self.latencies) < 10:
+            return TRANSLATION_HEDGE_DELAY
+        return self.percentile(TRANSLATION_HEDGE_PERCENTILE)
+
+    def to_dict(self):
+        p50 = self.percentile(0.5)
+        p90 = self.percentile(0.9)
+        return {
+            "attempts": self.attempts,
+            "successes": self.successes,
+            "failures": self.failures,
+            "cancelled": self.cancelled,
+            "wins": self.wins,
+            "p50": p50,
+            "p90": p90,
+            "ewma_latency": self.ewma_latency,
+            "ewma_success": self.ewma_success,
+            "consecutive_failures": self.consecutive_failures,
+            "circuit": self.circuit,
+        }
+
+provider_stats = {}
+
+def get_provider_stats(name):
+    """Mengambil (atau membuat) statistik untuk penyedia dengan nama tertentu."""
+    if name not in provider_stats:
+        provider_stats[name] = ProviderStats(name)
+    return provider_stats[name]
+
+def rank_providers(providers):
+    """
+    Mengurutkan penyedia berdasarkan skor adaptif dan melewati penyedia yang circuit breaker-nya terbuka.
+    Penyedia tanpa data diletakkan di belakang sesuai urutan konfigurasi. Jika semua circuit terbuka, semua penyedia tetap dicoba.
+
+    Args:
+        providers (list): Daftar tuple (nama, coroutine function) sesuai urutan konfigurasi.
+
+    Returns:
+        list: Daftar penyedia yang sudah diurutkan.
+    """
+    available = [(index, entry) for index, entry in enumerate(providers) if get_provider_stats(entry[0]).circuit == CIRCUIT_CLOSED]
+    if not available:
+        logger.warning("Semua circuit breaker penyedia terjemahan terbuka, mencoba semua penyedia.")
+        available = list(enumerate(providers))
+
+    def sort_key(item):
+        index, (name, _) = item
+        score = get_provider_stats(name).score()
+        # Penyedia yang belum punya data diletakkan setelah yang sudah terukur, sesuai urutan konfigurasi
+        return (score if score is not None else float('inf'), index)
+
+    return [entry for _, entry in sorted(available, key=sort_key)]
+
+async def provider_probe_worker(providers, interval=10):
+    """
+    Mengirim probe half-open secara berkala ke penyedia yang circuit breaker-nya terbuka.
+    Probe yang berhasil menutup circuit, probe yang gagal membukanya kembali.
+
+    Args:
+        providers (list): Daftar tuple (nama, coroutine function).
+        interval (float): Jeda pemeriksaan dalam detik.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        for name, provider in providers:
+            stats = get_provider_stats(name)
+            if not stats.probe_due():
+                continue
+            stats.circuit = CIRCUIT_HALF_OPEN
+            logger.info(f"Mengirim probe half-open ke penyedia {name}...")
+            try:
+                await _call_provider(name, provider, PROBE_TEXT, "id")
+            except Exception as e:
+                logger.warning(f"Probe penyedia {name} gagal: {str(e)}")
+
+async def _call_provider(name, provider, text, target_lang):
+    """Menjalankan satu penyedia sambil mencatat latensi dan hasilnya."""
+    stats = get_provider_stats(name)
+    stats.attempts += 1
+    start = time.monotonic()
+    try:
+        result = await provider(text, target_lang)
+    except asyncio.CancelledError:
+        stats.cancelled += 1
+        raise
+    except Exception:
+        stats.record_failure(time.monotonic() - start)
+        raise
+    if not result:
+        stats.record_failure(time.monotonic() - start)
+        raise Exception("Hasil terjemahan kosong")
+    stats.record_success(time.monotonic() - start)
+    return result
+
+async def translate_sequential(providers, text, target_lang):
+    """
+    Mencoba penyedia satu per satu sesuai urutan hingga ada yang berhasil.
+
+    Args:
+        providers (list): Daftar tuple (nama, coroutine function).
+        text (str): Teks yang akan diterjemahkan.
+        target_lang (str): Kode bahasa target.
+
+    Returns:
+        str: Teks yang telah diterjemahkan, atau None jika semua gagal.
+    """
+    for name, provider in providers:
+        try:
+            translated_text = await _call_provider(name, provider, text, target_lang)
+            get_provider_stats(name).wins += 1
+            logger.info(f"Terjemahan {name} berhasil: {translated_text}")
+            return translated_text
+        except Exception as e:
+            logger.error(f"Terjemahan {name} gagal: {str(e)}")
+    return None
+
+async def translate_hedged(providers, text, target_lang, deadline=None):
+    """
+    Menjalankan penyedia secara bertahap: jika penyedia terakhir belum menjawab dalam anggaran latensinya
+    (atau gagal), penyedia berikutnya dijalankan paralel. Jawaban valid pertama menang, sisanya dibatalkan.
+
+    Args:
+        providers (list): Daftar tuple (nama, coroutine function) sesuai prioritas.
+        text (str): Teks yang akan diterjemahkan.
+        target_lang (str): Kode bahasa target.
+        deadline (float, optional): Batas waktu total dalam detik (default: TRANSLATION_DEADLINE).
+
+    Returns:
+        str: Teks yang telah diterjemahkan, atau None jika semua gagal atau batas waktu habis.
+    """
+    loop = asyncio.get_running_loop()
+    end = loop.time() + (deadline if deadline is not None else TRANSLATION_DEADLINE)
+    remaining = list(providers)
+    pending = {}
+    last_launched = None
+
+    def launch():
+        nonlocal last_launched
+        name, provider = remaining.pop(0)
+        task = asyncio.create_task(_call_provider(name, provider, text, target_lang))
+        pending[task] = name
+        last_launched = name
+        logger.debug(f"Menjalankan penyedia terjemahan {name}")
+
+    try:
+        while pending or remaining:
+            if not pending:
+                launch()
+            time_left = end - loop.time()
+            if time_left <= 0:
+                logger.warning(f"Batas waktu terjemahan habis untuk teks: {text[:50]}...")
+                break
+            timeout = min(get_provider_stats(last_launched).hedge_delay(), time_left) if remaining else time_left
+            done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                if remaining:
+                    logger.info(f"Penyedia {last_launched} melewati anggaran latensi, menjalankan penyedia berikutnya secara paralel.")
+                    launch()
+                continue
+            for task in done:
+                name = pending.pop(task)
+                if task.exception() is None:
+                    get_provider_stats(name).wins += 1
+                    translated_text = task.result()
+                    logger.info(f"Terjemahan {name} menang: {translated_text}")
+                    return translated_text
+                logger.error(f"Terjemahan {name} gagal: {str(task.exception())}")
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+    return None
+
+class TranslationBatcher:
+    """
+    Mengumpulkan teks yang datang bersamaan selama jendela singkat, lalu mengirimnya sebagai satu
+    permintaan multi-segmen dan membagikan hasilnya kembali ke masing-masing pemanggil.
+    Batch dikirim saat jendela waktu habis, jumlah item mencapai max_items, atau jumlah karakter mencapai max_chars.
+    Latensi dan circuit breaker batch dicatat terpisah (nama '<penyedia>_batch') agar tidak mencampuri
+    statistik permintaan tunggal yang dipakai untuk peringkat penyedia.
+    """
+
+    def __init__(self, name, batch_provider, window, max_items, max_chars):
+        self.name = name
+        self.stats_name = f"{name}_batch"
+        self.batch_provider = batch_provider
+        self.window = window
+        self.max_items = max_items
+        self.max_chars = max_chars
+        self._pending = {}
+        self._timers = {}
+        self.stats = {"batches": 0, "items": 0, "largest_batch": 0, "failed_batches": 0}
+
+    async def submit(self, text, target_lang):
+        """
+        Menambahkan teks ke batch untuk bahasa target dan menunggu hasil terjemahannya.
+
+        Returns:
+            str: Teks yang telah diterjemahkan.
+
+        Raises:
+            Exception: Jika permintaan batch gagal.
+        """
+        future = asyncio.get_running_loop().create_future()
+        batch = self._pending.setdefault(target_lang, [])
+        if batch and sum(len(t) for t, _ in batch) + len(text) > self.max_chars:
+            self._flush(target_lang)
+            batch = self._pending.setdefault(target_lang, [])
+        batch.append((text, future))
+
+        if len(batch) >= self.max_items or sum(len(t) for t, _ in batch) >= self.max_chars:
+            self._flush(target_lang)
+        elif target_lang not in self._timers:
+            self._timers[target_lang] = asyncio.get_running_loop().call_later(self.window, self._flush, target_lang)
+        return await future
+
+    async def translate_one(self, text, target_lang):
+        """
+        Menerjemahkan satu teks lewat penyedia batch tanpa menunggu jendela batch.
+        Dipakai provider_probe_worker untuk probe half-open circuit breaker batch.
+
+        Returns:
+            str: Teks yang telah diterjemahkan.
+        """
+        results = await self.batch_provider([text], target_lang)
+        return results[0] if results else None
+
+    def _flush(self, target_lang):
+        timer = self._timers.pop(target_lang, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._pending.pop(target_lang, None)
+        if batch:
+            asyncio.create_task(self._run(batch, target_lang))
+
+    async def _run(self, batch, target_lang):
+        texts = [text for text, _ in batch]
+        self.stats["batches"] += 1
+        self.stats["items"] += len(texts)
+        self.stats["largest_batch"] = max(self.stats["largest_batch"], len(texts))
+        try:
+            results = await _call_provider(self.stats_name, self.batch_provider, texts, target_lang)
+            if len(results) != len(texts):
+                raise Exception(f"Jumlah hasil batch tidak sesuai: {len(results)} dari {len(texts)}")
+            get_provider_stats(self.stats_name).wins += 1
+            logger.info(f"Batch terjemahan {self.name} berisi {len(texts)} teks berhasil.")
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+        except Exception as e:
+            self.stats["failed_batches"] += 1
+            logger.error(f"Batch terjemahan {self.name} gagal ({len(texts)} teks): {str(e)}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
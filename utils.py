@@ -1,9 +1,16 @@
 # utils.py
 import re
 import aiohttp
-import requests
-from langdetect import detect
-from config import GOOGLE_API_KEY, logger
+from config import (
+    GOOGLE_API_KEY, TRANSLATION_TIMEOUT, TRANSLATION_HEDGING, TRANSLATION_BATCHING,
+    TRANSLATION_BATCH_WINDOW, TRANSLATION_BATCH_MAX_ITEMS, TRANSLATION_BATCH_MAX_CHARS, logger
+)
+from http_sessions import get_session
+from translation_cache import translation_cache
+from language_detect import is_translatable, detect_language, detection_stats
+from translation_providers import (
+    translate_sequential, translate_hedged, rank_providers, get_provider_stats, TranslationBatcher, CIRCUIT_CLOSED
+)
 from telethon.errors import SessionPasswordNeededError
 
 def extract_username(input_str):
@@ -27,6 +34,138 @@ def extract_username(input_str):
         return match.group(1)
     return input_str
 
+def _is_word_char(char):
+    """Sama dengan \\w pada regex Python: huruf/angka Unicode atau garis bawah."""
+    return char.isalnum() or char == '_'
+
+class KeywordMatcher:
+    """
+    Pencocok banyak kata kunci sekaligus dengan trie karakter. Setiap posisi awal kata di teks
+    ditelusuri paling jauh sepanjang kata kunci terpanjang, sehingga biaya per pesan bergantung
+    pada panjang teks dan bukan pada jumlah kata kunci.
+    """
+
+    def __init__(self, keywords, allow_at_prefix=True):
+        """
+        Args:
+            keywords (list): Daftar kata kunci.
+            allow_at_prefix (bool): Jika True, kata kunci juga cocok bila diawali '@' (misalnya username).
+        """
+        self.allow_at_prefix = allow_at_prefix
+        self._trie = {}
+        for keyword in keywords:
+            keyword_clean = keyword.lower().strip()
+            if allow_at_prefix:
+                keyword_clean = keyword_clean.lstrip('@')
+            if not keyword_clean:
+                continue
+            node = self._trie
+            for char in keyword_clean:
+                node = node.setdefault(char, {})
+            # Kunci None menandai akhir kata kunci dan menyimpan bentuk aslinya (yang pertama menang)
+            node.setdefault(None, keyword)
+
+    def find(self, text):
+        """
+        Mencari kata kunci pertama yang cocok di teks: kata kunci harus diawali batas kata (atau '@'
+        jika allow_at_prefix) dan diakhiri batas kata; di posisi yang sama, kata kunci terpanjang diutamakan.
+        
+        Args:
+            text (str): Teks yang akan diperiksa (huruf besar/kecil diabaikan).
+        
+        Returns:
+            str: Kata kunci asli yang cocok, atau None.
+        """
+        if not self._trie or not text:
+            return None
+        text = text.lower()
+        length = len(text)
+        root = self._trie
+        previous_is_word = False
+        for start in range(length):
+            char = text[start]
+            is_word = _is_word_char(char)
+            at_boundary = is_word != previous_is_word or (self.allow_at_prefix and start > 0 and text[start - 1] == '@')
+            previous_is_word = is_word
+            if not at_boundary or char not in root:
+                continue
+            node = root
+            found = None
+            position = start
+            while position < length:
+                node = node.get(text[position])
+                if node is None:
+                    break
+                position += 1
+                if None in node and _is_word_char(text[position - 1]) != (position < length and _is_word_char(text[position])):
+                    found = node[None]
+            if found is not None:
+                return found
+        return None
+
+# Pencocok yang sudah dikompilasi per daftar kata kunci: id(daftar) -> (daftar, allow_at_prefix, matcher)
+_keyword_matchers = {}
+
+def get_keyword_matcher(keywords, allow_at_prefix=True):
+    """
+    Mengambil pencocok terkompilasi untuk daftar kata kunci, membuatnya jika belum ada.
+    
+    Args:
+        keywords (list): Daftar kata kunci (misalnya config.KEYWORDS).
+        allow_at_prefix (bool): Aturan awalan '@' (lihat KeywordMatcher).
+    
+    Returns:
+        KeywordMatcher: Pencocok untuk daftar tersebut.
+    """
+    entry = _keyword_matchers.get((id(keywords), allow_at_prefix))
+    if entry is None:
+        return rebuild_keyword_matcher(keywords, allow_at_prefix)
+    return entry[1]
+
+def rebuild_keyword_matcher(keywords, allow_at_prefix=True):
+    """
+    Membangun ulang pencocok untuk daftar kata kunci. Dipanggil setiap kali daftar diubah;
+    pencocok lama diganti sekaligus sehingga pesan tidak pernah melihat pencocok setengah jadi.
+    
+    Args:
+        keywords (list): Daftar kata kunci yang telah diubah.
+        allow_at_prefix (bool): Aturan awalan '@' (lihat KeywordMatcher).
+    
+    Returns:
+        KeywordMatcher: Pencocok yang baru.
+    """
+    matcher = KeywordMatcher(list(keywords), allow_at_prefix)
+    # Simpan referensi daftar agar id-nya tidak dipakai ulang objek lain
+    _keyword_matchers[(id(keywords), allow_at_prefix)] = (keywords, matcher)
+    logger.debug(f"Pencocok kata kunci dibangun ulang ({len(keywords)} kata kunci).")
+    return matcher
+
+def refresh_keyword_matchers(keywords):
+    """
+    Membangun ulang semua pencocok yang terdaftar untuk daftar kata kunci tertentu.
+    
+    Args:
+        keywords (list): Daftar kata kunci yang telah diubah.
+    """
+    for allow_at_prefix in (True, False):
+        if (id(keywords), allow_at_prefix) in _keyword_matchers:
+            rebuild_keyword_matcher(keywords, allow_at_prefix)
+
+def find_keyword(text, keywords):
+    """
+    Mencari kata kunci yang cocok di teks, termasuk username dengan @.
+    
+    Args:
+        text (str): Teks yang akan diperiksa.
+        keywords (list): Daftar kata kunci.
+    
+    Returns:
+        str: Kata kunci yang cocok, atau None.
+    """
+    if not text or not keywords:
+        return None
+    return get_keyword_matcher(keywords).find(text)
+
 def contains_keyword(text, keywords):
     """
     Memeriksa apakah teks mengandung salah satu kata kunci, termasuk username dengan @.
@@ -42,16 +181,12 @@ def contains_keyword(text, keywords):
         logger.warning("Teks atau kata kunci kosong.")
         return False
     
-    text_lower = text.lower().strip()
-    for keyword in keywords:
-        keyword_clean = keyword.lower().strip()
-        # Cocokkan kata kunci, termasuk jika diawali dengan @
-        pattern = r'(?:@|\b)' + re.escape(keyword_clean.lstrip('@')) + r'\b'
-        if re.search(pattern, text_lower):
-            logger.info(f"Kata kunci '{keyword}' ditemukan di pesan: {text}")
-            return True
+    keyword = find_keyword(text, keywords)
+    if keyword is not None:
+        logger.info(f"Kata kunci '{keyword}' ditemukan di pesan.")
+        return True
     
-    logger.info(f"Tidak ada kata kunci yang cocok di pesan: {text}")
+    logger.debug(f"Tidak ada kata kunci yang cocok di pesan: {text}")
     return False
 
 def contains_blocked_keyword(text, blocked_keywords):
@@ -69,12 +204,11 @@ def contains_blocked_keyword(text, blocked_keywords):
         logger.debug("Teks atau blocked keywords kosong.")
         return False
     
-    text_lower = text.lower().strip()
-    for keyword in blocked_keywords:
-        keyword_clean = keyword.lower().strip()
-        if re.search(r'\b' + re.escape(keyword_clean) + r'\b', text_lower):
-            logger.warning(f"Kata yang diblokir '{keyword}' ditemukan di pesan: {text}")
-            return True
+    keyword = get_keyword_matcher(blocked_keywords, allow_at_prefix=False).find(text)
+    if keyword is not None:
+        logger.warning(f"Kata yang diblokir '{keyword}' ditemukan di pesan.")
+        logger.debug(f"Pesan dengan kata yang diblokir: {text}")
+        return True
     
     return False
 
@@ -181,6 +315,7 @@ def remove_markdown(text):
 async def translate_text(text, target_lang="id"):
     """
     Menerjemahkan teks ke bahasa target menggunakan beberapa API terjemahan.
+    Hasil disimpan di cache, dan permintaan yang sama yang berjalan bersamaan hanya dikirim sekali.
     
     Args:
         text (str): Teks yang akan diterjemahkan.
@@ -189,91 +324,219 @@ async def translate_text(text, target_lang="id"):
     Returns:
         str: Teks yang telah diterjemahkan, atau teks asli jika gagal.
     """
-    try:
-        if not text or detect(text) == "id":
-            logger.info(f"Teks sudah dalam bahasa Indonesia atau kosong: {text}")
-            return text
-        
-        url = "https://sysapi.wordvice.ai/tools/non-member/fetch-llm-result"
-        payload = {
-            "prompt": "Translate the following English text into Indonesian.",
-            "text": text,
-            "tool": "translate"
-        }
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Linux; Android 10; K) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/135.0.0.0 Mobile Safari/537.36",
-            "Accept": "application/json",
-            "Content-Type": "application/json",
-            "accept-language": "en-US,en;q=0.9",
-            "origin": "https://wordvice.ai",
-            "referer": "https://wordvice.ai/"
-        }
-        async with aiohttp.ClientSession() as session:
-            async with session.post(url, json=payload, headers=headers, timeout=aiohttp.ClientTimeout(total=10)) as response:
-                if response.status != 200:
-                    raise Exception(f"Wordvice API error: {response.status}")
-                data = await response.json()
-                if data.get("code") == "0000":
-                    translated_text = data["result"][0]["text"]
-                    logger.info(f"Terjemahan Wordvice AI berhasil: {translated_text}")
-                    return translated_text
-                else:
-                    raise Exception(f"API error: {data.get('message')}")
+    if not text:
+        return text
+    if not is_translatable(text):
+        detection_stats["not_translatable"] += 1
+        logger.debug(f"Teks hanya berisi ticker/angka/URL/username, tidak diterjemahkan: {text}")
+        return text
+    translated_text = await translation_cache.get_or_translate(text, target_lang, _translate_uncached)
+    return translated_text if translated_text is not None else text
+
+async def _translate_uncached(text, target_lang):
+    """
+    Menerjemahkan teks tanpa cache, mencoba penyedia sesuai peringkat adaptif (EWMA latensi dan tingkat
+    keberhasilan), melewati penyedia dengan circuit breaker terbuka.
+    Jika TRANSLATION_HEDGING aktif, penyedia yang lambat disusul penyedia berikutnya secara paralel.
+    Jika TRANSLATION_BATCHING aktif dan Google sedang berada di peringkat teratas (Google diletakkan pertama
+    dalam urutan awal selama batching aktif), teks dikumpulkan bersama pesan lain dan diterjemahkan sekaligus
+    lewat Google; selain itu peringkat dan hedging dipakai seperti biasa. Selama circuit breaker batch terbuka,
+    batching dilewati sampai probe half-open dari provider_probe_worker berhasil.
     
-    except Exception as e:
-        logger.error(f"Terjemahan Wordvice AI gagal: {str(e)}, mencoba MachineTranslation...")
-        
+    Returns:
+        str: Teks yang telah diterjemahkan, atau None jika semua API gagal.
+    """
+    if await detect_language(text) == target_lang:
+        logger.info(f"Teks sudah dalam bahasa target ({target_lang}): {text}")
+        return text
+
+    providers = rank_providers(get_translation_providers())
+    if (TRANSLATION_BATCHING and providers and providers[0][0] == translation_batcher.name
+            and get_provider_stats(translation_batcher.stats_name).circuit == CIRCUIT_CLOSED):
         try:
-            url = "https://api.machinetranslation.com/v1/translation/lingvanex"
-            payload = {
-                "text": text,
-                "source_language_code": "en",
-                "target_language_code": target_lang,
-                "share_id": "19bd9373-bb23-4d01-aa07-5cea4218eb37"
-            }
-            headers = {
-                'User-Agent': "Mozilla/5.0 (Linux; Android 10; K) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/135.0.0.0 Mobile Safari/537.36",
-                'Accept': "application/json, text/plain, */*",
-                'Accept-Encoding': "gzip, deflate, br, zstd",
-                'Content-Type': "application/json",
-                'sec-ch-ua-platform': "\"Android\"",
-                'sec-ch-ua': "\"Brave\";v=\"135\", \"Not-A.Brand\";v=\"8\", \"Chromium\";v=\"135\"",
-                'sec-ch-ua-mobile': "?1",
-                'Sec-GPC': "1",
-                'Accept-Language': "en-US,en;q=0.5",
-                'Origin': "https://www.machinetranslation.com",
-                'Sec-Fetch-Site': "same-site",
-                'Sec-Fetch-Mode': "cors",
-                'Sec-Fetch-Dest': "empty",
-                'Referer': "https://www.machinetranslation.com/"
-            }
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, json=payload, headers=headers, timeout=aiohttp.ClientTimeout(total=10)) as response:
-                    if response.status != 200:
-                        raise Exception(f"MachineTranslation API error: {response.status}")
-                    data = await response.json()
-                    translated_text = data["response"]["translated_text"]
-                    logger.info(f"Terjemahan MachineTranslation berhasil: {translated_text}")
-                    return translated_text
-        
+            return await translation_batcher.submit(text, target_lang)
         except Exception as e:
-            logger.error(f"Terjemahan MachineTranslation gagal: {str(e)}, mencoba Google Translate...")
-            
-            try:
-                if GOOGLE_API_KEY:
-                    url = f"https://translation.googleapis.com/language/translate/v2?key={GOOGLE_API_KEY}"
-                    payload = {"q": text, "target": target_lang, "format": "text"}
-                    response = requests.post(url, json=payload)
-                    response.raise_for_status()
-                    translated_text = response.json()["data"]["translations"][0]["translatedText"]
-                    logger.info(f"Terjemahan Google Translate berhasil: {translated_text}")
-                    return translated_text
-                else:
-                    logger.warning("Tidak ada kunci API cadangan untuk Google Translate.")
-                    return text
-            except Exception as fallback_e:
-                logger.critical(f"Semua API terjemahan gagal: {str(fallback_e)}")
-                return text
+            logger.error(f"Terjemahan batch gagal, kembali ke terjemahan per pesan: {str(e)}")
+    if TRANSLATION_HEDGING:
+        translated_text = await translate_hedged(providers, text, target_lang)
+    else:
+        translated_text = await translate_sequential(providers, text, target_lang)
+    if translated_text is None:
+        logger.critical(f"Semua API terjemahan gagal untuk teks: {text[:50]}...")
+    return translated_text
+
+async def translate_wordvice(text, target_lang):
+    """
+    Menerjemahkan teks dengan Wordvice AI.
+    
+    Returns:
+        str: Teks yang telah diterjemahkan.
+    
+    Raises:
+        Exception: Jika API gagal atau mengembalikan error.
+    """
+    url = "https://sysapi.wordvice.ai/tools/non-member/fetch-llm-result"
+    payload = {
+        "prompt": "Translate the following English text into Indonesian.",
+        "text": text,
+        "tool": "translate"
+    }
+    headers = {
+        "User-Agent": "Mozilla/5.0 (Linux; Android 10; K) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/135.0.0.0 Mobile Safari/537.36",
+        "Accept": "application/json",
+        "Content-Type": "application/json",
+        "accept-language": "en-US,en;q=0.9",
+        "origin": "https://wordvice.ai",
+        "referer": "https://wordvice.ai/"
+    }
+    session = get_session("translation")
+    async with session.post(url, json=payload, headers=headers, timeout=aiohttp.ClientTimeout(total=TRANSLATION_TIMEOUT)) as response:
+        if response.status != 200:
+            raise Exception(f"Wordvice API error: {response.status}")
+        data = await response.json()
+        if data.get("code") != "0000":
+            raise Exception(f"API error: {data.get('message')}")
+        return data["result"][0]["text"]
+
+async def translate_machinetranslation(text, target_lang):
+    """
+    Menerjemahkan teks dengan MachineTranslation (Lingvanex).
+    
+    Returns:
+        str: Teks yang telah diterjemahkan.
+    
+    Raises:
+        Exception: Jika API gagal atau mengembalikan error.
+    """
+    url = "https://api.machinetranslation.com/v1/translation/lingvanex"
+    payload = {
+        "text": text,
+        "source_language_code": "en",
+        "target_language_code": target_lang,
+        "share_id": "19bd9373-bb23-4d01-aa07-5cea4218eb37"
+    }
+    headers = {
+        'User-Agent': "Mozilla/5.0 (Linux; Android 10; K) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/135.0.0.0 Mobile Safari/537.36",
+        'Accept': "application/json, text/plain, */*",
+        'Accept-Encoding': "gzip, deflate, br, zstd",
+        'Content-Type': "application/json",
+        'sec-ch-ua-platform': "\"Android\"",
+        'sec-ch-ua': "\"Brave\";v=\"135\", \"Not-A.Brand\";v=\"8\", \"Chromium\";v=\"135\"",
+        'sec-ch-ua-mobile': "?1",
+        'Sec-GPC': "1",
+        'Accept-Language': "en-US,en;q=0.5",
+        'Origin': "https://www.machinetranslation.com",
+        'Sec-Fetch-Site': "same-site",
+        'Sec-Fetch-Mode': "cors",
+        'Sec-Fetch-Dest': "empty",
+        'Referer': "https://www.machinetranslation.com/"
+    }
+    session = get_session("translation")
+    async with session.post(url, json=payload, headers=headers, timeout=aiohttp.ClientTimeout(total=TRANSLATION_TIMEOUT)) as response:
+        if response.status != 200:
+            raise Exception(f"MachineTranslation API error: {response.status}")
+        data = await response.json()
+        return data["response"]["translated_text"]
+
+async def translate_google(text, target_lang):
+    """
+    Menerjemahkan teks dengan Google Translate v2 secara asinkron.
+    
+    Returns:
+        str: Teks yang telah diterjemahkan.
+    
+    Raises:
+        Exception: Jika API gagal atau mengembalikan error.
+    """
+    url = f"https://translation.googleapis.com/language/translate/v2?key={GOOGLE_API_KEY}"
+    payload = {"q": text, "target": target_lang, "format": "text"}
+    session = get_session("translation")
+    async with session.post(url, json=payload, timeout=aiohttp.ClientTimeout(total=TRANSLATION_TIMEOUT)) as response:
+        if response.status != 200:
+            raise Exception(f"Google Translate API error: {response.status} - {await response.text()}")
+        data = await response.json()
+        return data["data"]["translations"][0]["translatedText"]
+
+async def translate_google_batch(texts, target_lang):
+    """
+    Menerjemahkan beberapa teks sekaligus dengan Google Translate v2 (beberapa parameter `q`).
+    
+    Args:
+        texts (list): Daftar teks yang akan diterjemahkan.
+        target_lang (str): Kode bahasa target.
+    
+    Returns:
+        list: Daftar teks terjemahan dengan urutan yang sama.
+    
+    Raises:
+        Exception: Jika API gagal atau mengembalikan error.
+    """
+    url = f"https://translation.googleapis.com/language/translate/v2?key={GOOGLE_API_KEY}"
+    payload = {"q": texts, "target": target_lang, "format": "text"}
+    session = get_session("translation")
+    async with session.post(url, json=payload, timeout=aiohttp.ClientTimeout(total=TRANSLATION_TIMEOUT)) as response:
+        if response.status != 200:
+            raise Exception(f"Google Translate API error: {response.status} - {await response.text()}")
+        data = await response.json()
+        return [item["translatedText"] for item in data["data"]["translations"]]
+
+translation_batcher = TranslationBatcher(
+    "google",
+    translate_google_batch,
+    window=TRANSLATION_BATCH_WINDOW,
+    max_items=TRANSLATION_BATCH_MAX_ITEMS,
+    max_chars=TRANSLATION_BATCH_MAX_CHARS
+)
+
+# Urutan awal penyedia terjemahan; urutan sebenarnya disesuaikan oleh rank_providers.
+# Jika TRANSLATION_BATCHING aktif, Google dipindah ke depan agar jalur batch terpakai sejak awal.
+TRANSLATION_PROVIDERS = [
+    ("wordvice", translate_wordvice),
+    ("machinetranslation", translate_machinetranslation),
+    ("google", translate_google)
+]
+
+# Host setiap penyedia terjemahan, untuk pemanasan koneksi dan probe keep-alive
+TRANSLATION_PROVIDER_HOSTS = {
+    "wordvice": "https://sysapi.wordvice.ai/",
+    "machinetranslation": "https://api.machinetranslation.com/",
+    "google": "https://translation.googleapis.com/"
+}
+
+def get_translation_warmup_urls():
+    """
+    Mengembalikan URL host untuk setiap penyedia terjemahan yang aktif.
+    
+    Returns:
+        list: Daftar URL host.
+    """
+    return [TRANSLATION_PROVIDER_HOSTS[name] for name, _ in get_translation_providers() if name in TRANSLATION_PROVIDER_HOSTS]
+
+def get_translation_providers():
+    """
+    Mengembalikan penyedia terjemahan yang aktif (Google hanya jika GOOGLE_API_KEY tersedia).
+    Jika TRANSLATION_BATCHING aktif, Google diletakkan pertama.
+    
+    Returns:
+        list: Daftar tuple (nama, coroutine function).
+    """
+    providers = [(name, provider) for name, provider in TRANSLATION_PROVIDERS if name != "google" or GOOGLE_API_KEY]
+    if TRANSLATION_BATCHING:
+        providers.sort(key=lambda entry: entry[0] != translation_batcher.name)
+    return providers
+
+def get_probe_providers():
+    """
+    Mengembalikan penyedia yang perlu diprobe saat circuit breaker-nya terbuka, termasuk jalur batch
+    Google (dengan nama statistik '<penyedia>_batch') jika TRANSLATION_BATCHING aktif.
+    
+    Returns:
+        list: Daftar tuple (nama, coroutine function).
+    """
+    providers = get_translation_providers()
+    if TRANSLATION_BATCHING and any(name == translation_batcher.name for name, _ in providers):
+        providers.append((translation_batcher.stats_name, translation_batcher.translate_one))
+    return providers
 
 async def login(client, code_queue):
     """